@@ -1,6 +1,5 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from app.services.agent_chat_service import agent_chat_answer
-from app.services.agent_chat_service import flush_all_chat_logs
+from app.services.agent_chat_service import aagent_chat_answer, astream_agent_chat
 from typing import List, Dict
 import uuid
 import time
@@ -11,6 +10,8 @@ router = APIRouter()
 async def agent_chat_ws(websocket: WebSocket):
     """
     WebSocket 기반 Agent QA 챗봇 (manual_id, sender, message 입력 → 답변/기록 반환)
+    기본은 스트리밍: tool_start → retrieved → token(여러 번) → final 프레임 순서로 전송합니다.
+    요청에 "stream": false를 넣으면 최종 결과 한 프레임만 전송합니다.
     """
     await websocket.accept()
     history: List[Dict[str, str]] = []
@@ -30,15 +31,31 @@ async def agent_chat_ws(websocket: WebSocket):
             # experiment_id 없으면 새로 생성 (정수값으로)
             experiment_id = data.get("experiment_id") or experiment_id or int(time.time())
 
-            # agent_chat_answer 호출 시 session_id 전달
-            result = agent_chat_answer(
-                manual_id=manual_id, 
-                sender="user",
-                message=message, 
-                user_id=user_id, 
-                experiment_id=experiment_id,
-                history=history
-            )
+            if data.get("stream", True):
+                # 진행 프레임은 바로 전송하고, final 프레임의 결과로 history를 갱신한다
+                result = {}
+                async for frame in astream_agent_chat(
+                    manual_id=manual_id,
+                    sender="user",
+                    message=message,
+                    user_id=user_id,
+                    experiment_id=experiment_id,
+                    history=history
+                ):
+                    if frame["event"] == "final":
+                        result = frame
+                    else:
+                        await websocket.send_json(frame)
+            else:
+                # agent_chat_answer 호출 시 session_id 전달 (스레드 풀에서 실행해 다른 연결을 막지 않음)
+                result = await aagent_chat_answer(
+                    manual_id=manual_id, 
+                    sender="user",
+                    message=message, 
+                    user_id=user_id, 
+                    experiment_id=experiment_id,
+                    history=history
+                )
             answer = result.get("response", "")
             msg_type = result.get("type", "message")
             logged = result.get("logged", False)
@@ -50,6 +67,7 @@ async def agent_chat_ws(websocket: WebSocket):
             history.append({"role": "assistant", "content": answer})
 
             await websocket.send_json({
+                "event": "final",
                 "message": message,
                 "answer": answer,
                 "type": msg_type,
@@ -58,7 +76,7 @@ async def agent_chat_ws(websocket: WebSocket):
                 "history": history[-10:]  # 최근 10턴만 반환
             })
     except WebSocketDisconnect:
+        # 채팅 로그는 chat_log_persister가 Redis Stream에서 계속 저장하므로 별도 flush가 필요 없다
         print(f"Agent Chat WebSocket 연결 종료 (Experiment: {experiment_id})")
-        flush_all_chat_logs() # 종료될 때 Redis → DB 저장 강제 수행
     except Exception as e:
         await websocket.send_json({"error": f"서버 오류: {str(e)}"})
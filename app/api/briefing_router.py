@@ -4,7 +4,7 @@ from typing import Optional
 import os
 
 from app.dependencies import get_current_user
-from app.services.briefing import generate_voice_briefing
+from app.services.briefing import agenerate_voice_briefing
 from app.schemas.briefing import BriefingRequest, BriefingResponse
 
 router = APIRouter(prefix="/briefing", tags=["실험 매뉴얼 브리핑"])
@@ -71,7 +71,7 @@ async def generate_briefing(
             )
         
         # 음성 브리핑 생성 (summary와 audio_file_path 반환)
-        briefing_result = generate_voice_briefing(request.manual_id.strip())
+        briefing_result = await agenerate_voice_briefing(request.manual_id.strip())
         
         if not briefing_result.get("success", False):
             raise Exception("브리핑 생성 실패")
@@ -3,7 +3,7 @@ from typing import Dict, Any
 import asyncio
 from datetime import datetime
 
-from app.services.experiment_analyzer import analyze_experiments_sync, analyze_single_experiment
+from app.services.experiment_analyzer import aanalyze_experiments, aanalyze_single_experiment
 from app.schemas.experiment_analysis import (
     ExperimentAnalysisRequest,
     ExperimentAnalysisResponse,
@@ -14,10 +14,62 @@ from app.schemas.experiment_analysis import (
 router = APIRouter(prefix="/experiment-analysis", tags=["실험 단위 분석"])
 
 
+@router.post("/analyze", response_model=ExperimentAnalysisResponse)
+async def analyze_manual_experiments_endpoint(request: ExperimentAnalysisRequest, refresh: bool = False):
+    """
+    📚 매뉴얼 전체를 실험 단위로 분석합니다.
+    
+    **분석 과정:**
+    1. 벡터DB에서 해당 manual_id의 청크를 불러와 experiment_id별로 묶음
+    2. 실험마다 사용 기구, 시약, 절차, 위험 요소를 추출 (실험별 동시 실행)
+    3. 실험마다 위험 요소를 분류하고 위험도를 평가
+    
+    **Args:**
+    - manual_id: 분석할 매뉴얼 ID
+    - refresh: 저장된 분석 결과를 무시하고 다시 분석할지 여부
+    
+    **Returns:**
+    - 실험별 구조화된 위험 분석 결과
+    """
+    try:
+        if not request.manual_id or not request.manual_id.strip():
+            raise HTTPException(
+                status_code=400,
+                detail="manual_id는 필수 입력값입니다."
+            )
+        
+        result = await aanalyze_experiments(request.manual_id.strip(), refresh=refresh)
+
+        # 일부 실험만 실패한 경우 성공한 결과와 failed_experiments를 함께 반환하고,
+        # 모든 실험이 실패한 경우만 LLM 오류(502)로 응답한다
+        failed_experiments = result.get("failed_experiments") or []
+        if failed_experiments and len(failed_experiments) == len(result.get("experiments", [])):
+            raise HTTPException(
+                status_code=502,
+                detail=result.get("error", "모든 실험 분석에 실패했습니다.")
+            )
+        if not result.get("success", False) and not failed_experiments:
+            raise HTTPException(
+                status_code=404,
+                detail=result.get("error", "실험 분석 중 알 수 없는 오류가 발생했습니다.")
+            )
+
+        return ExperimentAnalysisResponse(**result)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"서버 내부 오류가 발생했습니다: {str(e)}"
+        )
+
+
 @router.post("/analyze-single")
 async def analyze_single_experiment_endpoint(
     manual_id: str,
-    experiment_id: str
+    experiment_id: str,
+    refresh: bool = False
 ):
     """
     🔬 특정 실험 하나만 독립적으로 분석합니다.
@@ -30,6 +82,7 @@ async def analyze_single_experiment_endpoint(
     **Args:**
     - manual_id: 매뉴얼 ID
     - experiment_id: 분석할 특정 실험 ID
+    - refresh: 저장된 분석 결과를 무시하고 다시 분석할지 여부
     
     **Returns:**
     - 단일 실험의 위험 분석 결과 (사용자 요구 형태)
@@ -48,7 +101,7 @@ async def analyze_single_experiment_endpoint(
             )
         
         # 단일 실험 분석 수행
-        result = analyze_single_experiment(manual_id.strip(), experiment_id.strip())
+        result = await aanalyze_single_experiment(manual_id.strip(), experiment_id.strip(), refresh=refresh)
         
         if not result.get("success", False):
             raise HTTPException(
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException
 from typing import Dict, List, Any
-from app.services.manual_analyze import analyze_manual_risks
+from app.services.manual_analyze import aanalyze_manual_risks
 from app.schemas.manual_analyze import (
     RiskAnalysisRequest, 
     RiskAnalysisResponse, 
@@ -36,7 +36,7 @@ async def analyze_manual_risks_endpoint(request: RiskAnalysisRequest):
             )
         
         # React Agent를 통한 위험 분석 수행
-        result = analyze_manual_risks(request.manual_id.strip())
+        result = await aanalyze_manual_risks(request.manual_id.strip(), refresh=request.refresh)
         
         if not result.get("success", False):
             raise HTTPException(
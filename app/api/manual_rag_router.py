@@ -1,55 +1,100 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Depends
-from fastapi.responses import JSONResponse
-from app.services.manual_rag import embed_pdf_manual
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import OpenAIEmbeddings
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Optional
+import json
+from app.services.ingestion_jobs import create_ingestion_job, start_ingestion_job, get_job, retry_ingestion_job
 from app.dependencies import get_current_user
+from app.db.vector_store import get_collection, build_where
+from app.core.executor import run_blocking
 
 router = APIRouter()
-CHROMA_DIR = "./chroma_db"
 
 @router.post("/manual/embed")
 async def manual_embed(file: UploadFile = File(...), current_user=Depends(get_current_user)):
     """
-    PDF 파일을 업로드하고 벡터DB에 저장합니다.
+    PDF 파일을 업로드하고 벡터DB 저장 작업을 백그라운드로 시작합니다.
+    반환된 job_id로 GET /manual/jobs/{job_id}에서 진행 상황을 조회합니다.
     """
     if not file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF files are supported.")
     try:
-        result = await embed_pdf_manual(file, user_id=current_user.id)
-        return JSONResponse(content=result)
+        content = await file.read()
+        job = create_ingestion_job(content, file.filename, user_id=current_user.id)
+        start_ingestion_job(job["job_id"])
+        return JSONResponse(content=job, status_code=202)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/manual/jobs/{job_id}")
+async def get_ingestion_job(job_id: str, current_user=Depends(get_current_user)):
+    """
+    수집 작업의 현재 단계(queued → parsed → vision_done → segmented → embedded)와 진행률을 조회합니다.
+    """
+    job = get_job(job_id)
+    if not job or job.get("user_id") != current_user.id:
+        raise HTTPException(status_code=404, detail="Ingestion job not found")
+    return JSONResponse(content=job)
+
+@router.post("/manual/jobs/{job_id}/retry")
+async def retry_ingestion(job_id: str, current_user=Depends(get_current_user)):
+    """
+    실패했거나 실행하던 프로세스가 종료된 수집 작업을 마지막으로 완료된 단계부터 다시 실행합니다.
+    """
+    job = get_job(job_id)
+    if not job or job.get("user_id") != current_user.id:
+        raise HTTPException(status_code=404, detail="Ingestion job not found")
+    if not retry_ingestion_job(job_id):
+        raise HTTPException(status_code=409, detail="Job is already done or is still running")
+    return JSONResponse(content=get_job(job_id), status_code=202)
+
+CHUNK_STREAM_BATCH_SIZE = 500
+
+def _iter_chunks_ndjson(collection, where):
+    # 배치 단위로 끊어 읽으며 한 줄에 청크 하나씩 내보낸다
+    offset = 0
+    while True:
+        results = collection.get(where=where, limit=CHUNK_STREAM_BATCH_SIZE, offset=offset, include=["documents", "metadatas"])
+        if not results["ids"]:
+            break
+        for doc, meta in zip(results["documents"], results["metadatas"]):
+            if doc:
+                yield json.dumps({"page_content": doc, "metadata": meta}, ensure_ascii=False) + "\n"
+        offset += len(results["ids"])
+
 @router.get("/manual/chunks")
 async def get_manual_chunks(
     manual_id: str = Query(None),
     manual_type: str = Query(None),
     source: str = Query(None)
-    , experiment_id: str = Query(None)
+    , experiment_id: str = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=5000, description="최대 반환 개수 (기본값: 전체)"),
+    offset: int = Query(0, ge=0),
+    format: str = Query("json", pattern="^(json|ndjson)$", description="ndjson이면 한 줄에 청크 하나씩 스트리밍")
 ):
     """
     Chroma DB에 저장된 chunk(문단)와 각 chunk의 메타데이터를 조회합니다.
-    manual_id, manual_type, source 등으로 필터링 가능.
+    manual_id, manual_type, source 등으로 필터링 가능. (필터는 벡터DB 쿼리에서 처리)
+    limit/offset으로 페이지 단위 조회가 가능하며, 다음 페이지가 있으면 next_offset을 반환합니다.
     """
-    embeddings = OpenAIEmbeddings()
-    vectorstore = Chroma(persist_directory=CHROMA_DIR, embedding_function=embeddings)
-    collection = vectorstore._collection
-    results = collection.get()
+    collection = get_collection()
+    where = build_where(
+        manual_id=manual_id,
+        manual_type=manual_type,
+        source=source,
+        experiment_id=experiment_id
+    )
+    if format == "ndjson":
+        return StreamingResponse(_iter_chunks_ndjson(collection, where), media_type="application/x-ndjson")
+
+    results = await run_blocking(collection.get, where=where, limit=limit, offset=offset or None, include=["documents", "metadatas"])
     docs = []
     for doc, meta in zip(results['documents'], results['metadatas']):
         if not doc:
             continue
-        if manual_id and meta.get("manual_id") != manual_id:
-            continue
-        if manual_type and meta.get("manual_type") != manual_type:
-            continue
-        if source and meta.get("source") != source:
-            continue
-        if experiment_id and meta.get("experiment_id") != experiment_id:
-            continue
         docs.append({
             "page_content": doc,
             "metadata": meta
         })
-    return JSONResponse(content={"chunks": docs, "count": len(docs)}) 
\ No newline at end of file
+    fetched = len(results["ids"])
+    next_offset = offset + fetched if limit is not None and fetched == limit else None
+    return JSONResponse(content={"chunks": docs, "count": len(docs), "offset": offset, "next_offset": next_offset})
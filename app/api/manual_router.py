@@ -64,7 +64,7 @@ def delete_manual(
         raise HTTPException(status_code=404, detail="Manual not found or not authorized")
     return manual
 
-@router.post("/upload", response_model=ManualOut)
+@router.post("/upload", response_model=ManualOut, status_code=status.HTTP_202_ACCEPTED)
 async def upload_manual(
     file: UploadFile = File(...),
     title: str = Form(...),
@@ -72,9 +72,13 @@ async def upload_manual(
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user)
 ):
+    """
+    매뉴얼을 등록하고 PDF 수집을 백그라운드 작업으로 시작합니다.
+    진행 상황은 GET /manual/jobs/{manual_id} 또는 매뉴얼의 status로 확인합니다.
+    """
     company_id = getattr(current_user, "company_id", None)
     manual_data = ManualCreate(title=title, filename=file.filename, manual_type=manual_type)
-    db_manual, embed_result = await create_manual_with_embedding(
+    db_manual, job = await create_manual_with_embedding(
         db, file, manual_data, current_user.id, company_id
     )
     return db_manual 
\ No newline at end of file
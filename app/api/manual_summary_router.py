@@ -1,15 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Dict, Optional
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import OpenAIEmbeddings
 from langchain_core.documents import Document
 
 from app.db.database import get_db
 from app.dependencies import get_current_user
+from app.db.vector_store import get_collection
+from app.core.executor import run_blocking
 from app.services.manual_summary import (
-    summarize_experiment_chunks,
-    summarize_experiments_by_manual_id,
+    aget_experiment_summary,
+    asummarize_experiments_by_manual_id,
+    iter_experiment_summaries,
+    group_chunks_by_experiment,
     save_summaries_to_json,
     parse_summary_to_structured_dict
 )
@@ -21,30 +24,27 @@ from app.schemas.manual_summary import (
     ExperimentCountResponse
 )
 import os
+import json
 
 router = APIRouter(prefix="/manual-summary", tags=["manual-summary"])
 
-# Chroma DB 설정
-CHROMA_DIR = "./chroma_db"
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-
 
 @router.get("/experiment/{experiment_id}", response_model=ExperimentSummaryResponse)
 async def summarize_single_experiment(
     experiment_id: str,
+    regenerate: bool = Query(False, description="저장된 요약을 무시하고 다시 생성"),
     current_user=Depends(get_current_user)
 ):
     """
-    특정 experiment_id의 청크들을 요약합니다.
+    특정 experiment_id의 청크들을 요약합니다. (저장된 요약이 있으면 그대로 반환)
     """
     try:
         # Chroma DB에서 해당 experiment_id의 청크들 조회
-        embeddings = OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY)
-        vectorstore = Chroma(persist_directory=CHROMA_DIR, embedding_function=embeddings)
-        
+        collection = get_collection()
+
         # 메타데이터 필터링으로 특정 experiment_id 청크만 조회
-        collection = vectorstore._collection
-        results = collection.get(
+        results = await run_blocking(
+            collection.get,
             where={"experiment_id": experiment_id}
         )
         
@@ -56,8 +56,8 @@ async def summarize_single_experiment(
         for doc, meta in zip(results['documents'], results['metadatas']):
             chunks.append(Document(page_content=doc, metadata=meta))
         
-        # 요약 생성
-        summary_result = summarize_experiment_chunks(chunks)
+        # 저장된 요약 조회 또는 생성
+        summary_result = await aget_experiment_summary(chunks, regenerate=regenerate)
         
         return ExperimentSummaryResponse(**summary_result)
         
@@ -68,18 +68,17 @@ async def summarize_single_experiment(
 @router.get("/manual/{manual_id}", response_model=ManualSummaryResponse)
 async def summarize_manual_experiments(
     manual_id: str,
+    regenerate: bool = Query(False, description="저장된 요약을 무시하고 다시 생성"),
     current_user=Depends(get_current_user)
 ):
     """
-    특정 manual_id의 모든 실험들을 요약합니다.
+    특정 manual_id의 모든 실험들을 요약합니다. (저장된 요약이 있으면 그대로 반환)
     """
     try:
         # Chroma DB에서 해당 manual_id의 모든 청크들 조회
-        embeddings = OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY)
-        vectorstore = Chroma(persist_directory=CHROMA_DIR, embedding_function=embeddings)
-        
-        collection = vectorstore._collection
-        results = collection.get(
+        collection = get_collection()
+        results = await run_blocking(
+            collection.get,
             where={"manual_id": manual_id}
         )
         
@@ -92,7 +91,7 @@ async def summarize_manual_experiments(
             chunks.append(Document(page_content=doc, metadata=meta))
         
         # 매뉴얼 전체 실험 요약 생성
-        summaries = summarize_experiments_by_manual_id(manual_id, chunks)
+        summaries = await asummarize_experiments_by_manual_id(manual_id, chunks, regenerate=regenerate)
         
         # 응답 형식에 맞게 변환
         experiment_summaries = [
@@ -109,21 +108,56 @@ async def summarize_manual_experiments(
         raise HTTPException(status_code=500, detail=f"매뉴얼 요약 생성 중 오류 발생: {str(e)}")
 
 
+@router.get("/manual/{manual_id}/stream")
+async def stream_manual_experiment_summaries(
+    manual_id: str,
+    regenerate: bool = Query(False, description="저장된 요약을 무시하고 다시 생성"),
+    current_user=Depends(get_current_user)
+):
+    """
+    특정 manual_id의 실험 요약을 완료되는 순서대로 NDJSON으로 스트리밍합니다.
+    첫 줄(start)에 전체 실험 수, 이후 실험마다 summary 한 줄, 마지막 줄(done)로 종료됩니다.
+    """
+    collection = get_collection()
+    results = await run_blocking(
+        collection.get,
+        where={"manual_id": manual_id}
+    )
+    
+    if not results['documents']:
+        raise HTTPException(status_code=404, detail=f"Manual ID '{manual_id}'에 해당하는 청크를 찾을 수 없습니다.")
+    
+    chunks = [
+        Document(page_content=doc, metadata=meta)
+        for doc, meta in zip(results['documents'], results['metadatas'])
+    ]
+    total = len(group_chunks_by_experiment(manual_id, chunks))
+    
+    def event_stream():
+        yield json.dumps({"type": "start", "manual_id": manual_id, "total_experiments": total}, ensure_ascii=False) + "\n"
+        completed = 0
+        for summary in iter_experiment_summaries(manual_id, chunks, regenerate=regenerate):
+            completed += 1
+            yield json.dumps({"type": "summary", "completed": completed, **summary}, ensure_ascii=False) + "\n"
+        yield json.dumps({"type": "done", "manual_id": manual_id, "total_experiments": completed}, ensure_ascii=False) + "\n"
+    
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
+
+
 @router.get("/experiment/{experiment_id}/structured", response_model=StructuredSummaryResponse)
 async def get_structured_experiment_summary(
     experiment_id: str,
+    regenerate: bool = Query(False, description="저장된 요약을 무시하고 다시 생성"),
     current_user=Depends(get_current_user)
 ):
     """
     특정 experiment_id의 요약을 6개 항목으로 구조화하여 반환합니다.
+    구조화 결과는 요약과 함께 저장되어 있으므로 LLM을 다시 호출하지 않습니다.
     """
     try:
-        # 먼저 일반 요약 생성
-        embeddings = OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY)
-        vectorstore = Chroma(persist_directory=CHROMA_DIR, embedding_function=embeddings)
-        
-        collection = vectorstore._collection
-        results = collection.get(
+        collection = get_collection()
+        results = await run_blocking(
+            collection.get,
             where={"experiment_id": experiment_id}
         )
         
@@ -135,11 +169,11 @@ async def get_structured_experiment_summary(
         for doc, meta in zip(results['documents'], results['metadatas']):
             chunks.append(Document(page_content=doc, metadata=meta))
         
-        # 요약 생성
-        summary_result = summarize_experiment_chunks(chunks)
+        # 저장된 요약 조회 또는 생성
+        summary_result = await aget_experiment_summary(chunks, regenerate=regenerate)
         
-        # 구조화된 요약으로 파싱
-        structured_summary = parse_summary_to_structured_dict(summary_result["summary"])
+        # 구조화된 요약 (이전에 저장된 결과에 없으면 파싱)
+        structured_summary = summary_result.get("structured_summary") or parse_summary_to_structured_dict(summary_result["summary"])
         
         return StructuredSummaryResponse(
             experiment_id=experiment_id,
@@ -161,11 +195,9 @@ async def get_experiment_count(
     특정 매뉴얼의 실험 개수를 반환합니다. (프론트엔드 진행률 표시용)
     """
     try:
-        embeddings = OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY)
-        vectorstore = Chroma(persist_directory=CHROMA_DIR, embedding_function=embeddings)
-        
-        collection = vectorstore._collection
-        results = collection.get(
+        collection = get_collection()
+        results = await run_blocking(
+            collection.get,
             where={"manual_id": manual_id}
         )
         
@@ -199,17 +231,14 @@ async def list_available_experiments(
     사용 가능한 experiment_id 목록을 반환합니다.
     """
     try:
-        embeddings = OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY)
-        vectorstore = Chroma(persist_directory=CHROMA_DIR, embedding_function=embeddings)
-        
-        collection = vectorstore._collection
+        collection = get_collection()
         
         # 필터 조건 설정
         where_filter = {}
         if manual_id:
             where_filter["manual_id"] = manual_id
         
-        results = collection.get(where=where_filter if where_filter else None)
+        results = await run_blocking(collection.get, where=where_filter if where_filter else None)
         
         # 고유한 experiment_id 추출
         experiment_ids = set()
@@ -234,11 +263,9 @@ async def export_manual_summaries_to_json(
     """
     try:
         # 매뉴얼 요약 생성
-        embeddings = OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY)
-        vectorstore = Chroma(persist_directory=CHROMA_DIR, embedding_function=embeddings)
-        
-        collection = vectorstore._collection
-        results = collection.get(
+        collection = get_collection()
+        results = await run_blocking(
+            collection.get,
             where={"manual_id": manual_id}
         )
         
@@ -251,7 +278,7 @@ async def export_manual_summaries_to_json(
             chunks.append(Document(page_content=doc, metadata=meta))
         
         # 요약 생성
-        summaries = summarize_experiments_by_manual_id(manual_id, chunks)
+        summaries = await asummarize_experiments_by_manual_id(manual_id, chunks)
         
         # 파일명 설정
         if not output_filename:
@@ -261,7 +288,7 @@ async def export_manual_summaries_to_json(
         output_path = f"./exports/{output_filename}"
         os.makedirs("./exports", exist_ok=True)
         
-        success = save_summaries_to_json(summaries, output_path)
+        success = await run_blocking(save_summaries_to_json, summaries, output_path)
         
         if success:
             return ExportSummaryResponse(
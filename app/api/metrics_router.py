@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Depends
+from app.core import metrics
+from app.dependencies import get_current_user
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+@router.get("/")
+def get_metrics(current_user=Depends(get_current_user)):
+    """
+    프로세스 내부 메트릭(카운터, 게이지, 소요시간)을 조회합니다. (로그인 필요)
+    """
+    return metrics.snapshot()
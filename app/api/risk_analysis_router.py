@@ -1,28 +1,28 @@
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import JSONResponse
-from app.services.risk_analysis_service import analyze_risk_advices
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import OpenAIEmbeddings
+from app.services.risk_analysis_service import analyze_risk_advices, RISK_ANALYSIS_PROMPT_VERSION
+from app.services.analysis_store import get_or_compute_analysis, RISK_ADVICES
+from app.core.executor import run_blocking
+from app.db.vector_store import get_vectorstore, build_where, CHROMA_DIR
 from pathlib import Path
 import json
 
 router = APIRouter()
-CHROMA_DB_PATH = "./chroma_db"
 
 def get_chroma_db():
-    db_path = Path(CHROMA_DB_PATH)
+    db_path = Path(CHROMA_DIR)
     if not db_path.exists() or not list(db_path.glob("*")):
         raise HTTPException(status_code=404, detail="업로드된 문서가 없습니다. PDF를 먼저 업로드해 주세요.")
-    embeddings = OpenAIEmbeddings()
-    vectorstore = Chroma(persist_directory=str(db_path.absolute()), embedding_function=embeddings)
+    vectorstore = get_vectorstore()
     if not vectorstore._collection:
         raise HTTPException(status_code=404, detail="Chroma DB collection not found")
     return vectorstore
 
-def get_documents_from_chroma(vectorstore):
+def get_documents_from_chroma(vectorstore, manual_id: str = None):
     from langchain_core.documents import Document
     collection = vectorstore._collection
-    results = collection.get()
+    # manual_id 필터는 벡터DB 조회 단계에서 적용 (임베딩은 가져오지 않음)
+    results = collection.get(where=build_where(manual_id=manual_id), include=["documents", "metadatas"])
     print("get_documents_from_chroma - 문서 개수:", len(results.get('documents', [])))
     docs = []
     for doc, metadata in zip(results['documents'], results['metadatas']):
@@ -32,16 +32,29 @@ def get_documents_from_chroma(vectorstore):
     return docs
 
 @router.post("/risk-analysis")
-async def risk_analysis(manual_id: str):
+async def risk_analysis(manual_id: str, refresh: bool = False):
     """
     manual_id로 필터된 문서만 위험도 분석합니다.
+    청크가 바뀌지 않았다면 저장된 결과를 반환합니다. (refresh=true이면 다시 분석)
     """
     try:
-        vectorstore = get_chroma_db()
-        docs = get_documents_from_chroma(vectorstore)
-        if not docs:
-            return JSONResponse(content={"error": "분석 가능한 데이터가 없습니다. PDF를 먼저 업로드해 주세요."}, status_code=200)
-        result = analyze_risk_advices(docs, manual_id)
+        vectorstore = await run_blocking(get_chroma_db)
+
+        def compute():
+            docs = get_documents_from_chroma(vectorstore, manual_id)
+            if not docs:
+                return {"error": "분석 가능한 데이터가 없습니다. PDF를 먼저 업로드해 주세요."}
+            return analyze_risk_advices(docs, manual_id)
+
+        result = await run_blocking(
+            get_or_compute_analysis,
+            RISK_ADVICES,
+            manual_id,
+            compute,
+            prompt_version=RISK_ANALYSIS_PROMPT_VERSION,
+            is_success=lambda r: not r.get("error") and not r.get("failed_groups"),
+            refresh=refresh
+        )
         if result.get("error"):
             return JSONResponse(content=result, status_code=200)
         return JSONResponse(content=result)
@@ -2,7 +2,8 @@ from fastapi import APIRouter, UploadFile, File, Form, HTTPException
 from fastapi.responses import JSONResponse
 from app.services.stt_service import transcribe_whisper_with_validation
 from app.services.tts_service import tts_google_to_file
-from app.services.agent_chat_service import agent_chat_answer
+from app.services.agent_chat_service import aagent_chat_answer
+from app.core.executor import run_blocking
 from app.db.database import get_db
 from app.db.redis_conn import get_redis_conn
 from sqlalchemy.orm import Session
@@ -29,7 +30,7 @@ async def voice_chat(
             raise HTTPException(status_code=400, detail="음성 파일이 비어있습니다.")
 
         # 1. STT 변환
-        stt_result = transcribe_whisper_with_validation(audio_bytes)
+        stt_result = await run_blocking(transcribe_whisper_with_validation, audio_bytes)
         if not stt_result["success"]:
             return JSONResponse(status_code=400, content={"success": False, "error": stt_result["error"]})
 
@@ -38,7 +39,7 @@ async def voice_chat(
             return JSONResponse(status_code=400, content={"success": False, "error": "음성에서 텍스트를 추출할 수 없습니다."})
 
         # 2. GPT 응답 및 DB 저장은 agent_chat_answer 안에서 수행됨
-        ai_response = agent_chat_answer(
+        ai_response = await aagent_chat_answer(
             manual_id=manual_id,
             sender="user",
             message=input_text,
@@ -64,7 +65,7 @@ async def voice_chat(
         audio_filepath = f"static/audio/{audio_filename}"
         os.makedirs("static/audio", exist_ok=True)
 
-        tts_result = tts_google_to_file(text=response_text, output_path=audio_filepath)
+        tts_result = await run_blocking(tts_google_to_file, text=response_text, output_path=audio_filepath)
         if not tts_result["success"]:
             return JSONResponse(status_code=500, content={"success": False, "error": tts_result["error"]})
 
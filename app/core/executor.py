@@ -0,0 +1,57 @@
+import os
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from app.core import metrics
+
+# 이벤트 루프를 막는 동기 호출(LLM, 벡터DB, DB)을 실행할 전용 스레드 풀 크기
+BLOCKING_POOL_SIZE = int(os.getenv("BLOCKING_POOL_SIZE", 16))
+
+_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+_in_flight = 0
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """공유 스레드 풀을 반환합니다. (최초 호출 시 생성)"""
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=BLOCKING_POOL_SIZE, thread_name_prefix="blocking")
+    return _executor
+
+
+def _track(delta: int) -> None:
+    global _in_flight
+    with _lock:
+        _in_flight += delta
+        metrics.set_gauge("executor.in_flight", _in_flight)
+
+
+async def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    동기 함수를 공유 스레드 풀에서 실행하고 결과를 기다립니다.
+    호출 시점의 contextvars(트레이싱 등)를 그대로 넘겨 실행합니다.
+    """
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, func, *args, **kwargs)
+    loop = asyncio.get_running_loop()
+    _track(1)
+    try:
+        return await loop.run_in_executor(get_executor(), call)
+    finally:
+        _track(-1)
+
+
+def shutdown_executor() -> None:
+    """앱 종료 시 호출하여 스레드 풀을 정리합니다."""
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
@@ -0,0 +1,60 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any
+
+# 프로세스 단위 간단한 메트릭 저장소 (카운터 / 게이지 / 소요시간)
+_lock = threading.Lock()
+_counters: Dict[str, float] = {}
+_gauges: Dict[str, float] = {}
+_timings: Dict[str, Dict[str, float]] = {}
+
+
+def incr(name: str, value: float = 1) -> None:
+    """카운터 값을 증가시킵니다."""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def set_gauge(name: str, value: float) -> None:
+    """게이지 값을 설정합니다."""
+    with _lock:
+        _gauges[name] = value
+
+
+def observe(name: str, seconds: float) -> None:
+    """소요 시간(초)을 기록합니다. 횟수/합계/최대값만 유지합니다."""
+    with _lock:
+        stat = _timings.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0})
+        stat["count"] += 1
+        stat["total"] += seconds
+        stat["max"] = max(stat["max"], seconds)
+
+
+@contextmanager
+def timer(name: str):
+    """with 블록의 실행 시간을 기록합니다."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start)
+
+
+def snapshot() -> Dict[str, Any]:
+    """현재 메트릭 값을 딕셔너리로 반환합니다."""
+    with _lock:
+        timings = {
+            name: {
+                "count": stat["count"],
+                "total": round(stat["total"], 4),
+                "avg": round(stat["total"] / stat["count"], 4) if stat["count"] else 0.0,
+                "max": round(stat["max"], 4)
+            }
+            for name, stat in _timings.items()
+        }
+        return {
+            "counters": dict(_counters),
+            "gauges": dict(_gauges),
+            "timings": timings
+        }
@@ -7,12 +7,21 @@ def create_chat_log_batch(db: Session, logs: List[Dict]):
     """
     Saves a batch of chat logs to the database.
     'logs' is a list of dictionaries, each containing chat log data.
+    created_at (ISO string or datetime) is the time the message was sent; rows without it are stamped now.
     """
-    log_objects = [ChatLog(**log_data, created_at=datetime.utcnow()) for log_data in logs]
+    log_objects = [
+        ChatLog(**{**log_data, "created_at": _parse_created_at(log_data.get("created_at"))})
+        for log_data in logs
+    ]
     db.add_all(log_objects)
     db.commit()
     return log_objects
 
+def _parse_created_at(value) -> datetime:
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value or datetime.utcnow()
+
 def create_chat_log(db: Session, log: Dict):
     db_log = ChatLog(**log)
     db.add(db_log)
@@ -20,10 +29,10 @@ def create_chat_log(db: Session, log: Dict):
     return db_log
 
 def load_chat_logs(db: Session, experiment_id: int):
-    # 채팅 불러오기: 전체 내역
-    return db.query(ChatLog).filter(ChatLog.experiment_id == experiment_id).order_by(ChatLog.created_at).all()
+    # 채팅 불러오기: 전체 내역 (같은 초에 저장된 메시지는 id 순)
+    return db.query(ChatLog).filter(ChatLog.experiment_id == experiment_id).order_by(ChatLog.created_at, ChatLog.id).all()
 
 def continue_chat_logs(db: Session, experiment_id: int, limit: int = 10):
     # 채팅 이어하기: 최신 10개만
     return db.query(ChatLog).filter(ChatLog.experiment_id == experiment_id)\
-        .order_by(ChatLog.created_at.desc()).limit(limit).all()[::-1]
\ No newline at end of file
+        .order_by(ChatLog.created_at.desc(), ChatLog.id.desc()).limit(limit).all()[::-1]
\ No newline at end of file
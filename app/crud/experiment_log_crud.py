@@ -0,0 +1,55 @@
+from sqlalchemy.orm import Session
+from typing import List, Dict, Optional
+from app.models.experiment_log import ExperimentLog
+from datetime import datetime, timedelta
+
+def create_experiment_log(db: Session, user_id: str, content: str, log_type: str = "progress",
+                          experiment_id: Optional[str] = None, created_at: Optional[datetime] = None):
+    db_log = ExperimentLog(
+        user_id=user_id,
+        experiment_id=experiment_id,
+        log_type=log_type,
+        content=content,
+        created_at=created_at or datetime.utcnow()
+    )
+    db.add(db_log)
+    db.commit()
+    return db_log
+
+def get_recent_experiment_logs(db: Session, user_id: str, limit: int = 10):
+    # 사용자의 최근 limit개를 시간순으로 반환 (user_id, id 인덱스 사용)
+    return db.query(ExperimentLog).filter(ExperimentLog.user_id == user_id)\
+        .order_by(ExperimentLog.id.desc()).limit(limit).all()[::-1]
+
+def create_missing_experiment_logs(db: Session, logs: List[Dict]) -> int:
+    """
+    아직 없는 실험 로그만 한 번에 저장합니다. (user_id, created_at(초 단위), content)가 같은 행은 이미 저장된 것으로 봅니다. (JSON 파일 이전용)
+    JSON 파일 이전이 중간에 멈춰 다시 실행되어도 중복 저장되지 않습니다.
+    """
+    if not logs:
+        return 0
+
+    def key(user_id, created_at, content):
+        # MySQL DATETIME은 마이크로초를 버리므로 초 단위로 비교한다
+        return user_id, created_at.replace(microsecond=0), content or ""
+
+    user_ids = {log["user_id"] for log in logs}
+    times = [log["created_at"].replace(microsecond=0) for log in logs]
+    existing = {
+        key(row.user_id, row.created_at, row.content)
+        for row in db.query(ExperimentLog).filter(
+            ExperimentLog.user_id.in_(user_ids),
+            ExperimentLog.created_at >= min(times),
+            ExperimentLog.created_at < max(times) + timedelta(seconds=1)
+        )
+    }
+    log_objects = []
+    for log_data in logs:
+        log_key = key(log_data["user_id"], log_data["created_at"], log_data.get("content"))
+        if log_key in existing:
+            continue
+        existing.add(log_key)
+        log_objects.append(ExperimentLog(**log_data))
+    db.add_all(log_objects)
+    db.commit()
+    return len(log_objects)
@@ -40,6 +40,14 @@ def update_manual(db: Session, manual_id: str, manual_update: ManualUpdate, user
     db.refresh(manual)
     return manual
 
+def update_manual_status(db: Session, manual_id: str, status: str):
+    manual = db.query(Manual).filter(Manual.manual_id == manual_id).first()
+    if not manual:
+        return None
+    manual.status = status
+    db.commit()
+    return manual
+
 def delete_manual(db: Session, manual_id: str, user_id: int):
     try:
         manual = db.query(Manual).filter(
@@ -0,0 +1,59 @@
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.models.risk_analysis import RiskAnalysis
+from datetime import datetime
+
+def get_risk_analysis(
+    db: Session,
+    manual_pk: int,
+    analysis_type: str,
+    experiment_id: Optional[str],
+    chunk_fingerprint: str,
+    prompt_version: str
+):
+    # 청크 지문과 프롬프트 버전까지 일치하는 결과만 유효한 캐시로 본다
+    return db.query(RiskAnalysis).filter(
+        RiskAnalysis.manual_id == manual_pk,
+        RiskAnalysis.analysis_type == analysis_type,
+        RiskAnalysis.experiment_id == experiment_id,
+        RiskAnalysis.chunk_fingerprint == chunk_fingerprint,
+        RiskAnalysis.prompt_version == prompt_version
+    ).order_by(RiskAnalysis.analyzed_at.desc()).first()
+
+def save_risk_analysis(
+    db: Session,
+    manual_pk: int,
+    analysis_type: str,
+    experiment_id: Optional[str],
+    chunk_fingerprint: str,
+    prompt_version: str,
+    json_data: dict,
+    summary: Optional[str] = None
+):
+    # 같은 매뉴얼/분석 종류/실험의 이전 결과는 교체
+    db.query(RiskAnalysis).filter(
+        RiskAnalysis.manual_id == manual_pk,
+        RiskAnalysis.analysis_type == analysis_type,
+        RiskAnalysis.experiment_id == experiment_id
+    ).delete(synchronize_session=False)
+    db_analysis = RiskAnalysis(
+        manual_id=manual_pk,
+        analysis_type=analysis_type,
+        experiment_id=experiment_id,
+        chunk_fingerprint=chunk_fingerprint,
+        prompt_version=prompt_version,
+        summary=summary,
+        json_data=json_data,
+        analyzed_at=datetime.utcnow()
+    )
+    db.add(db_analysis)
+    db.commit()
+    return db_analysis
+
+def delete_risk_analyses_by_manual(db: Session, manual_pk: int, analysis_type: Optional[str] = None):
+    query = db.query(RiskAnalysis).filter(RiskAnalysis.manual_id == manual_pk)
+    if analysis_type:
+        query = query.filter(RiskAnalysis.analysis_type == analysis_type)
+    deleted = query.delete(synchronize_session=False)
+    db.commit()
+    return deleted
@@ -1,3 +1,5 @@
+from sqlalchemy import inspect, text
+
 from app.db.database import engine, Base
 from app.models.companies import Company
 from app.models.user import User
@@ -7,6 +9,42 @@ from app.models.reports import Report
 from app.models.chat_logs import ChatLog
 # from app.models.refresh_token import RefreshToken 
 from app.models.experiment import Experiment
+from app.models.experiment_log import ExperimentLog
+
+
+def add_missing_columns():
+    """
+    create_all은 이미 있는 테이블을 바꾸지 않으므로, 모델에 새로 추가된 컬럼과 인덱스를 기존 테이블에 추가합니다.
+    (예: risk_analysis의 experiment_id, analysis_type, chunk_fingerprint, prompt_version, ix_risk_analysis_lookup)
+    """
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns:
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            try:
+                # 기존 행이 있으므로 NULL 허용으로 추가한다
+                with engine.begin() as conn:
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type} NULL"))
+                print(f"컬럼 추가: {table.name}.{column.name}")
+            except Exception as e:
+                # 다른 워커가 먼저 추가한 경우 등
+                print(f"컬럼 추가 실패 ({table.name}.{column.name}): {e}")
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing_indexes:
+                continue
+            try:
+                index.create(bind=engine)
+                print(f"인덱스 추가: {table.name}.{index.name}")
+            except Exception as e:
+                print(f"인덱스 추가 실패 ({table.name}.{index.name}): {e}")
+
 
 Base.metadata.create_all(bind=engine)
+add_missing_columns()
 print("모든 테이블이 정상적으로 생성되었습니다!")
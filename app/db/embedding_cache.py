@@ -0,0 +1,148 @@
+import os
+import json
+import hashlib
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import List, Optional
+from langchain_core.embeddings import Embeddings
+
+from app.core import metrics
+from app.core.executor import run_blocking
+from app.db.redis_conn import get_redis_conn
+
+# 캐시 설정 (환경 변수로 조정 가능)
+QUERY_EMBED_LRU_SIZE = int(os.getenv("QUERY_EMBED_LRU_SIZE", 2048))
+QUERY_EMBED_REDIS_TTL = int(os.getenv("QUERY_EMBED_REDIS_TTL", 60 * 60 * 24 * 7))  # 7일
+QUERY_EMBED_REDIS_PREFIX = "query_embedding"
+REDIS_RETRY_AFTER = 30  # Redis 오류 후 재시도까지 대기(초)
+
+
+def normalize_query(text: str) -> str:
+    """
+    캐시 키 생성을 위해 질의 문자열을 정규화합니다. (유니코드 NFC, 공백 정리)
+    """
+    text = unicodedata.normalize("NFC", text or "")
+    return " ".join(text.split())
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """
+    질의(query) 임베딩에 대해 프로세스 내 LRU + Redis 2단계 캐시를 적용하는 래퍼입니다.
+    문서 임베딩(embed_documents)은 캐시 없이 그대로 위임합니다.
+    """
+
+    def __init__(self, embeddings: Embeddings, model: str, lru_size: int = QUERY_EMBED_LRU_SIZE,
+                 ttl: int = QUERY_EMBED_REDIS_TTL):
+        self.embeddings = embeddings
+        self.model = model
+        self.lru_size = lru_size
+        self.ttl = ttl
+        self._lru: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = None
+        self._redis_disabled_until = 0.0
+
+    def _cache_key(self, text: str) -> str:
+        digest = hashlib.sha256(normalize_query(text).encode("utf-8")).hexdigest()
+        return f"{QUERY_EMBED_REDIS_PREFIX}:{self.model}:{digest}"
+
+    def _get_redis(self):
+        if self._redis is None:
+            self._redis = get_redis_conn()
+        return self._redis
+
+    def _lru_get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            vector = self._lru.get(key)
+            if vector is not None:
+                self._lru.move_to_end(key)
+            return vector
+
+    def _lru_put(self, key: str, vector: List[float]):
+        with self._lock:
+            self._lru[key] = vector
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+
+    def _redis_available(self) -> bool:
+        return time.monotonic() >= self._redis_disabled_until
+
+    def _redis_failed(self, e: Exception):
+        # Redis 장애 시 매 요청마다 타임아웃을 기다리지 않도록 잠시 Redis 단계를 건너뛴다
+        self._redis_disabled_until = time.monotonic() + REDIS_RETRY_AFTER
+        metrics.incr("query_embedding_cache.redis_error")
+        print(f"임베딩 캐시 Redis 오류: {e}")
+
+    def _redis_get(self, key: str) -> Optional[List[float]]:
+        if not self._redis_available():
+            return None
+        try:
+            cached = self._get_redis().get(key)
+        except Exception as e:
+            self._redis_failed(e)
+            return None
+        return json.loads(cached) if cached else None
+
+    def _redis_put(self, key: str, vector: List[float]):
+        if not self._redis_available():
+            return
+        try:
+            self._get_redis().set(key, json.dumps(vector), ex=self.ttl)
+        except Exception as e:
+            self._redis_failed(e)
+
+    def _lookup(self, key: str) -> Optional[List[float]]:
+        vector = self._lru_get(key)
+        if vector is not None:
+            metrics.incr("query_embedding_cache.lru_hit")
+            return vector
+        return self._lookup_redis(key)
+
+    def _lookup_redis(self, key: str) -> Optional[List[float]]:
+        vector = self._redis_get(key)
+        if vector is not None:
+            metrics.incr("query_embedding_cache.redis_hit")
+            self._lru_put(key, vector)
+            return vector
+        metrics.incr("query_embedding_cache.miss")
+        return None
+
+    def _store(self, key: str, vector: List[float]):
+        self._lru_put(key, vector)
+        self._redis_put(key, vector)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._cache_key(text)
+        vector = self._lookup(key)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self._store(key, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        # LRU 단계는 이벤트 루프에서 바로 확인하고, 동기 Redis 호출은 공유 스레드 풀에서 실행한다
+        key = self._cache_key(text)
+        vector = self._lru_get(key)
+        if vector is not None:
+            metrics.incr("query_embedding_cache.lru_hit")
+            return vector
+        vector = await run_blocking(self._lookup_redis, key)
+        if vector is None:
+            vector = await self.embeddings.aembed_query(text)
+            self._lru_put(key, vector)
+            await run_blocking(self._redis_put, key, vector)
+        return vector
+
+    def clear_local(self):
+        """프로세스 내 LRU 캐시만 비웁니다."""
+        with self._lock:
+            self._lru.clear()
@@ -0,0 +1,104 @@
+import os
+import threading
+from typing import Optional
+from dotenv import load_dotenv
+from langchain_chroma import Chroma
+from langchain_openai import OpenAIEmbeddings
+
+from app.core import metrics
+from app.db.embedding_cache import CachedQueryEmbeddings
+
+# .env 로드
+load_dotenv()
+
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+CHROMA_DIR = os.getenv("CHROMA_DIR", "./chroma_db")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-ada-002")
+
+# 프로세스 전역에서 공유하는 임베딩 클라이언트 / 벡터스토어 핸들
+_lock = threading.Lock()
+_embeddings: Optional[CachedQueryEmbeddings] = None
+_vectorstore: Optional[Chroma] = None
+
+
+def _update_handle_gauge():
+    metrics.set_gauge("vectorstore.open_handles", 1 if _vectorstore is not None else 0)
+
+
+def get_embeddings() -> CachedQueryEmbeddings:
+    """
+    공유 임베딩 클라이언트를 반환합니다. (최초 호출 시 생성)
+    질의 임베딩은 LRU + Redis 캐시를 거칩니다.
+    """
+    global _embeddings
+    if _embeddings is None:
+        with _lock:
+            if _embeddings is None:
+                _embeddings = CachedQueryEmbeddings(
+                    OpenAIEmbeddings(model=EMBEDDING_MODEL, openai_api_key=OPENAI_API_KEY),
+                    model=EMBEDDING_MODEL
+                )
+    return _embeddings
+
+
+def get_vectorstore() -> Chroma:
+    """
+    공유 Chroma 벡터스토어를 반환합니다. (최초 호출 시 persistent client를 한 번만 연다)
+    """
+    global _vectorstore
+    if _vectorstore is None:
+        embeddings = get_embeddings()
+        with _lock:
+            if _vectorstore is None:
+                _vectorstore = Chroma(
+                    persist_directory=CHROMA_DIR,
+                    embedding_function=embeddings
+                )
+                metrics.incr("vectorstore.opened")
+                _update_handle_gauge()
+    return _vectorstore
+
+
+def get_collection():
+    """
+    공유 벡터스토어의 Chroma collection 객체를 반환합니다.
+    """
+    return get_vectorstore()._collection
+
+
+def build_where(**filters) -> Optional[dict]:
+    """
+    값이 있는 메타데이터 필터만 모아 Chroma where 절을 만듭니다. (조건이 여러 개면 $and)
+    """
+    conditions = [{key: value} for key, value in filters.items() if value is not None]
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
+
+
+def init_vector_store():
+    """
+    앱 시작 시 호출하여 벡터스토어를 미리 열어 둡니다.
+    """
+    get_vectorstore()
+    print(f"✅ 벡터스토어 초기화 완료: {CHROMA_DIR}")
+
+
+def close_vector_store():
+    """
+    앱 종료 시 호출하여 공유 핸들을 정리합니다.
+    """
+    global _vectorstore, _embeddings
+    with _lock:
+        if _vectorstore is not None:
+            try:
+                from chromadb.api.client import SharedSystemClient
+                SharedSystemClient.clear_system_cache()
+            except Exception as e:
+                print(f"벡터스토어 종료 중 오류: {e}")
+            metrics.incr("vectorstore.closed")
+        _vectorstore = None
+        _embeddings = None
+        _update_handle_gauge()
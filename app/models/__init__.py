@@ -4,3 +4,5 @@ from .manuals import Manual
 from .chat_logs import ChatLog
 from .reports import Report
 from .risk_analysis import RiskAnalysis
+from .experiment import Experiment
+from .experiment_log import ExperimentLog
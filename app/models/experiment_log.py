@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
+from app.db.database import Base
+from datetime import datetime
+
+class ExperimentLog(Base):
+    __tablename__ = "experiment_logs"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # 채팅에서 넘어오는 사용자 식별자 (users.id가 아닌 문자열일 수 있음)
+    user_id = Column(String(64), nullable=False)
+    experiment_id = Column(String(64), nullable=True)
+    log_type = Column(String(20), default="progress")  # progress, result, observation, issue
+    content = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # 사용자별/실험별 최근 N개 조회용 인덱스
+    __table_args__ = (
+        Index("ix_experiment_logs_user", "user_id", "id"),
+        Index("ix_experiment_logs_experiment", "experiment_id", "id"),
+    )
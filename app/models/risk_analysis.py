@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, DateTime, Text, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 from datetime import datetime
@@ -7,8 +7,17 @@ class RiskAnalysis(Base):
     __tablename__ = "risk_analysis"
     id = Column(Integer, primary_key=True, index=True)
     manual_id = Column(Integer, ForeignKey("manuals.id"))
+    # 분석 결과 캐시 키: 분석 종류 + 실험 ID + 청크 지문 + 프롬프트 버전
+    experiment_id = Column(String(128), nullable=True)
+    analysis_type = Column(String(50))
+    chunk_fingerprint = Column(String(64))
+    prompt_version = Column(String(20))
     analyzed_at = Column(DateTime, default=datetime.utcnow)
     summary = Column(Text)
     json_data = Column(JSON)
 
     manual = relationship("Manual", back_populates="risk_analysis")
+
+    __table_args__ = (
+        Index("ix_risk_analysis_lookup", "manual_id", "analysis_type", "experiment_id"),
+    )
@@ -27,6 +27,7 @@ class ExperimentAnalysis(BaseModel):
     procedure_summary: str = Field(default="", description="실험 절차의 간략한 요약")
     risks: RiskCategories = Field(..., description="위험 분류")
     overall_risk_level: str = Field(default="분석불가", description="전체 위험도 (낮음/중간/높음/분석불가)")
+    analysis_failed: bool = Field(default=False, description="LLM 오류로 기본값이 채워진 결과인지 여부")
 
 class LegacyExperimentAnalysis(BaseModel):
     """실험 분석 결과 스키마 (레거시 호환성)"""
@@ -47,6 +48,7 @@ class ExperimentAnalysisResponse(BaseModel):
     experiment_ids: List[str] = Field(default=[], description="실험 ID 목록")
     agent_response: str = Field(default="", description="React Agent의 상세 분석 과정")
     experiments: List[ExperimentAnalysis] = Field(default=[], description="실험별 위험 분석 결과")
+    failed_experiments: List[str] = Field(default=[], description="분석에 실패한 실험 ID 목록")
     error: Optional[str] = Field(None, description="오류 메시지 (있는 경우)")
 
 class SingleExperimentResponse(BaseModel):
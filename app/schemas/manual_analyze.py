@@ -4,6 +4,7 @@ from typing import Dict, List, Optional
 class RiskAnalysisRequest(BaseModel):
     """위험 분석 요청 스키마"""
     manual_id: str = Field(..., description="분석할 매뉴얼 ID", min_length=1)
+    refresh: bool = Field(default=False, description="저장된 분석 결과를 무시하고 다시 분석할지 여부")
 
 class RiskCategories(BaseModel):
     """위험 분류 결과 스키마"""
@@ -1,17 +1,26 @@
 import os
 from typing import List, Dict, Optional
 from dotenv import load_dotenv, find_dotenv
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import OpenAIEmbeddings
 from langchain_openai import ChatOpenAI
 from langchain.agents import initialize_agent, Tool, AgentType
 from langchain_core.documents import Document
 from pydantic import BaseModel, Field
 import time
 import json
+import fcntl
+import re
+import threading
+from collections import OrderedDict
 from datetime import datetime
 from app.schemas.query import ManualSearchInput
 from app.services.chat_log_service import chat_log_service
+from app.db.database import SessionLocal
+from app.crud import experiment_log_crud
+from app.db.vector_store import get_vectorstore
+from app.core.executor import run_blocking
+from app.core import metrics
+from app.services.message_classifier import classify_message
+from app.services.answer_cache import answer_cache
 import uuid
 from sqlalchemy.orm import Session
 from langchain.agents import create_openai_functions_agent, AgentExecutor
@@ -26,45 +35,107 @@ else:
     load_dotenv()
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-CHROMA_DIR = "./chroma_db"
 EXPERIMENT_LOG_FILE = "./experiment_logs.json"
+# manual_id별로 캐시할 에이전트 실행기 최대 개수
+AGENT_EXECUTOR_CACHE_SIZE = int(os.getenv("AGENT_EXECUTOR_CACHE_SIZE", 32))
+# 단순 질문(direct 경로)에서 검색할 청크 수
+DIRECT_ROUTE_TOP_K = int(os.getenv("DIRECT_ROUTE_TOP_K", 4))
 
-# 실험 로그 관리 클래스
+# 질문 처리 경로
+ROUTE_DIRECT = "direct"
+ROUTE_AGENT = "agent"
+
+# 에이전트가 공유하는 LLM
+agent_llm = ChatOpenAI(model_name="gpt-4.1-mini", openai_api_key=OPENAI_API_KEY)
+
+# manual_id -> AgentExecutor (LRU)
+_agent_executors: "OrderedDict[str, AgentExecutor]" = OrderedDict()
+_agent_executor_lock = threading.Lock()
+
+# 실험 로그 관리 클래스 (experiment_logs 테이블에 저장)
 class ExperimentLogger:
     def __init__(self, log_file: str = EXPERIMENT_LOG_FILE):
+        # 이전 버전의 JSON 로그 파일 (migrate_json_file로 한 번만 테이블에 옮긴다)
         self.log_file = log_file
-        self.experiments = self.load_experiments()
     
-    def load_experiments(self) -> List[Dict]:
-        try:
-            if os.path.exists(self.log_file):
-                with open(self.log_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-        except Exception as e:
-            print(f"로그 파일 로드 실패: {e}")
-        return []
+    @staticmethod
+    def _to_dict(log) -> Dict:
+        return {
+            "timestamp": log.created_at.isoformat(),
+            "user_id": log.user_id,
+            "experiment_id": log.experiment_id,
+            "type": log.log_type,
+            "content": log.content
+        }
     
-    def save_experiments(self):
+    def migrate_json_file(self) -> int:
+        """
+        이전 JSON 로그 파일을 테이블로 옮기고, 저장이 커밋된 뒤에 파일명을 .migrated로 바꿉니다.
+        여러 워커가 동시에 시작해도 파일 잠금을 얻은 한 곳에서만 옮기며, 중간에 죽은 이전 실행의
+        .migrating 파일도 이어서 옮깁니다. 이미 저장된 로그는 다시 저장하지 않습니다.
+        """
+        sources = [path for path in (f"{self.log_file}.migrating", self.log_file) if os.path.exists(path)]
+        if not sources:
+            return 0
+        with open(f"{self.log_file}.lock", "a") as lock:
+            try:
+                # 프로세스가 죽으면 잠금도 풀린다
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return 0
+            migrated = 0
+            for source in sources:
+                if not os.path.exists(source):
+                    # 다른 워커가 이미 옮긴 경우
+                    continue
+                try:
+                    migrated += self._migrate_entries(source)
+                except Exception as e:
+                    # 파일을 그대로 두어 다음 시작 때 다시 시도한다
+                    print(f"실험 로그 이전 실패 ({source}): {e}")
+                    continue
+                os.replace(source, f"{source}.migrated")
+        if migrated:
+            print(f"실험 로그 {migrated}개를 DB로 이전했습니다.")
+        return migrated
+
+    def _migrate_entries(self, path: str) -> int:
+        with open(path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+        logs = [
+            {
+                "user_id": str(entry.get("user_id", "default_user")),
+                "log_type": entry.get("type", "progress"),
+                "content": entry.get("content", ""),
+                "created_at": datetime.fromisoformat(entry["timestamp"]) if entry.get("timestamp") else datetime.now()
+            }
+            for entry in entries
+        ]
+        db = SessionLocal()
         try:
-            with open(self.log_file, 'w', encoding='utf-8') as f:
-                json.dump(self.experiments, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"로그 파일 저장 실패: {e}")
+            return experiment_log_crud.create_missing_experiment_logs(db, logs)
+        finally:
+            db.close()
     
-    def add_experiment_log(self, user_id: str, content: str, experiment_type: str = "progress"):
-        log_entry = {
-            "timestamp": datetime.now().isoformat(),
-            "user_id": user_id,
-            "type": experiment_type,  # progress, result, observation, issue
-            "content": content
-        }
-        self.experiments.append(log_entry)
-        self.save_experiments()
-        return log_entry
+    def add_experiment_log(self, user_id: str, content: str, experiment_type: str = "progress", experiment_id: Optional[str] = None):
+        db = SessionLocal()
+        try:
+            log = experiment_log_crud.create_experiment_log(
+                db, str(user_id), content, log_type=experiment_type,  # progress, result, observation, issue
+                experiment_id=str(experiment_id) if experiment_id else None,
+                created_at=datetime.now()
+            )
+            return self._to_dict(log)
+        finally:
+            db.close()
     
     def get_user_experiments(self, user_id: str, limit: int = 10) -> List[Dict]:
-        user_logs = [exp for exp in self.experiments if exp.get("user_id") == user_id]
-        return user_logs[-limit:]
+        db = SessionLocal()
+        try:
+            logs = experiment_log_crud.get_recent_experiment_logs(db, str(user_id), limit)
+            return [self._to_dict(log) for log in logs]
+        finally:
+            db.close()
     
     def generate_report(self, user_id: str) -> str:
         user_logs = self.get_user_experiments(user_id, limit=50)
@@ -108,26 +179,6 @@ class ExperimentLogger:
 # 실험 로거 인스턴스
 experiment_logger = ExperimentLogger()
 
-# LLM 기반 메시지 타입 분류 함수
-def llm_classify_message_type(message: str) -> str:
-    """
-    LLM(GPT-4o 등)을 사용해 메시지가 '질문'인지 '실험기록'인지 분류한다.
-    반드시 '질문' 또는 '실험기록' 둘 중 하나로만 답변하도록 프롬프트를 구성한다.
-    """
-    llm = ChatOpenAI(model_name="gpt-4o-mini", openai_api_key=OPENAI_API_KEY, temperature=0)
-    prompt = f"""
-아래 메시지가 '질문'인지 '실험기록'인지 한 단어로 답해. 
-질문: 실험 방법, 매뉴얼 등 궁금증. 
-실험기록: 진행/관찰/결과/이슈 등. 
-반드시 '질문' 또는 '실험기록' 둘 중 하나로만 답해. 
-메시지: {message}
-"""
-    result = llm.predict(prompt).strip().lower()
-    # 혹시라도 LLM이 엉뚱하게 답할 경우 방어
-    if "experiment" in result:
-        return "experiment_log"
-    return "message"
-
 # 실험 로그 타입 분류
 def classify_experiment_type(message: str) -> str:
     """실험 로그의 세부 타입 분류"""
@@ -144,13 +195,13 @@ def classify_experiment_type(message: str) -> str:
 
 # manual_id로 벡터DB에서 검색하는 Tool 정의
 def get_manual_search_tool(manual_id):
-    def search_manual_func(input_text: str) -> str:
+    def search_manual_func(input_text: str, callbacks=None) -> str:
         print(f"[Tool] input_text: {input_text}")
         print(f"[Tool] manual_id: {manual_id}")
         start = time.time()
-        embeddings = OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY)
-        vectorstore = Chroma(persist_directory=CHROMA_DIR, embedding_function=embeddings)
-        docs = vectorstore.similarity_search(input_text, k=4, filter={"manual_id": manual_id})
+        # retriever를 거쳐 검색하면 스트리밍 시 검색 결과(on_retriever_end) 이벤트가 발생한다
+        retriever = get_vectorstore().as_retriever(search_kwargs={"k": 4, "filter": {"manual_id": manual_id}})
+        docs = retriever.invoke(input_text, config={"callbacks": callbacks})
         elapsed = time.time() - start
         print(f"[Tool] 검색 시간: {elapsed:.2f}초")
         print(f"[Tool] 검색된 문서 개수: {len(docs)}")
@@ -163,6 +214,204 @@ def get_manual_search_tool(manual_id):
         description=f"{manual_id} 매뉴얼에서 검색합니다."
     )
 
+# 실험 로그 메시지에 대한 응답 문구
+EXPERIMENT_LOG_RESPONSES = {
+    "progress": ["실험 진행 상황을 기록했습니다! 계속 진행하시고 결과가 나오면 알려주세요."],
+    "result": ["실험 결과를 기록했습니다! 흥미로운 결과네요. 추가 분석이 필요하시면 알려주세요."],
+    "observation": ["관찰 내용을 기록했습니다. 좋은 관찰이네요! 이런 세심한 관찰이 실험의 성공 비결입니다."],
+    "issue": ["문제 상황을 기록했습니다. 해결 방법을 매뉴얼에서 찾아볼까요?"]
+}
+
+def _handle_experiment_log(message: str, user_id: str, experiment_id: int) -> Dict:
+    # 실험 로그로 처리
+    exp_type = classify_experiment_type(message)
+    experiment_logger.add_experiment_log(user_id, message, exp_type, experiment_id=experiment_id)
+    
+    import random
+    response = random.choice(EXPERIMENT_LOG_RESPONSES.get(exp_type, EXPERIMENT_LOG_RESPONSES["progress"]))
+    
+    return {
+        "response": response,
+        "type": "experiment_log",
+        "logged": False, # This is not a Q&A chat log
+        "experiment_id": experiment_id
+    }
+
+def _build_experiment_context(user_id: str) -> str:
+    recent_logs = experiment_logger.get_user_experiments(user_id, limit=5)
+    experiment_context = ""
+    if recent_logs:
+        experiment_context = "\\n최근 실험 진행 상황:\\n"
+        for log in recent_logs:
+            experiment_context += f"- {log['timestamp'][:16]}: {log['content']}\\n"
+    return experiment_context
+
+def build_agent_executor(manual_id: str) -> AgentExecutor:
+    """
+    manual_id 매뉴얼을 검색하는 function-calling 에이전트 실행기를 만듭니다.
+    사용자별 실험 진행 상황은 실행 시 experiment_context 입력으로 넘깁니다.
+    """
+    system_prompt = f"""
+너는 실험실 매뉴얼 QA 도우미야.
+manual_id {manual_id}에 해당하는 매뉴얼만 검색해야 한다.
+매뉴얼 내용을 벗어나지 말고, 모르는 건 모른다고 답해.
+{{experiment_context}}
+사용자의 질문에 대해 매뉴얼을 검색해서 정확한 답변을 제공해줘.
+"""
+    
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", system_prompt),
+        MessagesPlaceholder(variable_name="chat_history", optional=True),
+        ("human", "{input}"),
+        MessagesPlaceholder(variable_name="agent_scratchpad"),
+    ])
+    
+    tool = get_manual_search_tool(manual_id)
+    
+    agent = create_openai_functions_agent(agent_llm, [tool], prompt)
+    return AgentExecutor(agent=agent, tools=[tool], verbose=False)
+
+def get_agent_executor(manual_id: str) -> AgentExecutor:
+    """
+    manual_id별로 캐시된 에이전트 실행기를 반환합니다. (LRU, 최대 AGENT_EXECUTOR_CACHE_SIZE개)
+    """
+    with _agent_executor_lock:
+        executor = _agent_executors.get(manual_id)
+        if executor is not None:
+            _agent_executors.move_to_end(manual_id)
+            metrics.incr("agent_executor.cache.hit")
+            return executor
+    metrics.incr("agent_executor.cache.miss")
+    executor = build_agent_executor(manual_id)
+    with _agent_executor_lock:
+        # 동시에 만들어진 경우 먼저 등록된 실행기를 사용한다
+        executor = _agent_executors.setdefault(manual_id, executor)
+        _agent_executors.move_to_end(manual_id)
+        while len(_agent_executors) > AGENT_EXECUTOR_CACHE_SIZE:
+            _agent_executors.popitem(last=False)
+        metrics.set_gauge("agent_executor.cache.size", len(_agent_executors))
+    return executor
+
+def invalidate_agent_executor(manual_id: Optional[str] = None):
+    """
+    캐시된 에이전트 실행기를 제거합니다. manual_id가 없으면 전체를 비웁니다. (매뉴얼 삭제 시)
+    """
+    with _agent_executor_lock:
+        if manual_id is None:
+            _agent_executors.clear()
+        else:
+            _agent_executors.pop(manual_id, None)
+        metrics.set_gauge("agent_executor.cache.size", len(_agent_executors))
+
+# 이전 대화를 가리키는 표현 (후속 질문 판단). 어절 앞부분과 비교하므로 조사가 붙어도 일치한다 ("그거는", "아까의")
+FOLLOW_UP_KEYWORDS = ["그거", "그걸", "그것", "그건", "이거", "이걸", "이것", "저거", "거기", "아까", "방금", "위에서", "앞에서", "그 다음", "다음 단계", "더 자세히"]
+# 메시지 첫 어절일 때만 후속 질문으로 보는 접속 표현 ("그럼 온도는?")
+FOLLOW_UP_OPENERS = ["그럼", "그러면"]
+# 사용자 자신의 실험 진행 상황을 묻는 표현 (실험 기록이 있으면 에이전트가 기록을 참고해 답한다)
+PROGRESS_KEYWORDS = ["내 실험", "제 실험", "지금", "현재", "진행 상황", "진행상황", "다음 단계"]
+# 여러 번 검색이 필요한 표현 (멀티홉 질문 판단)
+MULTI_HOP_KEYWORDS = ["비교", "차이", "각각", "둘 다", "순서대로", "관계"]
+
+_TOKEN_SPLIT = re.compile(r"[\s.,!?？~/()\[\]\"']+")
+
+def _tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN_SPLIT.split(text) if token]
+
+def _has_keyword(tokens: List[str], keywords: List[str]) -> bool:
+    # 키워드의 마지막 어절은 앞부분 일치, 나머지 어절은 완전 일치 ("또"가 "또는"에 걸리지 않도록 부분 문자열로 찾지 않는다)
+    for keyword in keywords:
+        parts = keyword.split()
+        for i in range(len(tokens) - len(parts) + 1):
+            if tokens[i:i + len(parts) - 1] == parts[:-1] and tokens[i + len(parts) - 1].startswith(parts[-1]):
+                return True
+    return False
+
+def route_question(message: str, history: List[Dict[str, str]] = None, experiment_context: str = "") -> str:
+    """
+    질문 처리 경로를 고릅니다.
+    후속 질문, 멀티홉 질문, 실험 기록을 참고해야 하는 질문은 에이전트("agent"),
+    나머지는 1회 검색 후 답변("direct")으로 처리합니다.
+    """
+    text = message.strip()
+    tokens = _tokenize(text)
+    if history and (len(text) < 10 or _has_keyword(tokens, FOLLOW_UP_KEYWORDS)
+                    or (tokens and tokens[0] in FOLLOW_UP_OPENERS)):
+        return ROUTE_AGENT
+    if experiment_context and _has_keyword(tokens, PROGRESS_KEYWORDS):
+        return ROUTE_AGENT
+    if text.count("?") > 1 or _has_keyword(tokens, MULTI_HOP_KEYWORDS):
+        return ROUTE_AGENT
+    return ROUTE_DIRECT
+
+def _retrieve_manual_docs(manual_id: str, message: str) -> List[Document]:
+    return get_vectorstore().similarity_search(message, k=DIRECT_ROUTE_TOP_K, filter={"manual_id": manual_id})
+
+def _direct_prompt(manual_id: str, docs: List[Document], message: str) -> str:
+    context = "\n".join([doc.page_content for doc in docs])
+    return f"""
+너는 실험실 매뉴얼 QA 도우미야.
+아래는 manual_id {manual_id} 매뉴얼에서 검색한 내용이야.
+매뉴얼 내용을 벗어나지 말고, 모르는 건 모른다고 답해.
+{context}
+
+질문: {message}
+
+답변:
+"""
+
+def direct_answer(manual_id: str, message: str) -> str:
+    """
+    매뉴얼을 한 번 검색하고 LLM을 한 번만 호출해 답변합니다. (단순 질문용)
+    사용자별 실험 기록 없이 매뉴얼만으로 답하므로, 비슷한 질문의 캐시된 답변을 모든 사용자에게 재사용합니다.
+    (실험 기록을 참고해야 하는 질문은 route_question에서 에이전트로 보낸다)
+    """
+    cached = answer_cache.lookup(manual_id, message)
+    if cached:
+        return cached["answer"]
+    docs = _retrieve_manual_docs(manual_id, message)
+    if not docs:
+        return "관련 문서를 찾을 수 없습니다."
+    response = agent_llm.invoke(_direct_prompt(manual_id, docs, message))
+    answer = response.content.strip()
+    if answer:
+        answer_cache.store(manual_id, message, answer)
+    return answer
+
+def _to_chat_history(history: List[Dict[str, str]]) -> List:
+    chat_history_messages = []
+    if history:
+        for turn in history:
+            if turn["role"] == "user":
+                chat_history_messages.append(HumanMessage(content=turn["content"]))
+            elif turn["role"] == "assistant":
+                chat_history_messages.append(AIMessage(content=turn["content"]))
+    return chat_history_messages
+
+def _save_qa_logs(experiment_id, user_id: str, manual_id: str, message: str, answer: str):
+    # === 채팅 로그 저장 ===
+    chat_log_service.add_chat_to_cache(
+        experiment_id=experiment_id,
+        user_id=user_id,
+        manual_id=manual_id,
+        sender='user',
+        message=message
+    )
+    chat_log_service.add_chat_to_cache(
+        experiment_id=experiment_id,
+        user_id=user_id,
+        manual_id=manual_id,
+        sender='ai',
+        message=answer
+    )
+
+def _answer_result(answer: str, experiment_id) -> Dict:
+    return {
+        "response": answer,
+        "type": "message",
+        "logged": True,
+        "experiment_id": experiment_id
+    }
+
 def agent_chat_answer(manual_id: str, sender: str, message: str, user_id: str = "default_user", experiment_id: int = None, history: List[Dict[str, str]] = None) -> Dict[str, str]:
     """
     개선된 에이전트 답변 함수 (LLM 기반 메시지 분류)
@@ -174,97 +423,109 @@ def agent_chat_answer(manual_id: str, sender: str, message: str, user_id: str =
     if not experiment_id:
         experiment_id = int(time.time())
 
-    # === LLM 기반 메시지 타입 분류 ===
-    message_type = llm_classify_message_type(message)
+    # === 메시지 타입 분류 (확실한 경우 로컬 규칙, 애매하면 LLM) ===
+    message_type = classify_message(message)
     
     if message_type == "experiment_log":
-        # 실험 로그로 처리
-        exp_type = classify_experiment_type(message)
-        experiment_logger.add_experiment_log(user_id, message, exp_type)
-        
-        # 실험 로그에 대한 응답 생성
-        responses = {
-            "progress": ["실험 진행 상황을 기록했습니다! 계속 진행하시고 결과가 나오면 알려주세요."],
-            "result": ["실험 결과를 기록했습니다! 흥미로운 결과네요. 추가 분석이 필요하시면 알려주세요."],
-            "observation": ["관찰 내용을 기록했습니다. 좋은 관찰이네요! 이런 세심한 관찰이 실험의 성공 비결입니다."],
-            "issue": ["문제 상황을 기록했습니다. 해결 방법을 매뉴얼에서 찾아볼까요?"]
-        }
-        
-        import random
-        response = random.choice(responses.get(exp_type, responses["progress"]))
-        
-        return {
-            "response": response,
-            "type": "experiment_log",
-            "logged": False, # This is not a Q&A chat log
-            "experiment_id": experiment_id
-        }
+        return _handle_experiment_log(message, user_id, experiment_id)
+
+    # 질문으로 처리 - 단순 질문은 1회 검색 후 답변, 후속/멀티홉 질문은 에이전트
+    experiment_context = _build_experiment_context(user_id)
+    route = route_question(message, history, experiment_context)
+    metrics.incr(f"agent_chat.route.{route}")
+    with metrics.timer(f"agent_chat.{route}.latency"):
+        if route == ROUTE_DIRECT:
+            answer = direct_answer(manual_id, message)
+        else:
+            agent_executor = get_agent_executor(manual_id)
+            response = agent_executor.invoke({
+                "input": message,
+                "experiment_context": experiment_context,
+                "chat_history": _to_chat_history(history)
+            })
+            answer = response.get("output", "죄송합니다, 답변을 생성하지 못했습니다.")
+
+    _save_qa_logs(experiment_id, user_id, manual_id, message, answer)
+    return _answer_result(answer, experiment_id)
+
+async def astream_agent_chat(manual_id: str, sender: str, message: str, user_id: str = "default_user", experiment_id: int = None, history: List[Dict[str, str]] = None):
+    """
+    agent_chat_answer의 스트리밍 버전 (async generator)
+    진행 상황을 프레임(dict)으로 순서대로 내보냅니다.
+      - {"event": "tool_start", "tool": str}       : 매뉴얼 검색 시작
+      - {"event": "retrieved", "count": int}       : 검색된 청크 수
+      - {"event": "token", "content": str}         : 답변 토큰
+      - {"event": "final", **agent_chat_answer 결과} : 최종 결과
+    """
+    if history is None:
+        history = []
+    
+    if not experiment_id:
+        experiment_id = int(time.time())
+    started = time.perf_counter()
+
+    message_type = await run_blocking(classify_message, message)
+    
+    if message_type == "experiment_log":
+        result = await run_blocking(_handle_experiment_log, message, user_id, experiment_id)
+        yield {"event": "final", **result}
+        return
+
+    experiment_context = await run_blocking(_build_experiment_context, user_id)
+    route = route_question(message, history, experiment_context)
+    metrics.incr(f"agent_chat.route.{route}")
+    answer = ""
+    first_token = True
+    cached = await run_blocking(answer_cache.lookup, manual_id, message) if route == ROUTE_DIRECT else None
+    if cached:
+        answer = cached["answer"]
+        yield {"event": "token", "content": answer}
+    elif route == ROUTE_DIRECT:
+        yield {"event": "tool_start", "tool": f"manual_search_{manual_id}"}
+        docs = await run_blocking(_retrieve_manual_docs, manual_id, message)
+        yield {"event": "retrieved", "count": len(docs)}
+        if not docs:
+            answer = "관련 문서를 찾을 수 없습니다."
+        else:
+            async for chunk in agent_llm.astream(_direct_prompt(manual_id, docs, message)):
+                if chunk.content:
+                    if first_token:
+                        metrics.observe("agent_chat.first_token", time.perf_counter() - started)
+                        first_token = False
+                    answer += chunk.content
+                    yield {"event": "token", "content": chunk.content}
+            answer = answer.strip()
+            if answer:
+                await run_blocking(answer_cache.store, manual_id, message, answer)
     else:
-        # 질문으로 처리 - RAG 방식
-        recent_logs = experiment_logger.get_user_experiments(user_id, limit=5)
-        experiment_context = ""
-        if recent_logs:
-            experiment_context = "\\n최근 실험 진행 상황:\\n"
-            for log in recent_logs:
-                experiment_context += f"- {log['timestamp'][:16]}: {log['content']}\\n"
-        
-        system_prompt = f"""
-너는 실험실 매뉴얼 QA 도우미야.
-manual_id {manual_id}에 해당하는 매뉴얼만 검색해야 한다.
-매뉴얼 내용을 벗어나지 말고, 모르는 건 모른다고 답해.
-{experiment_context}
-사용자의 질문에 대해 매뉴얼을 검색해서 정확한 답변을 제공해줘.
-"""
-        
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", system_prompt),
-            MessagesPlaceholder(variable_name="chat_history", optional=True),
-            ("human", "{input}"),
-            MessagesPlaceholder(variable_name="agent_scratchpad"),
-        ])
-        
-        llm = ChatOpenAI(model_name="gpt-4.1-mini", openai_api_key=OPENAI_API_KEY)
-        tool = get_manual_search_tool(manual_id)
-        
-        agent = create_openai_functions_agent(llm, [tool], prompt)
-        agent_executor = AgentExecutor(agent=agent, tools=[tool], verbose=True)
-
-        chat_history_messages = []
-        if history:
-            for turn in history:
-                if turn["role"] == "user":
-                    chat_history_messages.append(HumanMessage(content=turn["content"]))
-                elif turn["role"] == "assistant":
-                    chat_history_messages.append(AIMessage(content=turn["content"]))
-
-        response = agent_executor.invoke({
-            "input": message,
-            "chat_history": chat_history_messages
-        })
-        answer = response.get("output", "죄송합니다, 답변을 생성하지 못했습니다.")
-
-        # === 채팅 로그 저장 ===
-        chat_log_service.add_chat_to_cache(
-            experiment_id=experiment_id,
-            user_id=user_id,
-            manual_id=manual_id,
-            sender='user',
-            message=message
-        )
-        chat_log_service.add_chat_to_cache(
-            experiment_id=experiment_id,
-            user_id=user_id,
-            manual_id=manual_id,
-            sender='ai',
-            message=answer
-        )
-        
-        return {
-            "response": answer,
-            "type": "message",
-            "logged": True,
-            "experiment_id": experiment_id
-        }
+        agent_executor = get_agent_executor(manual_id)
+        async for event in agent_executor.astream_events(
+            {"input": message, "experiment_context": experiment_context, "chat_history": _to_chat_history(history)},
+            version="v2"
+        ):
+            kind = event["event"]
+            if kind == "on_tool_start":
+                yield {"event": "tool_start", "tool": event["name"]}
+            elif kind == "on_retriever_end":
+                docs = event["data"].get("output") or []
+                yield {"event": "retrieved", "count": len(docs)}
+            elif kind == "on_chat_model_stream":
+                content = event["data"]["chunk"].content
+                if content:
+                    if first_token:
+                        metrics.observe("agent_chat.first_token", time.perf_counter() - started)
+                        first_token = False
+                    yield {"event": "token", "content": content}
+            elif kind == "on_chain_end" and event["name"] == "AgentExecutor":
+                output = event["data"].get("output") or {}
+                answer = output.get("output", answer) if isinstance(output, dict) else answer
+    
+    if not answer:
+        answer = "죄송합니다, 답변을 생성하지 못했습니다."
+    metrics.observe(f"agent_chat.{route}.latency", time.perf_counter() - started)
+
+    await run_blocking(_save_qa_logs, experiment_id, user_id, manual_id, message, answer)
+    yield {"event": "final", **_answer_result(answer, experiment_id)}
 
 # DB에 저장되지 않은 모든 채팅 로그를 강제로 저장하는 함수
 def flush_all_chat_logs():
@@ -272,6 +533,14 @@ def flush_all_chat_logs():
     print("Attempting to flush all chat logs from Redis to DB...")
     chat_log_service.flush_chat_logs_from_cache_to_db()
 
+async def aagent_chat_answer(manual_id: str, sender: str, message: str, user_id: str = "default_user", experiment_id: int = None, history: List[Dict[str, str]] = None) -> Dict[str, str]:
+    """agent_chat_answer의 비동기 버전 (공유 스레드 풀에서 실행)"""
+    return await run_blocking(agent_chat_answer, manual_id, sender, message, user_id, experiment_id, history)
+
+async def aflush_all_chat_logs():
+    """flush_all_chat_logs의 비동기 버전 (공유 스레드 풀에서 실행)"""
+    await run_blocking(flush_all_chat_logs)
+
 def save_chat_log(db: Session, chat_log: dict):
     """
     (This function is now deprecated and replaced by the Redis caching mechanism)
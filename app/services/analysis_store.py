@@ -0,0 +1,141 @@
+import hashlib
+from typing import Any, Callable, Dict, Optional
+
+from app.core import metrics
+from app.db.database import SessionLocal
+from app.db.vector_store import get_collection, build_where
+from app.crud.manuals_crud import get_manual_by_manual_id
+from app.crud import risk_analysis_crud
+
+# 분석 종류 (risk_analysis.analysis_type)
+MANUAL_RISKS = "manual_risks"
+EXPERIMENT_RISKS = "experiment_risks"
+RISK_ADVICES = "risk_advices"
+EXPERIMENT_SUMMARY = "experiment_summary"
+MANUAL_EXPERIMENTS = "manual_experiments"
+
+
+def _digest(parts) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _fingerprint_from_metadatas(metadatas) -> Optional[str]:
+    # 수집 시 기록한 원본 파일 해시(content_hash)와 청크 수로 지문을 만든다. 해시가 없는 청크가 있으면 None
+    hashes = [meta.get("content_hash") if meta else None for meta in metadatas]
+    if not hashes or not all(hashes):
+        return None
+    return _digest(["content_hash", len(hashes), *sorted(set(hashes))])
+
+
+def compute_chunk_fingerprint(manual_id: str, experiment_id: Optional[str] = None, chunks: Optional[list] = None) -> Optional[str]:
+    """
+    매뉴얼(또는 실험) 청크의 content_hash와 청크 수로 sha256 지문을 만듭니다. 청크가 없으면 None.
+    본문은 내려받지 않으며, 호출하는 쪽이 이미 불러온 청크(chunks)가 있으면 벡터DB를 조회하지 않습니다.
+    content_hash가 없는 예전 청크는 청크 ID 목록으로 지문을 만듭니다.
+    """
+    if chunks:
+        fingerprint = _fingerprint_from_metadatas([chunk.metadata for chunk in chunks])
+        if fingerprint:
+            return fingerprint
+    results = get_collection().get(
+        where=build_where(manual_id=manual_id, experiment_id=experiment_id),
+        include=["metadatas"]
+    )
+    if not results["ids"]:
+        return None
+    return _fingerprint_from_metadatas(results["metadatas"]) or _digest(["ids", *sorted(results["ids"])])
+
+
+def _load(analysis_type: str, manual_id: str, experiment_id: Optional[str], fingerprint: str, prompt_version: str):
+    # (매뉴얼 PK, 저장된 결과) 반환. 매뉴얼 행이 없으면 저장하지 않는다
+    db = SessionLocal()
+    try:
+        manual = get_manual_by_manual_id(db, manual_id)
+        if not manual:
+            return None, None
+        row = risk_analysis_crud.get_risk_analysis(db, manual.id, analysis_type, experiment_id, fingerprint, prompt_version)
+        return manual.id, (row.json_data if row else None)
+    finally:
+        db.close()
+
+
+def _save(manual_pk: int, analysis_type: str, experiment_id: Optional[str], fingerprint: str,
+          prompt_version: str, result: dict, summary: Optional[str]):
+    db = SessionLocal()
+    try:
+        risk_analysis_crud.save_risk_analysis(
+            db, manual_pk, analysis_type, experiment_id, fingerprint, prompt_version, result, summary
+        )
+    finally:
+        db.close()
+
+
+def get_or_compute_analysis(
+    analysis_type: str,
+    manual_id: str,
+    compute: Callable[[], Dict[str, Any]],
+    experiment_id: Optional[str] = None,
+    prompt_version: str = "1",
+    is_success: Callable[[Dict[str, Any]], bool] = lambda result: bool(result.get("success")) and not result.get("error"),
+    summarize: Optional[Callable[[Dict[str, Any]], str]] = None,
+    refresh: bool = False,
+    chunks: Optional[list] = None
+) -> Dict[str, Any]:
+    """
+    저장된 분석 결과가 있으면 반환하고, 없으면 compute()로 계산한 뒤 risk_analysis 테이블에 저장합니다.
+    결과는 매뉴얼, 실험, 분석 종류, 청크 지문, 프롬프트 버전으로 구분되며 성공한 결과만 저장합니다.
+    LLM 오류로 기본값이 채워진 결과가 저장되지 않도록 호출하는 쪽에서 is_success를 넘겨야 합니다.
+    refresh=True이면 저장된 결과를 무시하고 다시 계산합니다.
+    이미 불러온 청크가 있으면 chunks로 넘겨 지문 계산 시 벡터DB 조회를 생략합니다.
+    """
+    try:
+        fingerprint = compute_chunk_fingerprint(manual_id, experiment_id, chunks)
+    except Exception as e:
+        print(f"청크 지문 계산 실패 ({manual_id}): {e}")
+        fingerprint = None
+    if fingerprint is None:
+        return compute()
+
+    manual_pk = None
+    try:
+        manual_pk, stored = _load(analysis_type, manual_id, experiment_id, fingerprint, prompt_version)
+        if stored is not None and not refresh:
+            metrics.incr(f"analysis_store.{analysis_type}.hit")
+            return stored
+    except Exception as e:
+        metrics.incr("analysis_store.error")
+        print(f"분석 결과 조회 실패 ({analysis_type}, {manual_id}): {e}")
+
+    metrics.incr(f"analysis_store.{analysis_type}.miss")
+    with metrics.timer(f"analysis_store.{analysis_type}.compute"):
+        result = compute()
+
+    if manual_pk is not None and is_success(result):
+        try:
+            summary = summarize(result) if summarize else None
+            _save(manual_pk, analysis_type, experiment_id, fingerprint, prompt_version, result, summary)
+        except Exception as e:
+            metrics.incr("analysis_store.error")
+            print(f"분석 결과 저장 실패 ({analysis_type}, {manual_id}): {e}")
+    return result
+
+
+def invalidate_manual_analyses(manual_id: str, analysis_type: Optional[str] = None) -> int:
+    """
+    매뉴얼의 저장된 분석 결과를 삭제합니다. (재수집 시)
+    """
+    db = SessionLocal()
+    try:
+        manual = get_manual_by_manual_id(db, manual_id)
+        if not manual:
+            return 0
+        return risk_analysis_crud.delete_risk_analyses_by_manual(db, manual.id, analysis_type)
+    except Exception as e:
+        print(f"분석 결과 삭제 실패 ({manual_id}): {e}")
+        return 0
+    finally:
+        db.close()
@@ -0,0 +1,145 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from app.core import metrics
+from app.db.redis_conn import get_redis_conn
+from app.db.vector_store import get_embeddings
+
+# 캐시 설정 (환경 변수로 조정 가능)
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", 0.95))  # 코사인 유사도
+ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", 60 * 60 * 6))  # 6시간
+ANSWER_CACHE_MAX_PER_MANUAL = int(os.getenv("ANSWER_CACHE_MAX_PER_MANUAL", 256))
+ANSWER_CACHE_GENERATION_PREFIX = "answer_cache:generation"
+
+
+class SemanticAnswerCache:
+    """
+    매뉴얼별 질문-답변 캐시입니다.
+    질문 임베딩의 코사인 유사도가 임계값 이상인 기존 답변을 재사용합니다.
+    (manual_id, scope)마다 최대 max_entries개를 LRU로 유지하고, ttl이 지난 항목은 조회 시 버립니다.
+    캐시는 프로세스마다 따로 있으므로, 무효화는 Redis의 매뉴얼별 세대 번호를 올려 모든 워커에 알립니다.
+    저장 시의 세대 번호와 현재 세대 번호가 다른 항목은 조회 시 버립니다.
+    """
+
+    def __init__(self, threshold: float = ANSWER_CACHE_THRESHOLD, ttl: int = ANSWER_CACHE_TTL,
+                 max_entries: int = ANSWER_CACHE_MAX_PER_MANUAL):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # (manual_id, scope) -> OrderedDict[질문, 항목]
+        self._entries: Dict[tuple, "OrderedDict[str, Dict[str, Any]]"] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._redis = get_redis_conn()
+
+    def _generation_key(self, manual_id: str) -> str:
+        return f"{ANSWER_CACHE_GENERATION_PREFIX}:{manual_id}"
+
+    def _generation(self, manual_id: str) -> Optional[str]:
+        # Redis 장애 시 None (세대 확인 없이 TTL만 적용)
+        try:
+            return self._redis.get(self._generation_key(manual_id)) or "0"
+        except Exception as e:
+            print(f"답변 캐시 세대 조회 실패: {e}")
+            return None
+
+    def _embed(self, question: str) -> np.ndarray:
+        vector = np.asarray(get_embeddings().embed_query(question), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _record(self, hit: bool):
+        with self._lock:
+            if hit:
+                self._hits += 1
+            else:
+                self._misses += 1
+            metrics.set_gauge("answer_cache.hit_rate", self._hits / (self._hits + self._misses))
+        metrics.incr("answer_cache.hit" if hit else "answer_cache.miss")
+
+    def lookup(self, manual_id: str, question: str, scope: str = "chat") -> Optional[Dict[str, Any]]:
+        """
+        유사한 질문의 캐시된 답변을 반환합니다. 없으면 None.
+        반환값: {"question", "answer", "similarity", **저장 시 넘긴 추가 필드}
+        """
+        key = (manual_id, scope)
+        with self._lock:
+            has_entries = bool(self._entries.get(key))
+        if not has_entries:
+            self._record(False)
+            return None
+
+        generation = self._generation(manual_id)
+        vector = self._embed(question)
+        now = time.time()
+        with self._lock:
+            entries = self._entries.get(key)
+            if entries:
+                # 만료되었거나 다른 워커에서 무효화된(세대가 바뀐) 항목은 버린다
+                stale = [
+                    q for q, entry in entries.items()
+                    if now - entry["created_at"] > self.ttl
+                    or (generation is not None and entry["generation"] != generation)
+                ]
+                for expired in stale:
+                    del entries[expired]
+            if not entries:
+                self._entries.pop(key, None)
+                best = None
+            else:
+                questions = list(entries.keys())
+                similarities = np.stack([entries[q]["vector"] for q in questions]) @ vector
+                index = int(np.argmax(similarities))
+                best = None
+                if similarities[index] >= self.threshold:
+                    entries.move_to_end(questions[index])
+                    entry = entries[questions[index]]
+                    best = {
+                        "question": questions[index],
+                        "answer": entry["answer"],
+                        "similarity": float(similarities[index]),
+                        **entry["extra"],
+                    }
+        self._record(best is not None)
+        return best
+
+    def store(self, manual_id: str, question: str, answer: str, scope: str = "chat", **extra):
+        """질문과 답변을 캐시에 저장합니다. extra는 조회 시 함께 반환됩니다."""
+        generation = self._generation(manual_id)
+        vector = self._embed(question)
+        with self._lock:
+            entries = self._entries.setdefault((manual_id, scope), OrderedDict())
+            entries[question] = {
+                "vector": vector, "answer": answer, "extra": extra,
+                "created_at": time.time(), "generation": generation
+            }
+            entries.move_to_end(question)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+            metrics.set_gauge("answer_cache.entries", sum(len(e) for e in self._entries.values()))
+
+    def invalidate(self, manual_id: Optional[str] = None) -> int:
+        """
+        매뉴얼의 캐시된 답변을 모두 삭제합니다. manual_id가 없으면 전체를 비웁니다. (매뉴얼 삭제/재수집 시)
+        manual_id가 있으면 세대 번호를 올려 다른 워커의 캐시도 무효화합니다.
+        """
+        if manual_id is not None:
+            try:
+                self._redis.incr(self._generation_key(manual_id))
+            except Exception as e:
+                print(f"답변 캐시 세대 갱신 실패: {e}")
+        with self._lock:
+            keys = [key for key in self._entries if manual_id is None or key[0] == manual_id]
+            removed = sum(len(self._entries.pop(key)) for key in keys)
+            metrics.set_gauge("answer_cache.entries", sum(len(e) for e in self._entries.values()))
+        return removed
+
+
+# 프로세스 공용 캐시 인스턴스
+answer_cache = SemanticAnswerCache()
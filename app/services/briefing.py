@@ -7,6 +7,7 @@ from dotenv import load_dotenv
 
 from app.services.manual_analyze import analyze_manual_risks
 from app.services.tts_service import tts_google_to_file
+from app.core.executor import run_blocking
 
 load_dotenv()
 
@@ -99,6 +100,10 @@ def generate_voice_briefing(manual_id: str) -> Dict[str, Any]:
         print(f"❌ {error_msg}")
         raise Exception(error_msg)
 
+async def agenerate_voice_briefing(manual_id: str) -> Dict[str, Any]:
+    """generate_voice_briefing의 비동기 버전 (공유 스레드 풀에서 실행)"""
+    return await run_blocking(generate_voice_briefing, manual_id)
+
 def _generate_summary_with_llm(risk_items: List[str], manual_id: str) -> str:
     """
     LLM을 사용하여 위험 정보를 2-3줄로 요약합니다.
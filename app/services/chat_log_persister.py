@@ -0,0 +1,183 @@
+import os
+import json
+import socket
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+import redis
+from sqlalchemy.exc import OperationalError
+
+from app.core import metrics
+from app.db.redis_conn import get_redis_conn
+from app.db.database import SessionLocal
+from app.crud import chat_log_crud
+from app.services.chat_log_service import chat_log_service, CHAT_LOG_STREAM_KEY
+
+# 컨슈머 그룹 설정 (환경 변수로 조정 가능)
+CHAT_LOG_CONSUMER_GROUP = os.getenv("CHAT_LOG_CONSUMER_GROUP", "chat_log_persisters")
+CHAT_LOG_DEAD_LETTER_KEY = "chat_logs_dead_letter"
+CHAT_LOG_READ_COUNT = int(os.getenv("CHAT_LOG_READ_COUNT", 500))
+CHAT_LOG_READ_BLOCK_MS = int(os.getenv("CHAT_LOG_READ_BLOCK_MS", 2000))  # Redis socket_timeout(5초)보다 짧아야 한다
+CHAT_LOG_CLAIM_IDLE_MS = int(os.getenv("CHAT_LOG_CLAIM_IDLE_MS", 60000))  # 이 시간 동안 ACK 안 된 항목은 회수
+CHAT_LOG_PERSISTER_IN_APP = os.getenv("CHAT_LOG_PERSISTER_IN_APP", "true").lower() == "true"
+
+
+def _with_created_at(entry_id: str, log: dict) -> dict:
+    # created_at 없이 쌓인 이전 항목은 스트림 항목 ID(밀리초 타임스탬프-순번)로 보낸 시각을 복원한다
+    if not log.get("created_at"):
+        millis = int(entry_id.split("-")[0])
+        log["created_at"] = datetime.utcfromtimestamp(millis / 1000).isoformat()
+    return log
+
+
+class ChatLogPersister:
+    """
+    Redis Stream(chat_logs_stream)의 채팅 로그를 컨슈머 그룹으로 읽어 DB에 일괄 저장합니다.
+    워커/프로세스마다 서로 다른 컨슈머 이름을 쓰므로 여러 개를 띄우면 처리량이 늘어나고,
+    저장에 성공한 항목만 XACK 합니다. 죽은 컨슈머가 남긴 미확인 항목은 XAUTOCLAIM으로 회수합니다.
+    """
+
+    def __init__(self, consumer_name: Optional[str] = None):
+        self.redis_conn = get_redis_conn()
+        self._consumer_name_override = consumer_name
+        self.consumer_name: Optional[str] = None  # start()/run_forever() 시점에 정한다
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _init_consumer_name(self):
+        # import 시점에 정하면 fork 전에 모듈을 불러온 워커들이 부모의 pid를 같은 이름으로 공유하므로 실행하는 프로세스 기준으로 만든다
+        self.consumer_name = self._consumer_name_override or f"{socket.gethostname()}-{os.getpid()}"
+
+    def ensure_group(self):
+        # 그룹 생성 전에 쌓인 항목도 처리하도록 id="0"부터 읽는다
+        try:
+            self.redis_conn.xgroup_create(CHAT_LOG_STREAM_KEY, CHAT_LOG_CONSUMER_GROUP, id="0", mkstream=True)
+        except redis.exceptions.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def _persist(self, entries: List[Tuple[str, dict]]) -> int:
+        """항목들을 한 트랜잭션으로 저장하고 ACK 합니다. 일괄 저장이 실패하면 한 건씩 저장합니다."""
+        if not entries:
+            return 0
+        ids = [entry_id for entry_id, _ in entries]
+        logs = [_with_created_at(entry_id, json.loads(fields["log"])) for entry_id, fields in entries]
+        db = SessionLocal()
+        try:
+            with metrics.timer("chat_log.persist.latency"):
+                chat_log_crud.create_chat_log_batch(db, logs)
+        except OperationalError:
+            # DB 연결 장애: ACK 하지 않고 남겨 두면 재시도/회수된다
+            db.rollback()
+            raise
+        except Exception as e:
+            db.rollback()
+            print(f"채팅 로그 일괄 저장 실패, 한 건씩 재시도합니다: {e}")
+            return self._persist_one_by_one(db, ids, logs)
+        finally:
+            db.close()
+        self.redis_conn.xack(CHAT_LOG_STREAM_KEY, CHAT_LOG_CONSUMER_GROUP, *ids)
+        metrics.incr("chat_log.persist.rows", len(ids))
+        metrics.set_gauge("chat_log.persist.last_batch_size", len(ids))
+        return len(ids)
+
+    def _persist_one_by_one(self, db, ids: List[str], logs: List[dict]) -> int:
+        persisted = 0
+        for entry_id, log in zip(ids, logs):
+            try:
+                chat_log_crud.create_chat_log_batch(db, [log])
+                persisted += 1
+            except OperationalError:
+                db.rollback()
+                raise
+            except Exception as e:
+                db.rollback()
+                # 저장할 수 없는 항목은 데드레터 스트림으로 옮겨 반복 실패를 막는다
+                self.redis_conn.xadd(CHAT_LOG_DEAD_LETTER_KEY, {"log": json.dumps(log), "error": str(e)[:500]})
+                metrics.incr("chat_log.persist.dead_letter")
+            self.redis_conn.xack(CHAT_LOG_STREAM_KEY, CHAT_LOG_CONSUMER_GROUP, entry_id)
+        metrics.incr("chat_log.persist.rows", persisted)
+        return persisted
+
+    def claim_stale(self) -> int:
+        """다른(죽은) 컨슈머가 가져간 뒤 ACK 하지 않은 항목을 회수해 저장합니다."""
+        if self.consumer_name is None:
+            self._init_consumer_name()
+        result = self.redis_conn.xautoclaim(
+            CHAT_LOG_STREAM_KEY, CHAT_LOG_CONSUMER_GROUP, self.consumer_name,
+            min_idle_time=CHAT_LOG_CLAIM_IDLE_MS, start_id="0-0", count=CHAT_LOG_READ_COUNT
+        )
+        entries = [(entry_id, fields) for entry_id, fields in result[1] if fields]
+        # MAXLEN으로 이미 잘려 나간 항목은 저장할 내용이 없으므로 ACK만 한다
+        trimmed = [entry_id for entry_id, fields in result[1] if not fields]
+        if trimmed:
+            self.redis_conn.xack(CHAT_LOG_STREAM_KEY, CHAT_LOG_CONSUMER_GROUP, *trimmed)
+        if entries:
+            metrics.incr("chat_log.persist.claimed", len(entries))
+        return self._persist(entries)
+
+    def run_once(self, block_ms: Optional[int] = CHAT_LOG_READ_BLOCK_MS) -> int:
+        """새 항목을 한 번 읽어 저장합니다. 저장한 개수를 반환합니다."""
+        if self.consumer_name is None:
+            self._init_consumer_name()
+        response = self.redis_conn.xreadgroup(
+            CHAT_LOG_CONSUMER_GROUP, self.consumer_name, {CHAT_LOG_STREAM_KEY: ">"},
+            count=CHAT_LOG_READ_COUNT, block=block_ms
+        )
+        persisted = 0
+        for _, entries in response or []:
+            persisted += self._persist(entries)
+        return persisted
+
+    def run_forever(self):
+        """중지될 때까지 스트림을 처리합니다. 시작 시 이전 Redis 리스트 버퍼를 한 번 비웁니다."""
+        self._init_consumer_name()
+        print(f"채팅 로그 persister 시작 (consumer: {self.consumer_name})")
+        ready = False
+        next_claim = 0.0
+        while not self._stop.is_set():
+            try:
+                if not ready:
+                    self.ensure_group()
+                    chat_log_service.flush_chat_logs_from_cache_to_db()
+                    ready = True
+                if time.monotonic() >= next_claim:
+                    self.claim_stale()
+                    next_claim = time.monotonic() + CHAT_LOG_CLAIM_IDLE_MS / 1000 / 2
+                self.run_once()
+            except Exception as e:
+                metrics.incr("chat_log.persist.error")
+                print(f"채팅 로그 저장 오류: {e}")
+                if "NOGROUP" in str(e):
+                    # 스트림이 삭제된 경우 그룹을 다시 만든다
+                    ready = False
+                self._stop.wait(1)
+
+    def start(self):
+        """백그라운드 스레드에서 run_forever를 실행합니다. (앱 시작 시)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run_forever, name="chat-log-persister", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5):
+        """백그라운드 스레드를 멈춥니다. (앱 종료 시)"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+# 앱 프로세스 안에서 사용하는 persister
+chat_log_persister = ChatLogPersister()
+
+
+if __name__ == "__main__":
+    # 전용 프로세스로 실행: python -m app.services.chat_log_persister
+    try:
+        ChatLogPersister().run_forever()
+    except KeyboardInterrupt:
+        pass
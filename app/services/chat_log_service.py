@@ -1,74 +1,138 @@
+import os
 import json
-from typing import List, Dict
+import uuid
+from datetime import datetime
+from typing import List, Dict, Optional
 import redis
 from app.db.redis_conn import get_redis_conn
 from app.db.database import SessionLocal
-from app.crud import chat_log_crud, user_crud, manuals_crud
+from app.crud import chat_log_crud
+from app.core import metrics
+from app.services.id_cache import user_pk_cache, manual_pk_cache
 
-CHAT_LOG_REDIS_KEY = "chat_logs_buffer"
-CHAT_LOG_FLUSH_THRESHOLD = 10  # Persist to DB every 10 messages
+CHAT_LOG_REDIS_KEY = "chat_logs_buffer"  # Legacy list buffer, drained once by the persister
+CHAT_LOG_STREAM_KEY = "chat_logs_stream"
+CHAT_LOG_STREAM_MAXLEN = int(os.getenv("CHAT_LOG_STREAM_MAXLEN", 100000))  # Approximate cap (MAXLEN ~)
+CHAT_LOG_FLUSH_BATCH_SIZE = int(os.getenv("CHAT_LOG_FLUSH_BATCH_SIZE", 500))  # Rows per insert transaction
+CHAT_LOG_FLUSH_LOCK_KEY = "chat_logs_flush_lock"
+CHAT_LOG_FLUSH_LOCK_TTL = 60  # seconds
+
+# Compare-and-delete / compare-and-refresh, so a worker never touches a lock that expired and was taken by another
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+_REFRESH_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+return 0
+"""
 
 class ChatLogService:
     def __init__(self):
         self.redis_conn = get_redis_conn()
 
     def add_chat_to_cache(self, experiment_id: int, user_id: str, manual_id: str, sender: str, message: str):
-        """Adds a chat message to the Redis cache and checks if it needs to be flushed."""
-        db = SessionLocal()
+        """Appends a chat message to the Redis chat log stream."""
+        # Convert string IDs to integer primary keys (cached, no DB round trip on a hit)
+        db_user_id = user_pk_cache.resolve(user_id)
+        if db_user_id is None:
+            print(f"Warning: User with user_id '{user_id}' not found.")
+
+        db_manual_id = manual_pk_cache.resolve(manual_id)
+        if db_manual_id is None:
+            print(f"Warning: Manual with manual_id '{manual_id}' not found. Storing chat log with manual_id=NULL.")
+
+        log_entry = {
+            "experiment_id": experiment_id,
+            "user_id": db_user_id,
+            "manual_id": db_manual_id,
+            "sender": sender,
+            "message": message,
+            # Stamp the send time here: persisters write batches in parallel and reclaimed entries much later
+            "created_at": datetime.utcnow().isoformat()
+        }
+        # A single XADD; persisters (app/services/chat_log_persister.py) drain the stream into the DB
+        self.redis_conn.xadd(
+            CHAT_LOG_STREAM_KEY,
+            {"log": json.dumps(log_entry)},
+            maxlen=CHAT_LOG_STREAM_MAXLEN,
+            approximate=True
+        )
+
+    def _acquire_flush_lock(self) -> Optional[str]:
+        """Returns the lock token if acquired, otherwise None."""
+        token = uuid.uuid4().hex
         try:
-            # Convert string IDs to integer primary keys
-            user = user_crud.get_user_by_id(db, user_id=user_id)
-            db_user_id = user.id if user else None
-            if db_user_id is None:
-                print(f"Warning: User with user_id '{user_id}' not found.")
+            if self.redis_conn.set(CHAT_LOG_FLUSH_LOCK_KEY, token, nx=True, ex=CHAT_LOG_FLUSH_LOCK_TTL):
+                return token
+        except Exception as e:
+            print(f"Failed to acquire chat log flush lock: {e}")
+        return None
 
-            manual = manuals_crud.get_manual_by_manual_id(db, manual_id=manual_id)
-            db_manual_id = manual.id if manual else None
-            
-            if db_manual_id is None:
-                print(f"Warning: Manual with manual_id '{manual_id}' not found. Storing chat log with manual_id=NULL.")
+    def _refresh_flush_lock(self, token: str) -> bool:
+        return bool(self.redis_conn.eval(_REFRESH_LOCK_SCRIPT, 1, CHAT_LOG_FLUSH_LOCK_KEY, token, CHAT_LOG_FLUSH_LOCK_TTL))
 
-            log_entry = {
-                "experiment_id": experiment_id,
-                "user_id": db_user_id,
-                "manual_id": db_manual_id,
-                "sender": sender,
-                "message": message
-            }
-            print("rpush", log_entry)
-            result = self.redis_conn.rpush(CHAT_LOG_REDIS_KEY, json.dumps(log_entry))
-            print("rpush result", result)
-            
-            if self.redis_conn.llen(CHAT_LOG_REDIS_KEY) >= CHAT_LOG_FLUSH_THRESHOLD:
-                print("flush_chat_logs_from_cache_to_db")
-                self.flush_chat_logs_from_cache_to_db()
-        finally:
-            db.close()
+    def _release_flush_lock(self, token: str):
+        try:
+            self.redis_conn.eval(_RELEASE_LOCK_SCRIPT, 1, CHAT_LOG_FLUSH_LOCK_KEY, token)
+        except Exception as e:
+            print(f"Failed to release chat log flush lock: {e}")
 
-    def flush_chat_logs_from_cache_to_db(self):
-        """Flushes chat logs from Redis to the main database."""
+    def flush_chat_logs_from_cache_to_db(self) -> int:
+        """
+        Flushes the legacy chat log list (chat_logs_buffer) to the main database in bulk.
+        New logs go to the chat log stream; this only drains entries written before the switch.
+        Only one flush runs at a time across workers (Redis lock held by a per-flush token). Each batch is read with LRANGE,
+        inserted in a single transaction, and trimmed from the list only after the insert commits,
+        so a failed insert leaves the rows in Redis for the next flush.
+        Returns the number of rows persisted.
+        """
+        token = self._acquire_flush_lock()
+        if token is None:
+            metrics.incr("chat_log.flush.skipped")
+            return 0
+        flushed = 0
         try:
-            pipe = self.redis_conn.pipeline()
-            pipe.lrange(CHAT_LOG_REDIS_KEY, 0, -1)
-            pipe.delete(CHAT_LOG_REDIS_KEY)
-            logs_json, _ = pipe.execute()
+            while True:
+                logs_json = self.redis_conn.lrange(CHAT_LOG_REDIS_KEY, 0, CHAT_LOG_FLUSH_BATCH_SIZE - 1)
+                if not logs_json:
+                    break
 
-            if not logs_json:
-                print("No chat logs in Redis cache to flush.")
-                return
+                logs_to_db = [json.loads(log) for log in logs_json]
+                db = SessionLocal()
+                try:
+                    with metrics.timer("chat_log.flush.latency"):
+                        chat_log_crud.create_chat_log_batch(db, logs_to_db)
+                except Exception:
+                    db.rollback()
+                    raise
+                finally:
+                    db.close()
 
-            logs_to_db = [json.loads(log) for log in logs_json]
-            
-            db = SessionLocal()
-            try:
-                for log in logs_to_db:
-                    chat_log_crud.create_chat_log(db, log)
-                print(f"Flushed {len(logs_to_db)} chat logs from Redis to DB.")
-            finally:
-                db.close()
+                # Remove only the rows that were just persisted (new rows are appended at the tail)
+                self.redis_conn.ltrim(CHAT_LOG_REDIS_KEY, len(logs_json), -1)
+                flushed += len(logs_json)
+                metrics.incr("chat_log.flush.rows", len(logs_json))
+                metrics.set_gauge("chat_log.flush.last_batch_size", len(logs_json))
 
+                if len(logs_json) < CHAT_LOG_FLUSH_BATCH_SIZE:
+                    break
+                if not self._refresh_flush_lock(token):
+                    # The lock expired and another worker owns it now; let it continue the flush
+                    print("Chat log flush lock lost; stopping this flush.")
+                    break
+            if flushed:
+                print(f"Flushed {flushed} chat logs from Redis to DB.")
         except Exception as e:
+            metrics.incr("chat_log.flush.error")
             print(f"Error flushing chat logs to DB: {e}")
+        finally:
+            self._release_flush_lock(token)
+        return flushed
 
 # Create a singleton instance
 chat_log_service = ChatLogService() 
\ No newline at end of file
@@ -1,20 +1,18 @@
 import os
 import json
-import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
 from langchain_core.documents import Document
-from langchain_core.tools import tool
 from langchain_core.messages import HumanMessage
 from langchain_openai import ChatOpenAI
-from langchain_chroma import Chroma
-from langchain_openai import OpenAIEmbeddings
-from langgraph.prebuilt import create_react_agent
 from dotenv import load_dotenv
+from app.db.vector_store import get_vectorstore
+from app.services.analysis_store import get_or_compute_analysis, EXPERIMENT_RISKS, MANUAL_EXPERIMENTS
+from app.core.executor import run_blocking
 
 load_dotenv()
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-CHROMA_DIR = "./chroma_db"
 
 if not OPENAI_API_KEY:
     raise RuntimeError("OPENAI_API_KEY not found in environment variables.")
@@ -26,19 +24,18 @@ llm = ChatOpenAI(
     openai_api_key=OPENAI_API_KEY
 )
 
-# 전역 변수로 청크 데이터 저장 
-_current_chunks: List[Document] = []  # 단순한 청크 리스트로 변경
+# 프롬프트를 바꾸면 올려서 저장된 분석 결과를 무효화
+EXPERIMENT_ANALYSIS_PROMPT_VERSION = "1"
+
+# 동시에 분석할 실험 수
+EXPERIMENT_ANALYSIS_MAX_CONCURRENCY = int(os.getenv("EXPERIMENT_ANALYSIS_MAX_CONCURRENCY", 4))
 
 def load_manual_chunks(manual_id: str) -> List[Document]:
     """
     벡터DB에서 manual_id에 해당하는 모든 청크를 불러옵니다.
     """
     try:
-        embeddings = OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY)
-        vectorstore = Chroma(
-            persist_directory=CHROMA_DIR,
-            embedding_function=embeddings
-        )
+        vectorstore = get_vectorstore()
         
         # manual_id로 필터링하여 문서 검색
         docs = vectorstore.get(where={"manual_id": manual_id})
@@ -60,201 +57,59 @@ def load_manual_chunks(manual_id: str) -> List[Document]:
     except:
         return []
 
-@tool
-def extract_experiments(manual_id: str) -> str:
+def group_chunks_by_experiment(chunks: List[Document]) -> Dict[str, List[Document]]:
     """
-    매뉴얼에서 experiment_id별로 그룹화된 실험들을 식별하고 기본 정보를 추출하는 도구입니다.
-    
-    Args:
-        manual_id: 분석할 매뉴얼 ID
-    
-    Returns:
-        JSON 형태의 실험 목록 (experiment_id 기반)
+    청크들을 experiment_id별로 한 번에 묶습니다. (experiment_id가 없는 청크는 제외)
     """
-    global _current_chunks
-    
-    # 전역 변수에서 청크가 없으면 새로 로드
-    if not _current_chunks:
-        _current_chunks = load_manual_chunks(manual_id)
-    
-    if not _current_chunks:
-        return json.dumps({
-            "error": "해당 manual_id의 문서를 찾을 수 없습니다.", 
-            "experiments": []
-        })
-    
-    # experiment_id별로 청크들을 그룹화
     experiments_groups = {}
-    for chunk in _current_chunks:
+    for chunk in chunks:
         exp_id = chunk.metadata.get("experiment_id", "unknown")
         if exp_id != "unknown":
-            if exp_id not in experiments_groups:
-                experiments_groups[exp_id] = []
-            experiments_groups[exp_id].append(chunk)
-    
-    experiments_info = []
-    
-    for experiment_id, chunks in experiments_groups.items():
-        chunk_count = len(chunks)
-        
-        if not chunks:
-            continue
-        
-        # 모든 청크의 텍스트를 결합하여 더 정확한 분석
-        combined_text = "\n".join([chunk.page_content for chunk in chunks[:5]])  # 최대 5개 청크
-        
-        # 토큰 제한 고려
-        if len(combined_text) > 3000:
-            combined_text = combined_text[:3000] + "..."
-        
-        prompt = f"""
-다음은 실험 매뉴얼의 내용입니다. 이 실험의 제목, 설명, 키워드를 정확히 추출해주세요.
-
-**실험 ID**: {experiment_id}
-**실험 내용**:
-{combined_text}
+            experiments_groups.setdefault(exp_id, []).append(chunk)
+    return experiments_groups
 
-**다음 JSON 형태로만 응답해주세요:**
-{{
-    "title": "실험의 정확한 제목",
-    "description": "실험 목적이나 간단한 설명 (2-3문장)",
-    "keywords": ["주요 키워드들"],
-    "has_equipment": true/false,
-    "has_chemicals": true/false,
-    "has_procedure": true/false
-}}
-"""
-        
-        try:
-            response = llm.invoke([HumanMessage(content=prompt)])
-            result_text = response.content.strip()
-            
-            # JSON 추출 시도
-            if "```json" in result_text:
-                json_start = result_text.find("```json") + 7
-                json_end = result_text.find("```", json_start)
-                json_text = result_text[json_start:json_end].strip()
-            elif "{" in result_text and "}" in result_text:
-                json_start = result_text.find("{")
-                json_end = result_text.rfind("}") + 1
-                json_text = result_text[json_start:json_end]
-            else:
-                json_text = result_text
-            
-            parsed_info = json.loads(json_text)
-            title = parsed_info.get("title", f"실험 {experiment_id}")
-            description = parsed_info.get("description", "설명 없음")
-            keywords = parsed_info.get("keywords", [])
-            has_equipment = parsed_info.get("has_equipment", False)
-            has_chemicals = parsed_info.get("has_chemicals", False)
-            has_procedure = parsed_info.get("has_procedure", False)
-            
-        except Exception as e:
-            # 파싱 실패 시 기본값
-            title = f"실험 {experiment_id}"
-            description = f"실험 정보 추출 실패: {str(e)}"
-            keywords = []
-            has_equipment = False
-            has_chemicals = False
-            has_procedure = False
-        
-        # 실험 정보 구성
-        experiment_info = {
+def extract_experiment_elements(experiment_id: str, experiment_chunks: List[Document], title: Optional[str] = None) -> Dict[str, Any]:
+    """
+    실험 하나의 구성 요소(equipment, chemicals, procedure)와 위험 요소를 청크에서 추출합니다.
+    title이 없으면 청크 내용에서 제목도 함께 추출합니다.
+    """
+    default_title = title or f"실험 {experiment_id}"
+    
+    # 검색된 청크가 없는 경우 fallback 처리
+    if not experiment_chunks:
+        return {
             "experiment_id": experiment_id,
-            "title": title,
-            "description": description,
-            "chunk_count": chunk_count,
-            "keywords": keywords,
-            "estimated_difficulty": "중급",  # 기본값
-            "analysis_flags": {
-                "has_equipment": has_equipment,
-                "has_chemicals": has_chemicals,
-                "has_procedure": has_procedure
-            }
+            "title": default_title,
+            "equipment": ["해당 정보는 문서에서 확인되지 않았습니다."],
+            "chemicals": ["해당 정보는 문서에서 확인되지 않았습니다."],
+            "procedure_summary": "해당 정보는 문서에서 확인되지 않았습니다.",
+            "risks": {
+                "위험_조언": ["해당 정보는 문서에서 확인되지 않았습니다."],
+                "주의사항": ["해당 정보는 문서에서 확인되지 않았습니다."],
+                "안전수칙": ["해당 정보는 문서에서 확인되지 않았습니다."]
+            },
+            "overall_risk_level": "분석불가",
+            "analysis_note": f"experiment_id={experiment_id}에서 청크를 찾을 수 없음"
         }
-        
-        experiments_info.append(experiment_info)
     
-    result = {
-        "total_experiments": len(experiments_info),
-        "experiments": experiments_info
-    }
+    # 검색된 청크들을 텍스트로 결합
+    context_text = "\n\n".join([
+        f"[청크 {i+1}]\n{chunk.page_content}" 
+        for i, chunk in enumerate(experiment_chunks[:10])  # 최대 10개
+    ])
     
-    return json.dumps(result, ensure_ascii=False)
-
-@tool
-def extract_experiment_elements(experiment_data: str) -> str:
-    """
-    특정 실험 내 구성 요소(equipment, chemicals, procedure)를 Context7 기반 검색으로 추출하는 도구입니다.
+    # 토큰 제한 고려
+    if len(context_text) > 12000:
+        context_text = context_text[:12000] + "\n\n[텍스트가 길어 일부 생략됨]"
     
-    Args:
-        experiment_data: extract_experiments에서 반환된 실험 정보 JSON
-    
-    Returns:
-        실험별 구성 요소가 포함된 JSON
-    """
-    try:
-        # 입력 데이터 파싱
-        exp_info = json.loads(experiment_data)
-        experiments = exp_info.get("experiments", [])
-        
-        if not experiments:
-            return json.dumps({
-                "error": "실험 정보를 찾을 수 없습니다.",
-                "experiment_elements": []
-            })
-        
-        # 전역 변수에서 청크 사용
-        global _current_chunks
-        
-        experiment_elements = []
-        
-        for exp in experiments:
-            experiment_id = exp.get("experiment_id", "unknown")
-            title = exp.get("title", "미지정")
-            
-            # 해당 experiment_id의 청크들 필터링
-            experiment_chunks = [
-                chunk for chunk in _current_chunks 
-                if chunk.metadata.get("experiment_id") == experiment_id
-            ]
-            
-            # 검색된 청크가 없는 경우 fallback 처리
-            if not experiment_chunks:
-                experiment_elements.append({
-                    "experiment_id": experiment_id,
-                    "title": title,
-                    "equipment": ["해당 정보는 문서에서 확인되지 않았습니다."],
-                    "chemicals": ["해당 정보는 문서에서 확인되지 않았습니다."],
-                    "procedure_summary": "해당 정보는 문서에서 확인되지 않았습니다.",
-                    "risks": {
-                        "위험_조언": ["해당 정보는 문서에서 확인되지 않았습니다."],
-                        "주의사항": ["해당 정보는 문서에서 확인되지 않았습니다."],
-                        "안전수칙": ["해당 정보는 문서에서 확인되지 않았습니다."]
-                    },
-                    "overall_risk_level": "분석불가",
-                    "analysis_note": f"experiment_id={experiment_id}에서 청크를 찾을 수 없음"
-                })
-                continue
-            
-            # 검색된 청크들을 텍스트로 결합
-            context_text = "\n\n".join([
-                f"[청크 {i+1}]\n{chunk.page_content}" 
-                for i, chunk in enumerate(experiment_chunks[:10])  # 최대 10개
-            ])
-            
-            # 토큰 제한 고려
-            if len(context_text) > 12000:
-                context_text = context_text[:12000] + "\n\n[텍스트가 길어 일부 생략됨]"
-            
-            # LLM 프롬프트 구성
-            prompt = f"""
+    # LLM 프롬프트 구성
+    prompt = f"""
 당신은 실험 구성 요소 분석 전문가입니다.
 아래 실험 정보와 검색된 context를 바탕으로 사용 기구, 시약, 절차 요약, 위험 요소를 체계적으로 추출해주세요.
 
 **실험 정보:**
 - 실험 ID: {experiment_id}
-- 실험 제목: {title}
+- 실험 제목: {title or "(context에서 추출)"}
 - 검색된 청크 수: {len(experiment_chunks)}개
 
 **추출 지침:**
@@ -275,7 +130,7 @@ def extract_experiment_elements(experiment_data: str) -> str:
 **결과를 다음 JSON 형태로만 반환해주세요:**
 {{
     "experiment_id": "{experiment_id}",
-    "title": "{title}",
+    "title": "{title or '실험의 정확한 제목'}",
     "equipment": ["기구1", "기구2", "기구3"],
     "chemicals": ["시약1", "시약2", "시약3"],
     "procedure_summary": "실험 절차의 간략한 요약",
@@ -288,201 +143,170 @@ def extract_experiment_elements(experiment_data: str) -> str:
     "analysis_note": "추출 과정에서의 특이사항이나 제한사항"
 }}
 """
-            
-            try:
-                response = llm.invoke([HumanMessage(content=prompt)])
-                result_text = response.content.strip()
-                
-                # JSON 추출 및 파싱
-                json_text = ""
-                if "```json" in result_text:
-                    json_start = result_text.find("```json") + 7
-                    json_end = result_text.find("```", json_start)
-                    json_text = result_text[json_start:json_end].strip()
-                elif "{" in result_text and "}" in result_text:
-                    json_start = result_text.find("{")
-                    json_end = result_text.rfind("}") + 1
-                    json_text = result_text[json_start:json_end]
-                else:
-                    json_text = result_text
-                
-                parsed_exp = json.loads(json_text)
-                
-                # 필수 필드 검증 및 보완
-                required_fields = ["experiment_id", "title", "equipment", "chemicals", "procedure_summary", "risks", "overall_risk_level"]
-                for field in required_fields:
-                    if field not in parsed_exp:
-                        if field == "equipment":
-                            parsed_exp[field] = ["해당 정보는 문서에서 확인되지 않았습니다."]
-                        elif field == "chemicals":
-                            parsed_exp[field] = ["해당 정보는 문서에서 확인되지 않았습니다."]
-                        elif field == "procedure_summary":
-                            parsed_exp[field] = "해당 정보는 문서에서 확인되지 않았습니다."
-                        elif field == "risks":
-                            parsed_exp[field] = {
-                                "위험_조언": ["해당 정보는 문서에서 확인되지 않았습니다."],
-                                "주의사항": ["해당 정보는 문서에서 확인되지 않았습니다."],
-                                "안전수칙": ["해당 정보는 문서에서 확인되지 않았습니다."]
-                            }
-                        elif field == "overall_risk_level":
-                            parsed_exp[field] = "분석불가"
-                        elif field == "experiment_id":
-                            parsed_exp[field] = experiment_id
-                        elif field == "title":
-                            parsed_exp[field] = title
-                
-                # 빈 배열이나 빈 문자열 처리
-                if not parsed_exp.get("equipment") or parsed_exp["equipment"] == [""]:
-                    parsed_exp["equipment"] = ["해당 정보는 문서에서 확인되지 않았습니다."]
-                if not parsed_exp.get("chemicals") or parsed_exp["chemicals"] == [""]:
-                    parsed_exp["chemicals"] = ["해당 정보는 문서에서 확인되지 않았습니다."]
-                if not parsed_exp.get("procedure_summary") or parsed_exp["procedure_summary"].strip() == "":
-                    parsed_exp["procedure_summary"] = "해당 정보는 문서에서 확인되지 않았습니다."
-                
-                # risks 필드 검증
-                risks = parsed_exp.get("risks", {})
-                if not risks.get("위험_조언"):
-                    risks["위험_조언"] = ["해당 정보는 문서에서 확인되지 않았습니다."]
-                if not risks.get("주의사항"):
-                    risks["주의사항"] = ["해당 정보는 문서에서 확인되지 않았습니다."]
-                if not risks.get("안전수칙"):
-                    risks["안전수칙"] = ["해당 정보는 문서에서 확인되지 않았습니다."]
-                parsed_exp["risks"] = risks
-                
-                # overall_risk_level 검증
-                valid_levels = ["낮음", "중간", "높음", "분석불가"]
-                if parsed_exp.get("overall_risk_level") not in valid_levels:
-                    parsed_exp["overall_risk_level"] = "분석불가"
-                
-                if "analysis_note" not in parsed_exp:
-                    parsed_exp["analysis_note"] = f"{len(experiment_chunks)}개 청크에서 추출 완료"
-                
-                experiment_elements.append(parsed_exp)
-                
-            except json.JSONDecodeError as e:
-                # 파싱 실패 시 fallback 구조
-                experiment_elements.append({
-                    "experiment_id": experiment_id,
-                    "title": title,
-                    "equipment": ["JSON 파싱 실패로 추출 불가"],
-                    "chemicals": ["JSON 파싱 실패로 추출 불가"],
-                    "procedure_summary": f"JSON 파싱 실패: {str(e)}",
-                    "risks": {
-                        "위험_조언": ["JSON 파싱 실패로 위험 분석 불가"],
-                        "주의사항": ["실험 진행 시 기본 안전수칙을 준수하세요"],
-                        "안전수칙": ["보호장비를 착용하세요"]
-                    },
-                    "overall_risk_level": "분석불가",
-                    "analysis_note": f"LLM 응답의 JSON 파싱 실패: {str(e)}"
-                })
-                
-            except Exception as e:
-                experiment_elements.append({
-                    "experiment_id": experiment_id,
-                    "title": title,
-                    "equipment": ["LLM 처리 오류로 추출 불가"],
-                    "chemicals": ["LLM 처리 오류로 추출 불가"],
-                    "procedure_summary": f"LLM 처리 오류: {str(e)}",
-                    "risks": {
-                        "위험_조언": ["LLM 처리 오류로 위험 분석 불가"],
-                        "주의사항": ["실험 진행 시 기본 안전수칙을 준수하세요"],
-                        "안전수칙": ["보호장비를 착용하세요"]
-                    },
-                    "overall_risk_level": "분석불가",
-                    "analysis_note": f"LLM 호출 실패: {str(e)}"
-                })
-        
-        return json.dumps({
-            "total_experiments": len(experiment_elements),
-            "experiment_elements": experiment_elements
-        }, ensure_ascii=False)
+    
+    try:
+        response = llm.invoke([HumanMessage(content=prompt)])
+        result_text = response.content.strip()
+        
+        # JSON 추출 및 파싱
+        json_text = ""
+        if "```json" in result_text:
+            json_start = result_text.find("```json") + 7
+            json_end = result_text.find("```", json_start)
+            json_text = result_text[json_start:json_end].strip()
+        elif "{" in result_text and "}" in result_text:
+            json_start = result_text.find("{")
+            json_end = result_text.rfind("}") + 1
+            json_text = result_text[json_start:json_end]
+        else:
+            json_text = result_text
+        
+        parsed_exp = json.loads(json_text)
+        
+        # 필수 필드 검증 및 보완
+        required_fields = ["experiment_id", "title", "equipment", "chemicals", "procedure_summary", "risks", "overall_risk_level"]
+        for field in required_fields:
+            if field not in parsed_exp:
+                if field == "equipment":
+                    parsed_exp[field] = ["해당 정보는 문서에서 확인되지 않았습니다."]
+                elif field == "chemicals":
+                    parsed_exp[field] = ["해당 정보는 문서에서 확인되지 않았습니다."]
+                elif field == "procedure_summary":
+                    parsed_exp[field] = "해당 정보는 문서에서 확인되지 않았습니다."
+                elif field == "risks":
+                    parsed_exp[field] = {
+                        "위험_조언": ["해당 정보는 문서에서 확인되지 않았습니다."],
+                        "주의사항": ["해당 정보는 문서에서 확인되지 않았습니다."],
+                        "안전수칙": ["해당 정보는 문서에서 확인되지 않았습니다."]
+                    }
+                elif field == "overall_risk_level":
+                    parsed_exp[field] = "분석불가"
+                elif field == "experiment_id":
+                    parsed_exp[field] = experiment_id
+                elif field == "title":
+                    parsed_exp[field] = default_title
+        
+        # 빈 배열이나 빈 문자열 처리
+        if not parsed_exp.get("equipment") or parsed_exp["equipment"] == [""]:
+            parsed_exp["equipment"] = ["해당 정보는 문서에서 확인되지 않았습니다."]
+        if not parsed_exp.get("chemicals") or parsed_exp["chemicals"] == [""]:
+            parsed_exp["chemicals"] = ["해당 정보는 문서에서 확인되지 않았습니다."]
+        if not parsed_exp.get("procedure_summary") or parsed_exp["procedure_summary"].strip() == "":
+            parsed_exp["procedure_summary"] = "해당 정보는 문서에서 확인되지 않았습니다."
+        
+        # risks 필드 검증
+        risks = parsed_exp.get("risks", {})
+        if not risks.get("위험_조언"):
+            risks["위험_조언"] = ["해당 정보는 문서에서 확인되지 않았습니다."]
+        if not risks.get("주의사항"):
+            risks["주의사항"] = ["해당 정보는 문서에서 확인되지 않았습니다."]
+        if not risks.get("안전수칙"):
+            risks["안전수칙"] = ["해당 정보는 문서에서 확인되지 않았습니다."]
+        parsed_exp["risks"] = risks
+        
+        # overall_risk_level 검증
+        valid_levels = ["낮음", "중간", "높음", "분석불가"]
+        if parsed_exp.get("overall_risk_level") not in valid_levels:
+            parsed_exp["overall_risk_level"] = "분석불가"
+        
+        if "analysis_note" not in parsed_exp:
+            parsed_exp["analysis_note"] = f"{len(experiment_chunks)}개 청크에서 추출 완료"
+        
+        return parsed_exp
+        
+    except json.JSONDecodeError as e:
+        # 파싱 실패 시 fallback 구조
+        return {
+            "experiment_id": experiment_id,
+            "title": default_title,
+            "equipment": ["JSON 파싱 실패로 추출 불가"],
+            "chemicals": ["JSON 파싱 실패로 추출 불가"],
+            "procedure_summary": f"JSON 파싱 실패: {str(e)}",
+            "risks": {
+                "위험_조언": ["JSON 파싱 실패로 위험 분석 불가"],
+                "주의사항": ["실험 진행 시 기본 안전수칙을 준수하세요"],
+                "안전수칙": ["보호장비를 착용하세요"]
+            },
+            "overall_risk_level": "분석불가",
+            "analysis_note": f"LLM 응답의 JSON 파싱 실패: {str(e)}",
+            "analysis_failed": True
+        }
         
     except Exception as e:
-        return json.dumps({
-            "error": f"실험 구성 요소 추출 중 오류 발생: {str(e)}",
-            "experiment_elements": []
-        })
+        return {
+            "experiment_id": experiment_id,
+            "title": default_title,
+            "equipment": ["LLM 처리 오류로 추출 불가"],
+            "chemicals": ["LLM 처리 오류로 추출 불가"],
+            "procedure_summary": f"LLM 처리 오류: {str(e)}",
+            "risks": {
+                "위험_조언": ["LLM 처리 오류로 위험 분석 불가"],
+                "주의사항": ["실험 진행 시 기본 안전수칙을 준수하세요"],
+                "안전수칙": ["보호장비를 착용하세요"]
+            },
+            "overall_risk_level": "분석불가",
+            "analysis_note": f"LLM 호출 실패: {str(e)}",
+            "analysis_failed": True
+        }
 
-@tool
-def analyze_risks(experiment_elements: str) -> str:
+def analyze_experiment_risks(exp: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    추출된 구성 요소를 바탕으로 실험 하나의 위험 요소를 분류하고 위험도를 평가합니다.
+    이미 유효한 위험 정보가 있으면 LLM을 다시 호출하지 않습니다.
     """
-    실험별로 위험 요소를 분석하고 위험조언/주의사항/안전수칙으로 분류하는 도구입니다.
+    exp_id = exp.get("experiment_id", "unknown")
+    title = exp.get("title", "미지정")
+    equipment = exp.get("equipment", [])
+    chemicals = exp.get("chemicals", [])
+    procedure_summary = exp.get("procedure_summary", "")
+    existing_risks = exp.get("risks", {})
+    existing_risk_level = exp.get("overall_risk_level", "분석불가")
     
-    Args:
-        experiment_elements: extract_experiment_elements에서 반환된 JSON
+    # 이미 추출된 위험 정보가 있고 유효한 경우 그대로 사용
+    if (existing_risks and 
+        existing_risks.get("위험_조언") and 
+        existing_risks.get("주의사항") and 
+        existing_risks.get("안전수칙") and
+        not any("해당 정보는 문서에서 확인되지 않았습니다" in str(risk_list) 
+               for risk_list in existing_risks.values())):
+        
+        return {
+            "experiment_id": exp_id,
+            "title": title,
+            "equipment": equipment,
+            "chemicals": chemicals,
+            "procedure_summary": procedure_summary,
+            "risks": existing_risks,
+            "overall_risk_level": existing_risk_level
+        }
     
-    Returns:
-        실험별 위험 분석이 포함된 최종 JSON (사용자 요구 형태)
-    """
-    try:
-        # 입력 데이터 파싱
-        elements_data = json.loads(experiment_elements)
-        experiments = elements_data.get("experiment_elements", [])
-        # 각 실험별로 위험 분석 실행
-        if not experiments:
-            return json.dumps({
-                "error": "실험 구성 요소 데이터를 찾을 수 없습니다.",
-                "experiments": []
-            })
-        
-        analyzed_experiments = []
-        
-        for exp in experiments:
-            exp_id = exp.get("experiment_id", "unknown")
-            title = exp.get("title", "미지정")
-            equipment = exp.get("equipment", [])
-            chemicals = exp.get("chemicals", [])
-            procedure_summary = exp.get("procedure_summary", "")
-            existing_risks = exp.get("risks", {})
-            existing_risk_level = exp.get("overall_risk_level", "분석불가")
-            
-            # 이미 추출된 위험 정보가 있고 유효한 경우 그대로 사용
-            if (existing_risks and 
-                existing_risks.get("위험_조언") and 
-                existing_risks.get("주의사항") and 
-                existing_risks.get("안전수칙") and
-                not any("해당 정보는 문서에서 확인되지 않았습니다" in str(risk_list) 
-                       for risk_list in existing_risks.values())):
-                
-                analyzed_experiments.append({
-                    "experiment_id": exp_id,
-                    "title": title,
-                    "equipment": equipment,
-                    "chemicals": chemicals,
-                    "procedure_summary": procedure_summary,
-                    "risks": existing_risks,
-                    "overall_risk_level": existing_risk_level
-                })
-                continue
-            
-            # 구성 요소가 모두 비어있거나 오류 메시지인 경우 기본 분석
-            equipment_valid = equipment and not any("해당 정보는 문서에서 확인되지 않았습니다" in str(eq) or 
-                                                   "추출 불가" in str(eq) for eq in equipment)
-            chemicals_valid = chemicals and not any("해당 정보는 문서에서 확인되지 않았습니다" in str(ch) or 
-                                                   "추출 불가" in str(ch) for ch in chemicals)
-            procedure_valid = procedure_summary and "해당 정보는 문서에서 확인되지 않았습니다" not in procedure_summary and "추출 불가" not in procedure_summary
-            
-            if not equipment_valid and not chemicals_valid and not procedure_valid:
-                analyzed_experiments.append({
-                    "experiment_id": exp_id,
-                    "title": title,
-                    "equipment": equipment,
-                    "chemicals": chemicals,
-                    "procedure_summary": procedure_summary,
-                    "risks": {
-                        "위험_조언": ["실험 데이터 부족으로 인한 일반적 주의사항: 모든 실험에서 기본 안전수칙을 준수하세요"],
-                        "주의사항": ["실험 진행 전 안전 매뉴얼을 반드시 확인하세요"],
-                        "안전수칙": ["보호장비(보안경, 장갑, 실험복) 착용 필수"]
-                    },
-                    "overall_risk_level": "분석불가"
-                })
-                continue
-            
-            # 유효한 구성 요소가 있는 경우 LLM으로 위험 분석 수행
-            equipment_text = ", ".join([str(eq) for eq in equipment if eq and "해당 정보는 문서에서 확인되지 않았습니다" not in str(eq)])
-            chemicals_text = ", ".join([str(ch) for ch in chemicals if ch and "해당 정보는 문서에서 확인되지 않았습니다" not in str(ch)])
-            
-            prompt = f"""
+    # 구성 요소가 모두 비어있거나 오류 메시지인 경우 기본 분석
+    equipment_valid = equipment and not any("해당 정보는 문서에서 확인되지 않았습니다" in str(eq) or 
+                                           "추출 불가" in str(eq) for eq in equipment)
+    chemicals_valid = chemicals and not any("해당 정보는 문서에서 확인되지 않았습니다" in str(ch) or 
+                                           "추출 불가" in str(ch) for ch in chemicals)
+    procedure_valid = procedure_summary and "해당 정보는 문서에서 확인되지 않았습니다" not in procedure_summary and "추출 불가" not in procedure_summary
+    
+    if not equipment_valid and not chemicals_valid and not procedure_valid:
+        return {
+            "experiment_id": exp_id,
+            "title": title,
+            "equipment": equipment,
+            "chemicals": chemicals,
+            "procedure_summary": procedure_summary,
+            "risks": {
+                "위험_조언": ["실험 데이터 부족으로 인한 일반적 주의사항: 모든 실험에서 기본 안전수칙을 준수하세요"],
+                "주의사항": ["실험 진행 전 안전 매뉴얼을 반드시 확인하세요"],
+                "안전수칙": ["보호장비(보안경, 장갑, 실험복) 착용 필수"]
+            },
+            "overall_risk_level": "분석불가"
+        }
+    
+    # 유효한 구성 요소가 있는 경우 LLM으로 위험 분석 수행
+    equipment_text = ", ".join([str(eq) for eq in equipment if eq and "해당 정보는 문서에서 확인되지 않았습니다" not in str(eq)])
+    chemicals_text = ", ".join([str(ch) for ch in chemicals if ch and "해당 정보는 문서에서 확인되지 않았습니다" not in str(ch)])
+    
+    prompt = f"""
 당신은 실험실 안전 전문가입니다. 
 아래 실험의 구성 요소를 분석하여 위험 요소를 추출하고 분류하며, 전체적인 위험도를 평가해주세요.
 
@@ -530,189 +354,208 @@ def analyze_risks(experiment_elements: str) -> str:
     }}
 }}
 """
-            
-            try:
-                response = llm.invoke([HumanMessage(content=prompt)])
-                result_text = response.content.strip()
-                
-                # JSON 추출 및 파싱
-                if "```json" in result_text:
-                    json_start = result_text.find("```json") + 7
-                    json_end = result_text.find("```", json_start)
-                    json_text = result_text[json_start:json_end].strip()
-                elif "{" in result_text and "}" in result_text:
-                    json_start = result_text.find("{")
-                    json_end = result_text.rfind("}") + 1
-                    json_text = result_text[json_start:json_end]
-                else:
-                    json_text = result_text
-                
-                parsed_risk = json.loads(json_text)
-                
-                # 필수 필드 검증 및 보완
-                if "overall_risk_level" not in parsed_risk:
-                    # 기본 위험도 평가 로직
-                    if any("독성" in str(ch) or "부식" in str(ch) or "폭발" in str(ch) or "산" in str(ch) for ch in chemicals):
-                        parsed_risk["overall_risk_level"] = "높음"
-                    elif chemicals_valid or any("가열" in procedure_summary or "산" in procedure_summary):
-                        parsed_risk["overall_risk_level"] = "중간"
-                    else:
-                        parsed_risk["overall_risk_level"] = "낮음"
-                
-                # overall_risk_level 값 검증
-                valid_levels = ["낮음", "중간", "높음", "분석불가"]
-                if parsed_risk.get("overall_risk_level") not in valid_levels:
-                    parsed_risk["overall_risk_level"] = "분석불가"
-                
-                # 위험 정보가 비어있는 경우 기본값 설정
-                if not parsed_risk.get("risks"):
-                    parsed_risk["risks"] = {}
-                
-                risks = parsed_risk["risks"]
-                if not risks.get("위험_조언"):
-                    risks["위험_조언"] = ["해당 정보는 문서에서 확인되지 않았습니다"]
-                if not risks.get("주의사항"):
-                    risks["주의사항"] = ["실험 진행 시 기본 안전수칙을 준수하세요"]
-                if not risks.get("안전수칙"):
-                    risks["안전수칙"] = ["보호장비(보안경, 장갑, 실험복) 착용 필수"]
-                
-                # 필수 필드 보완
-                parsed_risk["experiment_id"] = exp_id
-                parsed_risk["title"] = title
-                parsed_risk["equipment"] = equipment
-                parsed_risk["chemicals"] = chemicals
-                parsed_risk["procedure_summary"] = procedure_summary
-                
-                analyzed_experiments.append(parsed_risk)
-                
-            except json.JSONDecodeError as e:
-                # 파싱 실패 시 기본 위험 분석
-                basic_analysis = {
-                    "experiment_id": exp_id,
-                    "title": title,
-                    "equipment": equipment,
-                    "chemicals": chemicals,
-                    "procedure_summary": procedure_summary,
-                    "overall_risk_level": "중간",  # 기본값
-                    "risks": {
-                        "위험_조언": [f"JSON 파싱 실패로 위험 분석 불가: {str(e)}"],
-                        "주의사항": ["실험 진행 시 기본 안전수칙을 준수하세요"],
-                        "안전수칙": ["보호장비를 착용하세요"]
-                    }
-                }
-                analyzed_experiments.append(basic_analysis)
-                
-            except Exception as e:
-                error_analysis = {
-                    "experiment_id": exp_id,
-                    "title": title,
-                    "equipment": equipment,
-                    "chemicals": chemicals,
-                    "procedure_summary": procedure_summary,
-                    "overall_risk_level": "분석불가",  # 오류 시 분석불가
-                    "risks": {
-                        "위험_조언": [f"LLM 처리 오류로 위험 분석 불가: {str(e)}"],
-                        "주의사항": ["실험 진행 시 기본 안전수칙을 준수하세요"],
-                        "안전수칙": ["보호장비를 착용하세요"]
-                    }
-                }
-                analyzed_experiments.append(error_analysis)
-        
-        return json.dumps({
-            "total_experiments": len(analyzed_experiments),
-            "experiments": analyzed_experiments
-        }, ensure_ascii=False)
-        
-    except Exception as e:
-        return json.dumps({
-            "error": f"위험 분석 중 오류 발생: {str(e)}",
-            "experiments": []
-        })
-
-def create_experiment_analysis_agent():
-    """실험 분석용 React Agent를 생성합니다."""
-    tools = [extract_experiments, extract_experiment_elements, analyze_risks]
-    
-    system_message = """
-당신은 실험 매뉴얼을 실험 단위로 분석하고 위험도를 평가하는 전문 Agent입니다.
-
-**분석 절차:**
-1. `extract_experiments`: 전체 매뉴얼에서 실험 단위들을 식별하고 분리
-2. `extract_experiment_elements`: 각 실험의 사용 기구, 시약, 절차를 추출
-3. `analyze_risks`: 각 구성 요소의 위험 요소를 분석하고 위험도를 평가
-
-**중요한 지침:**
-- 반드시 순서대로 도구를 사용하세요
-- 각 단계의 결과를 다음 단계의 입력으로 활용하세요
-- 한국어로 응답해주세요
-- 벡터 검색 기반 문서 분석 결과를 활용하세요
-- 위험도 평가는 정확하고 실용적이어야 합니다
-- 최종 결과는 실험실 안전에 직접 활용할 수 있어야 합니다
-"""
-    
-    agent = create_react_agent(llm, tools, prompt=system_message)
-    return agent
-
-def analyze_experiments_sync(manual_id: str) -> Dict[str, Any]:
-    """실험 분석 함수 (MCP 없이 일반 벡터 검색 사용)"""
-    global _current_chunks
     
     try:
-        _current_chunks = load_manual_chunks(manual_id)
-        if not _current_chunks:
-            return {
-                "success": False,
-                "error": "해당 manual_id의 문서를 찾을 수 없습니다.",
-                "experiments": []
-            }
-        
-        # React Agent 생성 및 실행
-        agent = create_experiment_analysis_agent()
+        response = llm.invoke([HumanMessage(content=prompt)])
+        result_text = response.content.strip()
         
-        query = f"manual_id='{manual_id}'인 매뉴얼을 experiment_id 기반으로 실험별 분석해주세요."
+        # JSON 추출 및 파싱
+        if "```json" in result_text:
+            json_start = result_text.find("```json") + 7
+            json_end = result_text.find("```", json_start)
+            json_text = result_text[json_start:json_end].strip()
+        elif "{" in result_text and "}" in result_text:
+            json_start = result_text.find("{")
+            json_end = result_text.rfind("}") + 1
+            json_text = result_text[json_start:json_end]
+        else:
+            json_text = result_text
         
-        # 동기 방식으로 Agent 실행
-        result = agent.invoke({"messages": [HumanMessage(content=query)]})
+        parsed_risk = json.loads(json_text)
         
-        total_chunks = len(_current_chunks)
+        # 필수 필드 검증 및 보완
+        if "overall_risk_level" not in parsed_risk:
+            # 기본 위험도 평가 로직
+            if any("독성" in str(ch) or "부식" in str(ch) or "폭발" in str(ch) or "산" in str(ch) for ch in chemicals):
+                parsed_risk["overall_risk_level"] = "높음"
+            elif chemicals_valid or any("가열" in procedure_summary or "산" in procedure_summary):
+                parsed_risk["overall_risk_level"] = "중간"
+            else:
+                parsed_risk["overall_risk_level"] = "낮음"
+        
+        # overall_risk_level 값 검증
+        valid_levels = ["낮음", "중간", "높음", "분석불가"]
+        if parsed_risk.get("overall_risk_level") not in valid_levels:
+            parsed_risk["overall_risk_level"] = "분석불가"
+        
+        # 위험 정보가 비어있는 경우 기본값 설정
+        if not parsed_risk.get("risks"):
+            parsed_risk["risks"] = {}
+        
+        risks = parsed_risk["risks"]
+        if not risks.get("위험_조언"):
+            risks["위험_조언"] = ["해당 정보는 문서에서 확인되지 않았습니다"]
+        if not risks.get("주의사항"):
+            risks["주의사항"] = ["실험 진행 시 기본 안전수칙을 준수하세요"]
+        if not risks.get("안전수칙"):
+            risks["안전수칙"] = ["보호장비(보안경, 장갑, 실험복) 착용 필수"]
+        
+        # 필수 필드 보완
+        parsed_risk["experiment_id"] = exp_id
+        parsed_risk["title"] = title
+        parsed_risk["equipment"] = equipment
+        parsed_risk["chemicals"] = chemicals
+        parsed_risk["procedure_summary"] = procedure_summary
+        
+        return parsed_risk
+        
+    except json.JSONDecodeError as e:
+        # 파싱 실패 시 기본 위험 분석
+        basic_analysis = {
+            "experiment_id": exp_id,
+            "title": title,
+            "equipment": equipment,
+            "chemicals": chemicals,
+            "procedure_summary": procedure_summary,
+            "overall_risk_level": "중간",  # 기본값
+            "risks": {
+                "위험_조언": [f"JSON 파싱 실패로 위험 분석 불가: {str(e)}"],
+                "주의사항": ["실험 진행 시 기본 안전수칙을 준수하세요"],
+                "안전수칙": ["보호장비를 착용하세요"]
+            },
+            "analysis_failed": True
+        }
+        return basic_analysis
         
+    except Exception as e:
+        error_analysis = {
+            "experiment_id": exp_id,
+            "title": title,
+            "equipment": equipment,
+            "chemicals": chemicals,
+            "procedure_summary": procedure_summary,
+            "overall_risk_level": "분석불가",  # 오류 시 분석불가
+            "risks": {
+                "위험_조언": [f"LLM 처리 오류로 위험 분석 불가: {str(e)}"],
+                "주의사항": ["실험 진행 시 기본 안전수칙을 준수하세요"],
+                "안전수칙": ["보호장비를 착용하세요"]
+            },
+            "analysis_failed": True
+        }
+        return error_analysis
+
+def analyze_experiment(experiment_id: str, experiment_chunks: List[Document]) -> Dict[str, Any]:
+    """
+    실험 하나를 구성 요소 추출 → 위험 분석 순서로 분석합니다.
+    """
+    elements = extract_experiment_elements(experiment_id, experiment_chunks)
+    if elements.get("analysis_failed"):
+        # 구성 요소 추출이 실패했으면 위험 분석도 의미가 없으므로 그대로 반환
+        return elements
+    return analyze_experiment_risks(elements)
+
+def analyze_manual_experiments(manual_id: str, max_concurrency: int = EXPERIMENT_ANALYSIS_MAX_CONCURRENCY) -> Dict[str, Any]:
+    """
+    매뉴얼 전체를 실험 단위로 분석합니다.
+    청크를 experiment_id별로 한 번 묶은 뒤, 실험별 분석을 최대 max_concurrency개까지 동시에 실행합니다.
+    결과는 실험 순서대로 반환됩니다.
+    """
+    chunks = load_manual_chunks(manual_id)
+    if not chunks:
         return {
-            "success": True,
+            "success": False,
             "manual_id": manual_id,
-            "processed_chunks": total_chunks,
-            "total_experiments": len(_current_chunks),
-            "experiment_ids": [chunk.metadata.get("experiment_id", "unknown") for chunk in _current_chunks],
-            "agent_response": result["messages"][-1].content if result.get("messages") else "",
+            "error": "해당 manual_id의 문서를 찾을 수 없습니다.",
             "experiments": []
         }
-        
+    
+    experiments_groups = group_chunks_by_experiment(chunks)
+    if not experiments_groups:
+        return {
+            "success": False,
+            "manual_id": manual_id,
+            "processed_chunks": len(chunks),
+            "error": "experiment_id가 지정된 청크를 찾을 수 없습니다.",
+            "experiments": []
+        }
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(experiments_groups)))) as executor:
+        experiments = list(executor.map(
+            lambda item: analyze_experiment(item[0], item[1]),
+            experiments_groups.items()
+        ))
+    
+    # LLM 오류로 기본값이 채워진 실험이 있으면 실패로 표시 (저장소에 캐시되지 않는다)
+    failed_experiments = [exp["experiment_id"] for exp in experiments if exp.get("analysis_failed")]
+    return {
+        "success": not failed_experiments,
+        "manual_id": manual_id,
+        "processed_chunks": len(chunks),
+        "total_experiments": len(experiments),
+        "experiment_ids": list(experiments_groups.keys()),
+        "agent_response": "",
+        "experiments": experiments,
+        "failed_experiments": failed_experiments,
+        "error": f"{len(failed_experiments)}개 실험 분석 실패: {failed_experiments}" if failed_experiments else None
+    }
+
+def analyze_experiments_sync(manual_id: str, refresh: bool = False) -> Dict[str, Any]:
+    """
+    매뉴얼 전체 실험 분석 함수
+    청크가 바뀌지 않았다면 저장된 결과(risk_analysis 테이블)를 반환합니다.
+    """
+    try:
+        return get_or_compute_analysis(
+            MANUAL_EXPERIMENTS,
+            manual_id,
+            lambda: analyze_manual_experiments(manual_id),
+            prompt_version=EXPERIMENT_ANALYSIS_PROMPT_VERSION,
+            is_success=lambda result: bool(result.get("success")) and not result.get("failed_experiments"),
+            refresh=refresh
+        )
     except Exception as e:
         return {
             "success": False,
+            "manual_id": manual_id,
             "error": f"실험 분석 중 오류 발생: {str(e)}",
             "experiments": []
         }
-    finally:
-        _current_chunks = []
 
-def analyze_single_experiment(manual_id: str, experiment_id: str) -> Dict[str, Any]:
+def analyze_single_experiment(manual_id: str, experiment_id: str, refresh: bool = False) -> Dict[str, Any]:
     """
     특정 실험 하나만 독립적으로 분석하는 함수
+    청크가 바뀌지 않았다면 저장된 결과(risk_analysis 테이블)를 반환합니다.
     
     Args:
         manual_id: 매뉴얼 ID
         experiment_id: 분석할 실험 ID
+        refresh: True이면 저장된 결과를 무시하고 다시 분석
     
     Returns:
         단일 실험의 위험 분석 결과
     """
+    return get_or_compute_analysis(
+        EXPERIMENT_RISKS,
+        manual_id,
+        lambda: _run_single_experiment_analysis(manual_id, experiment_id),
+        experiment_id=experiment_id,
+        prompt_version=EXPERIMENT_ANALYSIS_PROMPT_VERSION,
+        is_success=_is_complete_single_analysis,
+        refresh=refresh
+    )
+
+def _is_complete_single_analysis(result: Dict[str, Any]) -> bool:
+    # 필드가 빠져 기본값(분석불가)으로 채워진 결과는 저장하지 않는다
+    experiment = result.get("experiment")
+    if not result.get("success") or result.get("error") or not experiment:
+        return False
+    return experiment.get("overall_risk_level") != "분석불가"
+
+def _run_single_experiment_analysis(manual_id: str, experiment_id: str) -> Dict[str, Any]:
+    """단일 실험 분석을 실제로 수행합니다."""
     try:
         # ChromaDB 직접 접근
-        embeddings = OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY)
-        vectorstore = Chroma(
-            persist_directory=CHROMA_DIR,
-            embedding_function=embeddings
-        )
+        vectorstore = get_vectorstore()
         
         # 특정 experiment_id와 manual_id로 필터링
         exp_filter = {
@@ -879,3 +722,10 @@ def analyze_single_experiment(manual_id: str, experiment_id: str) -> Dict[str, A
             "experiment": None
         }
 
+async def aanalyze_experiments(manual_id: str, refresh: bool = False) -> Dict[str, Any]:
+    """analyze_experiments_sync의 비동기 버전 (공유 스레드 풀에서 실행)"""
+    return await run_blocking(analyze_experiments_sync, manual_id, refresh)
+
+async def aanalyze_single_experiment(manual_id: str, experiment_id: str, refresh: bool = False) -> Dict[str, Any]:
+    """analyze_single_experiment의 비동기 버전 (공유 스레드 풀에서 실행)"""
+    return await run_blocking(analyze_single_experiment, manual_id, experiment_id, refresh)
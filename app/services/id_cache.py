@@ -0,0 +1,116 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from app.core import metrics
+from app.db.database import SessionLocal
+from app.db.redis_conn import get_redis_conn
+from app.crud import user_crud, manuals_crud
+
+# 캐시 설정 (환경 변수로 조정 가능)
+ID_CACHE_LRU_SIZE = int(os.getenv("ID_CACHE_LRU_SIZE", 4096))
+ID_CACHE_TTL = int(os.getenv("ID_CACHE_TTL", 60 * 60 * 24))  # 1일
+ID_CACHE_MISSING_TTL = int(os.getenv("ID_CACHE_MISSING_TTL", 60))  # 없는 ID는 짧게 캐시
+ID_CACHE_REDIS_PREFIX = "id_cache"
+_MISSING = "none"  # DB에 없는 ID 표시
+
+
+class IdCache:
+    """
+    외부 식별자(manual_id 등)를 DB PK로 바꾼 결과를 프로세스 내 LRU + Redis에 캐시합니다.
+    DB에 없는 식별자도 짧은 TTL로 캐시하여 매 요청 DB 조회를 막습니다.
+    """
+
+    def __init__(self, kind: str, load: Callable[[str], Optional[int]]):
+        self.kind = kind
+        self.load = load
+        self._lru: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (pk, 만료 시각)
+        self._lock = threading.Lock()
+        self._redis = get_redis_conn()
+
+    def _redis_key(self, key: str) -> str:
+        return f"{ID_CACHE_REDIS_PREFIX}:{self.kind}:{key}"
+
+    def _lru_get(self, key: str):
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is None:
+                return None
+            if entry[1] < time.monotonic():
+                del self._lru[key]
+                return None
+            self._lru.move_to_end(key)
+            return entry
+
+    def _lru_put(self, key: str, pk: Optional[int], ttl: int):
+        with self._lock:
+            self._lru[key] = (pk, time.monotonic() + ttl)
+            self._lru.move_to_end(key)
+            while len(self._lru) > ID_CACHE_LRU_SIZE:
+                self._lru.popitem(last=False)
+
+    def resolve(self, key) -> Optional[int]:
+        """식별자에 해당하는 PK를 반환합니다. 없으면 None."""
+        if key is None:
+            return None
+        key = str(key)
+        entry = self._lru_get(key)
+        if entry is not None:
+            metrics.incr(f"id_cache.{self.kind}.lru_hit")
+            return entry[0]
+
+        try:
+            cached = self._redis.get(self._redis_key(key))
+        except Exception as e:
+            print(f"ID 캐시 Redis 조회 실패: {e}")
+            cached = None
+        if cached is not None:
+            metrics.incr(f"id_cache.{self.kind}.redis_hit")
+            pk = None if cached == _MISSING else int(cached)
+            self._lru_put(key, pk, ID_CACHE_TTL if pk is not None else ID_CACHE_MISSING_TTL)
+            return pk
+
+        metrics.incr(f"id_cache.{self.kind}.miss")
+        pk = self.load(key)
+        ttl = ID_CACHE_TTL if pk is not None else ID_CACHE_MISSING_TTL
+        self._lru_put(key, pk, ttl)
+        try:
+            self._redis.set(self._redis_key(key), _MISSING if pk is None else str(pk), ex=ttl)
+        except Exception as e:
+            print(f"ID 캐시 Redis 저장 실패: {e}")
+        return pk
+
+    def invalidate(self, key):
+        """식별자의 캐시를 삭제합니다. (삭제/생성 시)"""
+        key = str(key)
+        with self._lock:
+            self._lru.pop(key, None)
+        try:
+            self._redis.delete(self._redis_key(key))
+        except Exception as e:
+            print(f"ID 캐시 Redis 삭제 실패: {e}")
+
+
+def _load_user_pk(user_id: str) -> Optional[int]:
+    db = SessionLocal()
+    try:
+        user = user_crud.get_user_by_id(db, user_id=user_id)
+        return user.id if user else None
+    finally:
+        db.close()
+
+
+def _load_manual_pk(manual_id: str) -> Optional[int]:
+    db = SessionLocal()
+    try:
+        manual = manuals_crud.get_manual_by_manual_id(db, manual_id=manual_id)
+        return manual.id if manual else None
+    finally:
+        db.close()
+
+
+# user_id -> users.id, manual_id -> manuals.id
+user_pk_cache = IdCache("user", _load_user_pk)
+manual_pk_cache = IdCache("manual", _load_manual_pk)
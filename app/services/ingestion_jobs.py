@@ -0,0 +1,398 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import socket
+import asyncio
+from typing import Dict, List, Optional
+from langchain_core.documents import Document
+
+from app.core import metrics
+from app.db.database import SessionLocal
+from app.db.redis_conn import get_redis_conn
+from app.crud import manuals_crud
+from app.services.analysis_store import invalidate_manual_analyses
+from app.services.answer_cache import answer_cache
+from app.services.id_cache import manual_pk_cache
+from app.services.manual_rag import (
+    compute_content_hash,
+    find_ingested_manual_id,
+    clone_manual_chunks,
+    build_base_metadata,
+    parse_pdf_chunks,
+    extract_vision_docs,
+    segment_documents,
+    embed_and_store_documents,
+    build_ingest_result
+)
+
+# 작업 상태/체크포인트 저장 위치
+INGEST_JOB_DIR = os.getenv("INGEST_JOB_DIR", "./ingest_jobs")
+INGEST_JOB_LOCK_TTL = int(os.getenv("INGEST_JOB_LOCK_TTL", 60 * 30))  # 30분
+
+# 단계 순서: queued → parsed → vision_done → segmented → embedded
+STAGES = ["queued", "parsed", "vision_done", "segmented", "embedded"]
+FAILED = "failed"
+
+# 실행 중인 작업 task 참조 (GC 방지)
+_running_tasks: Dict[str, asyncio.Task] = {}
+
+
+# =====================
+# 파일 기반 상태 저장
+# =====================
+def _job_dir(job_id: str) -> str:
+    return os.path.join(INGEST_JOB_DIR, job_id)
+
+def _job_path(job_id: str, name: str) -> str:
+    return os.path.join(_job_dir(job_id), name)
+
+def _write_json(path: str, data) -> None:
+    # 중간에 프로세스가 죽어도 파일이 깨지지 않도록 임시 파일에 쓴 뒤 교체
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def _read_json(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _dump_docs(docs: List[Document]) -> List[dict]:
+    return [{"page_content": doc.page_content, "metadata": doc.metadata} for doc in docs]
+
+def _load_docs(data: List[dict]) -> List[Document]:
+    return [Document(page_content=item["page_content"], metadata=item["metadata"]) for item in data]
+
+def get_job(job_id: str) -> Optional[dict]:
+    """
+    작업 상태를 반환합니다. 없으면 None.
+    """
+    path = _job_path(job_id, "job.json")
+    if not os.path.exists(path):
+        return None
+    return _read_json(path)
+
+def _save_job(job: dict) -> None:
+    job["updated_at"] = int(time.time())
+    _write_json(_job_path(job["job_id"], "job.json"), job)
+
+
+# =====================
+# 작업 잠금 (여러 워커가 같은 작업을 동시에 재개하지 않도록)
+# =====================
+# 잠금 값(소유자 토큰)이 일치할 때만 갱신/해제/인수한다
+_REFRESH_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+_TAKEOVER_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('set', KEYS[1], ARGV[2], 'EX', ARGV[3])
+end
+return nil
+"""
+
+_owner_token: Optional[str] = None
+_owner_pid: Optional[int] = None
+
+def _lock_owner() -> str:
+    """
+    이 프로세스의 잠금 소유자 토큰 (호스트:pid:난수).
+    fork 이후에는 pid가 바뀌므로 프로세스마다 새로 만든다.
+    """
+    global _owner_token, _owner_pid
+    if _owner_token is None or _owner_pid != os.getpid():
+        _owner_pid = os.getpid()
+        _owner_token = f"{socket.gethostname()}:{_owner_pid}:{uuid.uuid4().hex[:8]}"
+    return _owner_token
+
+def _lock_key(job_id: str) -> str:
+    return f"ingest_job_lock:{job_id}"
+
+def _acquire_lock(job_id: str) -> bool:
+    try:
+        return bool(get_redis_conn().set(_lock_key(job_id), _lock_owner(), nx=True, ex=INGEST_JOB_LOCK_TTL))
+    except Exception as e:
+        # Redis가 없으면 단일 프로세스로 보고 그대로 진행
+        print(f"작업 잠금 획득 실패 (잠금 없이 진행): {e}")
+        return True
+
+def _refresh_lock(job_id: str) -> None:
+    try:
+        get_redis_conn().eval(_REFRESH_SCRIPT, 1, _lock_key(job_id), _lock_owner(), INGEST_JOB_LOCK_TTL)
+    except Exception:
+        pass
+
+def _release_lock(job_id: str) -> None:
+    try:
+        get_redis_conn().eval(_RELEASE_SCRIPT, 1, _lock_key(job_id), _lock_owner())
+    except Exception:
+        pass
+
+def _is_stale_owner(owner: str) -> bool:
+    """
+    같은 호스트에서 이미 종료된 프로세스(또는 재시작 전의 이 프로세스)가 잡고 있는 잠금인지 확인합니다.
+    다른 호스트의 잠금은 알 수 없으므로 TTL 만료를 기다립니다.
+    """
+    try:
+        host, pid, _ = owner.rsplit(":", 2)
+        pid = int(pid)
+    except ValueError:
+        return False
+    if host != socket.gethostname():
+        return False
+    if pid == os.getpid():
+        return owner != _lock_owner()
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        return False
+    return False
+
+def _take_over_stale_lock(job_id: str) -> bool:
+    """크래시한 프로세스가 남긴 잠금을 이 프로세스로 인수합니다."""
+    try:
+        redis_conn = get_redis_conn()
+        owner = redis_conn.get(_lock_key(job_id))
+    except Exception:
+        # Redis가 없으면 잠금 없이 진행하는 _acquire_lock 동작을 따른다
+        return _acquire_lock(job_id)
+    try:
+        if owner is None:
+            return _acquire_lock(job_id)
+        if not _is_stale_owner(owner):
+            return False
+        taken = redis_conn.eval(_TAKEOVER_SCRIPT, 1, _lock_key(job_id), owner, _lock_owner(), INGEST_JOB_LOCK_TTL)
+        if taken:
+            print(f"🔓 종료된 프로세스({owner})의 수집 작업 잠금 인수: {job_id}")
+        return bool(taken)
+    except Exception as e:
+        print(f"작업 잠금 인수 실패 ({job_id}): {e}")
+        return False
+
+
+# =====================
+# 상태 변경
+# =====================
+def _update_manual_status(manual_id: str, status: str) -> None:
+    db = SessionLocal()
+    try:
+        manuals_crud.update_manual_status(db, manual_id, status)
+    except Exception as e:
+        print(f"Manual 상태 갱신 실패 ({manual_id} → {status}): {e}")
+    finally:
+        db.close()
+
+def _advance(job: dict, stage: str, **fields) -> None:
+    job["stage"] = stage
+    job["progress"] = round(STAGES.index(stage) / (len(STAGES) - 1), 2)
+    job.update(fields)
+    _save_job(job)
+    _refresh_lock(job["job_id"])
+    _update_manual_status(job["manual_id"], stage)
+    print(f"📦 수집 작업 {job['job_id']}: {stage}")
+
+
+# =====================
+# 작업 생성 / 실행
+# =====================
+def create_ingestion_job(content: bytes, filename: str, manual_type: str = "UNKNOWN", user_id: int = None) -> dict:
+    """
+    업로드된 PDF를 작업 디렉터리에 저장하고 작업을 등록합니다.
+    job_id는 새로 만들어질 manual_id와 같습니다.
+    """
+    job_id = str(uuid.uuid4())
+    os.makedirs(_job_dir(job_id), exist_ok=True)
+    with open(_job_path(job_id, "source.pdf"), "wb") as f:
+        f.write(content)
+    job = {
+        "job_id": job_id,
+        "manual_id": job_id,
+        "filename": filename,
+        "manual_type": manual_type,
+        "user_id": user_id,
+        "content_hash": compute_content_hash(content),
+        "stage": "queued",
+        "status": "pending",
+        "progress": 0.0,
+        "error": None,
+        "result": None,
+        "created_at": int(time.time())
+    }
+    _save_job(job)
+    return job
+
+def _is_reusable_source(manual_id: str) -> bool:
+    # 삭제된 매뉴얼(벡터DB 삭제가 실패해 남은 청크)이나 다른 수집 작업이 아직 진행 중인 매뉴얼의 청크는 재사용하지 않는다
+    if manual_pk_cache.resolve(manual_id) is None:
+        return False
+    source_job = get_job(manual_id)
+    return source_job is None or source_job.get("status") == "done"
+
+async def run_ingestion_job(job_id: str) -> dict:
+    """
+    마지막으로 완료된 단계 다음부터 수집 작업을 실행합니다.
+    각 단계가 끝날 때마다 체크포인트를 저장하므로 중간에 중단돼도 이어서 실행할 수 있습니다.
+    """
+    job = await asyncio.to_thread(get_job, job_id)
+    if job is None:
+        raise ValueError(f"수집 작업 '{job_id}'을(를) 찾을 수 없습니다.")
+
+    manual_id = job["manual_id"]
+    pdf_path = _job_path(job_id, "source.pdf")
+    base_meta = build_base_metadata(manual_id, job["manual_type"], job["filename"], job["user_id"], job["content_hash"])
+    job["status"] = "running"
+    job["error"] = None
+    await asyncio.to_thread(_save_job, job)
+    started = time.perf_counter()
+
+    try:
+        if job["stage"] == "queued":
+            # 동일한 파일이 이미 임베딩되어 있으면 청크를 복제하고 바로 완료
+            source_manual_id = await asyncio.to_thread(
+                find_ingested_manual_id, job["content_hash"], exclude_manual_id=manual_id
+            )
+            if source_manual_id and await asyncio.to_thread(_is_reusable_source, source_manual_id):
+                cloned = await asyncio.to_thread(
+                    clone_manual_chunks, source_manual_id, manual_id, job["manual_type"], job["filename"], job["user_id"]
+                )
+                if cloned:
+                    await asyncio.to_thread(invalidate_manual_analyses, manual_id)
+                    await asyncio.to_thread(answer_cache.invalidate, manual_id)
+                    await asyncio.to_thread(_advance, job, "embedded", status="done", result=cloned)
+                    return job
+
+            pdf_chunks, vision_pages = await asyncio.to_thread(parse_pdf_chunks, pdf_path, base_meta)
+            await asyncio.to_thread(_write_json, _job_path(job_id, "parsed.json"), {
+                "pdf_chunks": _dump_docs(pdf_chunks),
+                "vision_pages": vision_pages
+            })
+            await asyncio.to_thread(_advance, job, "parsed")
+
+        if job["stage"] == "parsed":
+            parsed = await asyncio.to_thread(_read_json, _job_path(job_id, "parsed.json"))
+            vision_docs, vision_report = await asyncio.to_thread(
+                extract_vision_docs, pdf_path, parsed["vision_pages"], base_meta, len(parsed["pdf_chunks"])
+            )
+            await asyncio.to_thread(_write_json, _job_path(job_id, "vision.json"), {
+                "vision_docs": _dump_docs(vision_docs),
+                "vision_report": vision_report
+            })
+            await asyncio.to_thread(_advance, job, "vision_done")
+
+        if job["stage"] == "vision_done":
+            parsed = await asyncio.to_thread(_read_json, _job_path(job_id, "parsed.json"))
+            vision = await asyncio.to_thread(_read_json, _job_path(job_id, "vision.json"))
+            all_docs = _load_docs(parsed["pdf_chunks"]) + _load_docs(vision["vision_docs"])
+            all_docs, experiment_ids = await asyncio.to_thread(segment_documents, all_docs, manual_id)
+            await asyncio.to_thread(_write_json, _job_path(job_id, "segmented.json"), {
+                "docs": _dump_docs(all_docs),
+                "experiment_ids": experiment_ids
+            })
+            await asyncio.to_thread(_advance, job, "segmented")
+
+        if job["stage"] == "segmented":
+            parsed = await asyncio.to_thread(_read_json, _job_path(job_id, "parsed.json"))
+            vision = await asyncio.to_thread(_read_json, _job_path(job_id, "vision.json"))
+            segmented = await asyncio.to_thread(_read_json, _job_path(job_id, "segmented.json"))
+            all_docs = _load_docs(segmented["docs"])
+            embedding_batches = await embed_and_store_documents(all_docs, manual_id)
+            # 청크가 새로 저장됐으므로 이전 분석 결과와 캐시된 답변은 무효화
+            await asyncio.to_thread(invalidate_manual_analyses, manual_id)
+            await asyncio.to_thread(answer_cache.invalidate, manual_id)
+            result = build_ingest_result(
+                manual_id, parsed["pdf_chunks"], vision["vision_docs"], all_docs,
+                segmented["experiment_ids"], embedding_batches, vision.get("vision_report")
+            )
+            await asyncio.to_thread(_advance, job, "embedded", status="done", result=result)
+
+        return job
+
+    except Exception as e:
+        metrics.incr("ingest.job_failed")
+        job["status"] = FAILED
+        job["error"] = str(e)
+        await asyncio.to_thread(_save_job, job)
+        await asyncio.to_thread(_update_manual_status, manual_id, FAILED)
+        print(f"❌ 수집 작업 {job_id} 실패 (단계: {job['stage']}): {e}")
+        return job
+
+    finally:
+        metrics.observe("ingest.job", time.perf_counter() - started)
+        if job.get("status") == "done":
+            _cleanup_checkpoints(job_id)
+
+def _cleanup_checkpoints(job_id: str) -> None:
+    # 완료된 작업은 상태 파일(job.json)만 남기고 원본 PDF와 체크포인트를 삭제
+    for name in ["source.pdf", "parsed.json", "vision.json", "segmented.json"]:
+        try:
+            os.remove(_job_path(job_id, name))
+        except FileNotFoundError:
+            pass
+
+async def _run_locked(job_id: str) -> None:
+    try:
+        await run_ingestion_job(job_id)
+    finally:
+        _release_lock(job_id)
+        _running_tasks.pop(job_id, None)
+
+def start_ingestion_job(job_id: str, take_over_stale: bool = False) -> bool:
+    """
+    수집 작업을 백그라운드 task로 시작합니다. 다른 워커가 실행 중이면 False.
+    take_over_stale=True이면 종료된 프로세스가 남긴 잠금을 인수해 시작합니다.
+    """
+    if job_id in _running_tasks:
+        return False
+    acquired = _take_over_stale_lock(job_id) if take_over_stale else _acquire_lock(job_id)
+    if not acquired:
+        return False
+    _running_tasks[job_id] = asyncio.create_task(_run_locked(job_id))
+    return True
+
+def resume_ingestion_jobs() -> List[str]:
+    """
+    앱 시작 시 완료되지 않은 작업을 마지막 체크포인트부터 다시 시작합니다.
+    """
+    if not os.path.isdir(INGEST_JOB_DIR):
+        return []
+    resumed = []
+    for job_id in os.listdir(INGEST_JOB_DIR):
+        job = get_job(job_id)
+        if not job or job.get("status") in ("done", FAILED):
+            continue
+        if not os.path.exists(_job_path(job_id, "source.pdf")):
+            continue
+        if start_ingestion_job(job_id, take_over_stale=True):
+            resumed.append(job_id)
+    if resumed:
+        print(f"🔁 미완료 수집 작업 재개: {resumed}")
+    return resumed
+
+def retry_ingestion_job(job_id: str) -> bool:
+    """
+    실패한 작업 또는 실행하던 프로세스가 사라진 작업을 마지막으로 완료된 단계부터 다시 시작합니다.
+    실행 중인 작업은 잠금을 얻을 수 없으므로 다시 시작되지 않습니다.
+    """
+    job = get_job(job_id)
+    if not job or job.get("status") == "done":
+        return False
+    if job.get("status") != FAILED and not os.path.exists(_job_path(job_id, "source.pdf")):
+        return False
+    return start_ingestion_job(job_id, take_over_stale=True)
+
+def remove_ingestion_job(job_id: str) -> None:
+    """작업 디렉터리를 삭제합니다. (매뉴얼 삭제 시)"""
+    shutil.rmtree(_job_dir(job_id), ignore_errors=True)
@@ -5,15 +5,15 @@ from langchain_core.documents import Document
 from langchain_core.tools import tool
 from langchain_core.messages import HumanMessage
 from langchain_openai import ChatOpenAI
-from langchain_chroma import Chroma
-from langchain_openai import OpenAIEmbeddings
 from langgraph.prebuilt import create_react_agent
 from dotenv import load_dotenv
+from app.db.vector_store import get_vectorstore
+from app.services.analysis_store import get_or_compute_analysis, MANUAL_RISKS
+from app.core.executor import run_blocking
 
 load_dotenv()
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-CHROMA_DIR = "./chroma_db"
 
 if not OPENAI_API_KEY:
     raise RuntimeError("OPENAI_API_KEY not found in environment variables.")
@@ -25,19 +25,15 @@ llm = ChatOpenAI(
     openai_api_key=OPENAI_API_KEY
 )
 
-# 전역 변수로 청크 데이터를 저장
-_current_chunks: List[Document] = []
+# 프롬프트를 바꾸면 올려서 저장된 분석 결과를 무효화
+MANUAL_ANALYZE_PROMPT_VERSION = "1"
 
 def load_manual_chunks(manual_id: str) -> List[Document]:
     """
     벡터DB에서 특정 manual_id에 해당하는 모든 청크를 불러옵니다.
     """
     try:
-        embeddings = OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY)
-        vectorstore = Chroma(
-            persist_directory=CHROMA_DIR,
-            embedding_function=embeddings
-        )
+        vectorstore = get_vectorstore()
         
         # manual_id로 필터링하여 문서 검색
         docs = vectorstore.get(where={"manual_id": manual_id})
@@ -61,46 +57,45 @@ def load_manual_chunks(manual_id: str) -> List[Document]:
         print(f"❌ 청크 로딩 중 오류 발생: {str(e)}")
         return []
 
-@tool
-def extract_risk_chunks(manual_id: str, chunk_text_sample: str = "") -> str:
+def make_extract_risk_chunks_tool(chunks: List[Document]):
     """
-    청크에서 위험 관련 문장만 추출하는 도구입니다.
-    
-    Args:
-        manual_id: 분석할 매뉴얼 ID
-        chunk_text_sample: 샘플 텍스트 (optional)
-    
-    Returns:
-        JSON 형태의 위험 관련 문장 리스트
+    분석 요청마다 불러온 청크 목록을 클로저로 가진 extract_risk_chunks 도구를 만듭니다.
+    전역 상태를 쓰지 않으므로 여러 매뉴얼을 동시에 분석해도 결과가 섞이지 않습니다.
     """
-    global _current_chunks
-    
-    # 전역 변수에서 청크가 없으면 새로 로드
-    if not _current_chunks:
-        _current_chunks = load_manual_chunks(manual_id)
-    
-    if not _current_chunks:
-        return json.dumps({"error": "해당 manual_id의 문서를 찾을 수 없습니다.", "risk_sentences": []})
-    
-    # manual_id가 일치하는 청크만 필터링
-    relevant_chunks = [
-        chunk for chunk in _current_chunks 
-        if chunk.metadata.get("manual_id") == manual_id
-    ]
-    
-    if not relevant_chunks:
-        return json.dumps({"error": "해당 manual_id의 청크를 찾을 수 없습니다.", "risk_sentences": []})
-    
-    # 모든 청크의 텍스트를 합침 (토큰 제한을 고려하여 앞부분만)
-    combined_text = ""
-    chunk_count = 0
-    for chunk in relevant_chunks[:10]:  # 처음 10개 청크만 처리
-        combined_text += f"[청크 {chunk_count}]\n{chunk.page_content}\n\n"
-        chunk_count += 1
-        if len(combined_text) > 8000:  # 토큰 제한
-            break
-    
-    prompt = f"""
+    @tool
+    def extract_risk_chunks(manual_id: str, chunk_text_sample: str = "") -> str:
+        """
+        청크에서 위험 관련 문장만 추출하는 도구입니다.
+        
+        Args:
+            manual_id: 분석할 매뉴얼 ID
+            chunk_text_sample: 샘플 텍스트 (optional)
+        
+        Returns:
+            JSON 형태의 위험 관련 문장 리스트
+        """
+        if not chunks:
+            return json.dumps({"error": "해당 manual_id의 문서를 찾을 수 없습니다.", "risk_sentences": []})
+        
+        # manual_id가 일치하는 청크만 필터링
+        relevant_chunks = [
+            chunk for chunk in chunks 
+            if chunk.metadata.get("manual_id") == manual_id
+        ]
+        
+        if not relevant_chunks:
+            return json.dumps({"error": "해당 manual_id의 청크를 찾을 수 없습니다.", "risk_sentences": []})
+        
+        # 모든 청크의 텍스트를 합침 (토큰 제한을 고려하여 앞부분만)
+        combined_text = ""
+        chunk_count = 0
+        for chunk in relevant_chunks[:10]:  # 처음 10개 청크만 처리
+            combined_text += f"[청크 {chunk_count}]\n{chunk.page_content}\n\n"
+            chunk_count += 1
+            if len(combined_text) > 8000:  # 토큰 제한
+                break
+        
+        prompt = f"""
 당신은 실험 매뉴얼을 분석하여 **위험 요소를 식별하고, 숨겨진 위험성까지 추론하는 전문가**입니다.
 
 아래 실험 매뉴얼 텍스트를 검토하여 다음 두 가지를 모두 수행해주세요:
@@ -142,36 +137,38 @@ def extract_risk_chunks(manual_id: str, chunk_text_sample: str = "") -> str:
     ]
 }}
 """
-    
-    try:
-        response = llm.invoke([HumanMessage(content=prompt)])
-        result_text = response.content.strip()
         
-        # JSON 추출 시도
         try:
-            # JSON 블록이 있는 경우 추출
-            if "```json" in result_text:
-                json_start = result_text.find("```json") + 7
-                json_end = result_text.find("```", json_start)
-                json_text = result_text[json_start:json_end].strip()
-            elif "{" in result_text and "}" in result_text:
-                json_start = result_text.find("{")
-                json_end = result_text.rfind("}") + 1
-                json_text = result_text[json_start:json_end]
-            else:
-                json_text = result_text
+            response = llm.invoke([HumanMessage(content=prompt)])
+            result_text = response.content.strip()
             
-            # JSON 파싱 시도
-            parsed_result = json.loads(json_text)
-            return json.dumps(parsed_result, ensure_ascii=False)
-            
-        except json.JSONDecodeError:
-            # JSON 파싱 실패 시 기본 형태로 반환
-            sentences = [line.strip() for line in result_text.split('\n') if line.strip() and not line.startswith('{') and not line.startswith('}')]
-            return json.dumps({"risk_sentences": sentences[:10]}, ensure_ascii=False)  # 최대 10개만
-            
-    except Exception as e:
-        return json.dumps({"error": f"위험 문장 추출 중 오류 발생: {str(e)}", "risk_sentences": []})
+            # JSON 추출 시도
+            try:
+                # JSON 블록이 있는 경우 추출
+                if "```json" in result_text:
+                    json_start = result_text.find("```json") + 7
+                    json_end = result_text.find("```", json_start)
+                    json_text = result_text[json_start:json_end].strip()
+                elif "{" in result_text and "}" in result_text:
+                    json_start = result_text.find("{")
+                    json_end = result_text.rfind("}") + 1
+                    json_text = result_text[json_start:json_end]
+                else:
+                    json_text = result_text
+                
+                # JSON 파싱 시도
+                parsed_result = json.loads(json_text)
+                return json.dumps(parsed_result, ensure_ascii=False)
+                
+            except json.JSONDecodeError:
+                # JSON 파싱 실패 시 기본 형태로 반환
+                sentences = [line.strip() for line in result_text.split('\n') if line.strip() and not line.startswith('{') and not line.startswith('}')]
+                return json.dumps({"risk_sentences": sentences[:10]}, ensure_ascii=False)  # 최대 10개만
+                
+        except Exception as e:
+            return json.dumps({"error": f"위험 문장 추출 중 오류 발생: {str(e)}", "risk_sentences": []})
+    
+    return extract_risk_chunks
 
 @tool
 def classify_risk_texts(risk_sentences_json: str) -> str:
@@ -265,9 +262,9 @@ def classify_risk_texts(risk_sentences_json: str) -> str:
         }, ensure_ascii=False)
 
 # Agent 생성
-def create_risk_analysis_agent():
-    """React Agent를 생성합니다."""
-    tools = [extract_risk_chunks, classify_risk_texts]
+def create_risk_analysis_agent(chunks: List[Document]):
+    """분석 대상 청크를 가진 React Agent를 생성합니다."""
+    tools = [make_extract_risk_chunks_tool(chunks), classify_risk_texts]
     
     system_message = """
 당신은 실험 매뉴얼에서 위험 요소를 단계적으로 분석하는 전문 Agent입니다.
@@ -287,22 +284,40 @@ def create_risk_analysis_agent():
     agent = create_react_agent(llm, tools, prompt=system_message)
     return agent
 
-def analyze_manual_risks(manual_id: str) -> Dict[str, Any]:
+def analyze_manual_risks(manual_id: str, refresh: bool = False) -> Dict[str, Any]:
     """
     Manual ID에 대해 위험 분석을 수행합니다.
+    청크가 바뀌지 않았다면 저장된 결과(risk_analysis 테이블)를 반환합니다.
     
     Args:
         manual_id: 분석할 매뉴얼 ID
+        refresh: True이면 저장된 결과를 무시하고 다시 분석
         
     Returns:
         Dict[str, Any]: 분석 결과
     """
-    global _current_chunks
-    
+    return get_or_compute_analysis(
+        MANUAL_RISKS,
+        manual_id,
+        lambda: _run_manual_risk_analysis(manual_id),
+        prompt_version=MANUAL_ANALYZE_PROMPT_VERSION,
+        is_success=_has_risk_results,
+        summarize=lambda result: result.get("agent_응답"),
+        refresh=refresh
+    )
+
+def _has_risk_results(result: Dict[str, Any]) -> bool:
+    # 에이전트가 분류 결과를 내지 못해 결과가 비어 있으면 저장하지 않는다
+    if not result.get("success") or result.get("error"):
+        return False
+    return any(result.get("결과", {}).values())
+
+def _run_manual_risk_analysis(manual_id: str) -> Dict[str, Any]:
+    """React Agent로 위험 분석을 실제로 수행합니다."""
     try:
-        # 청크 로드
-        _current_chunks = load_manual_chunks(manual_id)
-        if not _current_chunks:
+        # 청크 로드 (요청마다 지역 변수로 유지)
+        chunks = load_manual_chunks(manual_id)
+        if not chunks:
             return {
                 "success": False,
                 "error": "해당 manual_id의 문서를 찾을 수 없습니다.",
@@ -314,7 +329,7 @@ def analyze_manual_risks(manual_id: str) -> Dict[str, Any]:
             }
         
         # Agent 생성 및 실행
-        agent = create_risk_analysis_agent()
+        agent = create_risk_analysis_agent(chunks)
         
         query = f"manual_id='{manual_id}'인 문서에서 위험 분석을 수행해주세요. 단계별로 위험 관련 문장을 추출하고 분류해주세요."
         
@@ -356,7 +371,7 @@ def analyze_manual_risks(manual_id: str) -> Dict[str, Any]:
         return {
             "success": True,
             "manual_id": manual_id,
-            "처리된_청크_수": len(_current_chunks),
+            "처리된_청크_수": len(chunks),
             "agent_응답": final_message,
             "결과": classified_result
         }
@@ -371,9 +386,10 @@ def analyze_manual_risks(manual_id: str) -> Dict[str, Any]:
                 "안전수칙": []
             }
         }
-    finally:
-        # 메모리 정리
-        _current_chunks = []
+
+async def aanalyze_manual_risks(manual_id: str, refresh: bool = False) -> Dict[str, Any]:
+    """analyze_manual_risks의 비동기 버전 (공유 스레드 풀에서 실행)"""
+    return await run_blocking(analyze_manual_risks, manual_id, refresh)
 
 # 예시 사용법
 if __name__ == "__main__":
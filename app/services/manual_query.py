@@ -1,9 +1,10 @@
 import os
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import OpenAIEmbeddings
 from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
 from langchain_core.documents import Document
+from app.db.vector_store import get_vectorstore
+from app.core.executor import run_blocking
+from app.services.answer_cache import answer_cache
 
 dotenv_path = os.getenv("DOTENV_PATH", ".env")
 load_dotenv(dotenv_path)
@@ -12,22 +13,29 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 if not OPENAI_API_KEY:
     raise RuntimeError("OPENAI_API_KEY not found in environment variables.")
 
-CHROMA_DIR = "./chroma_db"
+# 요청마다 새로 만들지 않고 공유하는 LLM 클라이언트
+llm = ChatOpenAI(model_name="gpt-4.1-mini", openai_api_key=OPENAI_API_KEY)
 
 async def query_manual(manual_id: str, sender: str, message: str, top_k: int = 4):
     """
     Chroma 벡터DB에서 manual_id로 필터링된 문서 중 관련 문서를 검색하고 LLM으로 답변을 생성합니다.
+    벡터 검색은 공유 스레드 풀에서, LLM 호출은 비동기 클라이언트로 실행하여 이벤트 루프를 막지 않습니다.
+    비슷한 질문의 캐시된 답변이 있으면 그대로 반환합니다.
     """
-    embeddings = OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY)
-    vectorstore = Chroma(persist_directory=CHROMA_DIR, embedding_function=embeddings)
+    scope = f"query:{top_k}"
+    cached = await run_blocking(answer_cache.lookup, manual_id, message, scope)
+    if cached:
+        return {"answer": cached["answer"], "retrieved_chunks": cached["retrieved_chunks"]}
+
+    vectorstore = get_vectorstore()
     # manual_id로 필터링된 chunk만 검색 (공식 메서드 사용)
-    relevant_docs = vectorstore.similarity_search(
+    relevant_docs = await run_blocking(
+        vectorstore.similarity_search,
         message,
         k=top_k,
         filter={"manual_id": manual_id}
     )
     context = "\n".join([doc.page_content for doc in relevant_docs])
-    llm = ChatOpenAI(model_name="gpt-4.1-mini", openai_api_key=OPENAI_API_KEY)
     prompt = f"""
 아래는 실험실 매뉴얼의 일부입니다.
 
@@ -41,5 +49,8 @@ async def query_manual(manual_id: str, sender: str, message: str, top_k: int = 4
 
 답변:
 """
-    answer = llm.predict(prompt)
-    return {"answer": answer.strip(), "retrieved_chunks": len(relevant_docs)} 
\ No newline at end of file
+    response = await llm.ainvoke(prompt)
+    answer = response.content.strip()
+    if relevant_docs:
+        await run_blocking(answer_cache.store, manual_id, message, answer, scope, retrieved_chunks=len(relevant_docs))
+    return {"answer": answer, "retrieved_chunks": len(relevant_docs)} 
\ No newline at end of file
@@ -3,23 +3,25 @@ import uuid
 import time
 import re
 import io
+import hashlib
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import UploadFile
-from langchain_community.document_loaders import PyPDFLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import OpenAIEmbeddings
 from langchain_core.documents import Document
 from dotenv import load_dotenv
 # import pytesseract
 from pdf2image import convert_from_path
 import base64
-from typing import List
+from typing import List, Optional, Iterator
 import json 
 
 from PyPDF2 import PdfReader
 from PIL import Image
 from openai import OpenAI
 from google.generativeai import configure, GenerativeModel
+from app.db.vector_store import get_embeddings, get_collection
+from app.core import metrics
 
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
@@ -34,8 +36,8 @@ client = OpenAI(api_key=OPENAI_API_KEY)
 configure(api_key=GOOGLE_API_KEY)
 
 
-CHROMA_DIR = "./chroma_db"  
-POPLER_PATH = r"C:\Users\201-13\Documents\poppler-24.08.0\Library\bin"
+POPLER_PATH = os.getenv("POPPLER_PATH", r"C:\Users\201-13\Documents\poppler-24.08.0\Library\bin")
+VISION_DPI = int(os.getenv("VISION_DPI", 200))
 
 # pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
 
@@ -70,11 +72,6 @@ def has_figure_or_table_caption(text: str) -> bool:
     patterns = ["그림 \d+", "표 \d+", r"\[그림 \d+\]", r"\[표 \d+\]"]
     return any(re.search(pat, text) for pat in patterns)
 
-# 누락 페이지 확인
-def get_missing_page_numbers(total_pages: int, parsed_docs: list) -> set:
-    parsed_page_nums = set(doc.metadata.get("page", -1) for doc in parsed_docs)
-    return set(range(1, total_pages + 1)) - parsed_page_nums
-
 # 청크 필터링
 def filter_chunk(text: str) -> bool:
     text = text.strip()
@@ -84,7 +81,7 @@ def filter_chunk(text: str) -> bool:
     return len(valid_chars) / len(text) > 0.5
 
 # 제미나이 모델 호출
-def call_vision_model_with_gemini(image: Image.Image) -> str:
+def call_vision_model_with_gemini(image: Image.Image, timeout: float = None) -> str:
     import google.generativeai as genai
     prompt = """
 다음 이미지를 사람이 직접 보는 것처럼 시각적으로 설명해 주세요.
@@ -98,7 +95,8 @@ def call_vision_model_with_gemini(image: Image.Image) -> str:
 ※ 설명은 한국어로 해주세요.
 """
     model = genai.GenerativeModel("gemini-1.5-pro-latest")
-    response = model.generate_content([prompt, image])
+    request_options = {"timeout": timeout} if timeout else None
+    response = model.generate_content([prompt, image], request_options=request_options)
     return response.text
 
 # === 실험 제목 찾기 & ID 부여 ===
@@ -210,31 +208,193 @@ def assign_experiment_ids(chunks: List[Document], manual_id: str) -> List[Docume
                 
     return chunks
 
-async def embed_pdf_manual(file: UploadFile, manual_type: str = "UNKNOWN", user_id: int = None) -> dict:
-    import tempfile, shutil
-    temp_dir = tempfile.mkdtemp()
-    temp_path = os.path.join(temp_dir, file.filename)
+# === 동일 파일 재업로드 감지 (content-addressed) ===
+CLONE_BATCH_SIZE = 1000
+
+def clean_metadata(meta: dict) -> dict:
+    """Chroma 메타데이터에는 None을 저장할 수 없으므로 제거합니다."""
+    return {k: v for k, v in meta.items() if v is not None}
+
+def compute_content_hash(content: bytes) -> str:
+    """
+    업로드 파일 바이트의 sha256 해시를 반환합니다.
+    """
+    return hashlib.sha256(content).hexdigest()
+
+def find_ingested_manual_id(content_hash: str, exclude_manual_id: str = None) -> Optional[str]:
+    """
+    같은 해시의 문서가 이미 벡터DB에 있으면 그 manual_id를 반환합니다.
+    """
+    where = {"content_hash": content_hash}
+    if exclude_manual_id:
+        where = {"$and": [{"content_hash": content_hash}, {"manual_id": {"$ne": exclude_manual_id}}]}
     try:
-        with open(temp_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
-        # 1. manual_id 생성 (uuid)
-        manual_id = str(uuid.uuid4())
-        print(f"🎉 새 매뉴얼 ID 생성: {manual_id}")
-        # 2. PyPDFLoader로 텍스트 추출 및 청킹
-        loader = PyPDFLoader(temp_path)
-        docs = loader.load()
-        splitter = RecursiveCharacterTextSplitter(chunk_size=1500, chunk_overlap=200)
-        split_docs = splitter.split_documents(docs)
-        # 3. 일반 chunk에 메타데이터 부여
-        pdf_chunks = []
-        vision_page_candidates = set()
-
-        for idx, doc in enumerate(split_docs):
-            # if not filter_chunk(doc.page_content):
-            #     continue  # 특수문자/수식/깨진 문자가 포함된 청크는 저장하지 않음
-            page_num = doc.metadata.get("page", 1)
-            content = doc.page_content.strip()
+        existing = get_collection().get(where=where, limit=1, include=["metadatas"])
+    except Exception as e:
+        print(f"중복 문서 조회 실패: {e}")
+        return None
+    if not existing["metadatas"]:
+        return None
+    return existing["metadatas"][0].get("manual_id")
+
+def clone_manual_chunks(source_manual_id: str, manual_id: str, manual_type: str, filename: str, user_id: int = None) -> Optional[dict]:
+    """
+    이미 임베딩된 매뉴얼의 청크/임베딩을 새 manual_id로 복제합니다. (LLM, 비전, 임베딩 호출 없음)
+    원본 청크가 없으면 None을 반환합니다.
+    """
+    collection = get_collection()
+    source = collection.get(where={"manual_id": source_manual_id}, include=["documents", "metadatas", "embeddings"])
+    if not source["ids"]:
+        return None
+
+    # 원본 순서(chunk_idx) 유지
+    rows = sorted(
+        zip(source["documents"], source["metadatas"], source["embeddings"]),
+        key=lambda row: row[1].get("chunk_idx", 0)
+    )
+    uploaded_at = int(time.time())
+    ids, documents, metadatas, embeddings = [], [], [], []
+    pdf_count, vision_count = 0, 0
+    for i, (doc, meta, embedding) in enumerate(rows):
+        meta = dict(meta)
+        meta["manual_id"] = manual_id
+        meta["manual_type"] = manual_type
+        meta["filename"] = filename
+        meta["uploaded_at"] = uploaded_at
+        meta["user_id"] = user_id
+        if meta.get("experiment_id", "").startswith(source_manual_id):
+            meta["experiment_id"] = manual_id + meta["experiment_id"][len(source_manual_id):]
+        if meta.get("source") == "gemini":
+            vision_count += 1
+        else:
+            pdf_count += 1
+        metadatas.append(clean_metadata(meta))
+        ids.append(f"{manual_id}_{i:05d}")
+        documents.append(doc)
+        embeddings.append(embedding)
+
+    for start in range(0, len(ids), CLONE_BATCH_SIZE):
+        end = start + CLONE_BATCH_SIZE
+        collection.add(
+            ids=ids[start:end],
+            documents=documents[start:end],
+            metadatas=metadatas[start:end],
+            embeddings=embeddings[start:end]
+        )
+
+    experiment_ids = sorted(set(meta["experiment_id"] for meta in metadatas if "experiment_id" in meta))
+    print(f"♻️ 동일 문서 재사용: {source_manual_id} → {manual_id} ({len(ids)}개 청크 복제)")
+    return {
+        "message": "동일한 PDF가 이미 임베딩되어 있어 기존 청크를 재사용했습니다.",
+        "manual_id": manual_id,
+        "pdf_chunks": pdf_count,
+        "ocr_chunks": vision_count,
+        "total_chunks": len(ids),
+        "experiment_ids": experiment_ids,
+        "deduplicated_from": source_manual_id
+    }
+
+# === 임베딩 단계 (배치 + 동시 요청 제한 + 배치별 재시도) ===
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", 64))
+EMBED_MAX_CONCURRENCY = int(os.getenv("EMBED_MAX_CONCURRENCY", 4))
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", 3))
+
+async def embed_and_store_documents(
+    docs: List[Document],
+    manual_id: str,
+    batch_size: int = EMBED_BATCH_SIZE,
+    max_concurrency: int = EMBED_MAX_CONCURRENCY,
+    max_retries: int = EMBED_MAX_RETRIES
+) -> List[dict]:
+    """
+    청크를 batch_size 단위로 나눠 동시에 최대 max_concurrency개 배치를 임베딩하고,
+    벡터DB에는 배치 순서대로 upsert합니다. (저장 순서를 읽는 쪽이 chunk_idx 순서를 그대로 받도록)
+    한 배치가 재시도 끝에 실패하면 나머지 배치의 임베딩도 취소하고 그 오류를 다시 발생시킵니다.
+    청크 ID는 manual_id와 순번으로 고정되므로 같은 문서를 다시 처리해도 중복 저장되지 않습니다.
+
+    Returns:
+        List[dict]: 배치별 처리 결과 (청크 수, 시도 횟수, 소요 시간, 처리량)
+    """
+    embeddings = get_embeddings()
+    collection = get_collection()
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def embed_batch(batch_no: int, texts: List[str]):
+        async with semaphore:
+            started = time.perf_counter()
+            for attempt in range(1, max_retries + 1):
+                try:
+                    vectors = await embeddings.aembed_documents(texts)
+                    return vectors, attempt, started
+                except Exception as e:
+                    metrics.incr("ingest.embed_batch_retry")
+                    if attempt == max_retries:
+                        raise RuntimeError(f"임베딩 배치 {batch_no} 실패 ({attempt}회 시도): {e}")
+                    print(f"⚠️ 임베딩 배치 {batch_no} 재시도 {attempt}/{max_retries}: {e}")
+                    await asyncio.sleep(2 ** (attempt - 1))
+
+    starts = list(range(0, len(docs), batch_size))
+    reports = []
+    try:
+        async with asyncio.TaskGroup() as group:
+            tasks = [
+                group.create_task(embed_batch(batch_no, [doc.page_content for doc in docs[start:start + batch_size]]))
+                for batch_no, start in enumerate(starts)
+            ]
+            for batch_no, (start, task) in enumerate(zip(starts, tasks)):
+                vectors, attempt, started = await task
+                batch_docs = docs[start:start + batch_size]
+                await asyncio.to_thread(
+                    collection.upsert,
+                    ids=[f"{manual_id}_{start + i:05d}" for i in range(len(batch_docs))],
+                    documents=[doc.page_content for doc in batch_docs],
+                    metadatas=[clean_metadata(doc.metadata) for doc in batch_docs],
+                    embeddings=vectors
+                )
+                elapsed = time.perf_counter() - started
+                metrics.observe("ingest.embed_batch", elapsed)
+                report = {
+                    "batch": batch_no,
+                    "chunks": len(batch_docs),
+                    "attempts": attempt,
+                    "seconds": round(elapsed, 3),
+                    "chunks_per_sec": round(len(batch_docs) / elapsed, 2) if elapsed > 0 else None
+                }
+                print(f"✅ 임베딩 배치 {batch_no} 완료: {report}")
+                reports.append(report)
+    except ExceptionGroup as group_error:
+        # 호출하는 쪽(수집 작업)은 첫 번째 실패 원인만 기록한다
+        raise group_error.exceptions[0]
+    return reports
+
+# === 수집(ingestion) 단계별 함수 ===
+def iter_pdf_chunks(pdf_path: str, base_meta: dict, vision_page_candidates: set) -> Iterator[Document]:
+    """
+    PDF를 한 페이지씩 읽으며 텍스트를 청킹하고, 품질 검사를 통과한 청크를 바로 yield합니다.
+    깨진/누락/그림·표 캡션이 있는 페이지 번호(1부터 시작)는 vision_page_candidates에 추가합니다.
+    메모리에는 현재 페이지의 텍스트만 유지됩니다.
+    """
+    reader = PdfReader(pdf_path)
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1500, chunk_overlap=200)
+    idx = 0
+
+    for page_num, page in enumerate(reader.pages, start=1):
+        try:
+            page_text = page.extract_text() or ""
+        except Exception as e:
+            print(f"⚠️ {page_num} 페이지 텍스트 추출 실패: {e}")
+            page_text = ""
+        pieces = splitter.split_text(page_text)
+
+        # 텍스트가 없는 페이지는 비전 모델로 다시 읽는다
+        if not pieces:
+            vision_page_candidates.add(page_num)
+            continue
+
+        for piece in pieces:
+            chunk_idx = idx
+            idx += 1
+            content = piece.strip()
 
             if is_broken_or_missing(content):
                 vision_page_candidates.add(page_num)
@@ -247,85 +407,175 @@ async def embed_pdf_manual(file: UploadFile, manual_type: str = "UNKNOWN", user_
                 continue
 
             meta = {
-                "manual_id": manual_id,
-                "manual_type": manual_type,
+                **base_meta,
                 "page_num": page_num,
-                "chunk_idx": idx,
+                "chunk_idx": chunk_idx,
                 "source": "pdf",
-                "filename": file.filename,
-                "uploaded_at": int(time.time()),
-                "user_id": user_id
+                "uploaded_at": int(time.time())
             }
-            pdf_chunks.append(Document(page_content=content, metadata=meta))
-            # existing_texts.add(content)
-            
-        total_pages = len(PdfReader(temp_path).pages)
-        missing_pages = get_missing_page_numbers(total_pages, split_docs)
-        vision_page_candidates.update(missing_pages)
-
-        images = convert_from_path(temp_path, poppler_path=POPLER_PATH)
-        vision_docs = []
-
-        for page_num in sorted(vision_page_candidates):
-            if page_num - 1 < len(images):
-                image = images[page_num - 1]
-                vision_text = call_vision_model_with_gemini(image)
-
-                # 비전 모델에서 추출한 텍스트도 필터링
-                if not filter_chunk(vision_text):
-                    continue
-
-                meta = {
-                    "manual_id": manual_id,
-                    "manual_type": manual_type,
-                    "page_num": page_num,
-                    "chunk_idx": len(pdf_chunks) + len(vision_docs),
-                    "source": "gemini",
-                    "chunk_type": "vision_extracted",
-                    "filename": file.filename,
-                    "uploaded_at": int(time.time()),
-                    "user_id": user_id
-                }
-                vision_docs.append(Document(page_content=vision_text, metadata=meta))
-
-        # existing_texts = set(doc.page_content.strip() for doc in split_docs)
-        # for idx, img in enumerate(images):
-        #     ocr_text = pytesseract.image_to_string(img, lang='kor+eng').strip()
-        #     if not ocr_text or ocr_text in existing_texts:
-        #         continue
-        #     if not filter_chunk(ocr_text):
-        #         continue  # 특수문자/수식/깨진 문자가 포함된 청크는 저장하지 않음
-        #     meta = {
-        #         "manual_id": manual_id,
-        #         "manual_type": manual_type,
-        #         "page_num": idx + 1,
-        #         "chunk_idx": idx,
-        #         "source": "ocr",
-        #         "filename": file.filename,
-        #         "uploaded_at": int(time.time())
-        #     }
-        #     ocr_docs.append(Document(page_content=ocr_text, metadata=meta))
-        #     print("✅ [5] OCR 통과한 청크 수:", len(ocr_docs))
-        
-        # 모든 chunk에 experiment_id 할당
-        all_docs = pdf_chunks + vision_docs
-        all_docs = assign_experiment_ids(all_docs, manual_id)
-        # 할당된 고유 experiment_id 목록 추출
-        assigned_experiment_ids = sorted(list(set(doc.metadata.get("experiment_id") for doc in all_docs if "experiment_id" in doc.metadata)))
-        #벡터db저장
-        embeddings = OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY)
-        vectorstore = Chroma.from_documents(all_docs, embeddings, persist_directory=CHROMA_DIR)
-        vectorstore.persist()
-        return {
-            "message": "PDF 임베딩 및 저장 완료",
-            "manual_id": manual_id,
-            "pdf_chunks": len(pdf_chunks),
-            "ocr_chunks": len(vision_docs),
-            "total_chunks": len(all_docs),
-            "experiment_ids": assigned_experiment_ids
+            yield Document(page_content=content, metadata=meta)
+
+def parse_pdf_chunks(pdf_path: str, base_meta: dict) -> tuple:
+    """
+    PDF를 한 번만 순회하며 텍스트 청크와 비전 모델로 다시 읽어야 할 페이지 번호를 함께 반환합니다.
+
+    Returns:
+        (pdf_chunks, vision_page_candidates): 청크 리스트와 정렬된 페이지 번호 리스트
+    """
+    vision_page_candidates = set()
+    pdf_chunks = list(iter_pdf_chunks(pdf_path, base_meta, vision_page_candidates))
+    return pdf_chunks, sorted(vision_page_candidates)
+
+VISION_MAX_CONCURRENCY = int(os.getenv("VISION_MAX_CONCURRENCY", 4))
+VISION_TIMEOUT = float(os.getenv("VISION_TIMEOUT", 120))
+
+def render_pdf_page(pdf_path: str, page_num: int, dpi: int = VISION_DPI) -> Optional[Image.Image]:
+    """
+    PDF의 한 페이지(1부터 시작)만 이미지로 변환합니다. 페이지가 없으면 None.
+    """
+    images = convert_from_path(pdf_path, dpi=dpi, first_page=page_num, last_page=page_num, poppler_path=POPLER_PATH)
+    return images[0] if images else None
+
+def _describe_page(pdf_path: str, page_num: int, timeout: float, dpi: int) -> dict:
+    """
+    한 페이지를 렌더링해 비전 모델을 호출하고 소요 시간/실패 여부를 기록합니다.
+    이미지는 호출이 끝나면 바로 해제하므로 메모리에는 동시 처리 중인 페이지만 남는다.
+    """
+    started = time.perf_counter()
+    image = None
+    try:
+        image = render_pdf_page(pdf_path, page_num, dpi)
+        if image is None:
+            raise ValueError(f"{page_num} 페이지를 렌더링할 수 없습니다.")
+        text = call_vision_model_with_gemini(image, timeout=timeout)
+        status, error = "ok", None
+    except Exception as e:
+        text, status, error = None, "failed", str(e)
+        metrics.incr("ingest.vision_failed")
+    finally:
+        if image is not None:
+            image.close()
+    elapsed = time.perf_counter() - started
+    metrics.observe("ingest.vision_page", elapsed)
+    return {"page": page_num, "seconds": round(elapsed, 3), "status": status, "error": error, "text": text}
+
+def extract_vision_docs(
+    pdf_path: str,
+    pages: List[int],
+    base_meta: dict,
+    start_chunk_idx: int,
+    max_concurrency: int = VISION_MAX_CONCURRENCY,
+    timeout: float = VISION_TIMEOUT,
+    dpi: int = VISION_DPI
+) -> tuple:
+    """
+    지정한 페이지만 한 장씩 이미지로 변환해 Gemini 비전 모델로 설명 텍스트를 추출합니다.
+    최대 max_concurrency개 페이지를 동시에 처리하며, 일부 페이지가 실패해도 나머지는 계속 진행합니다.
+    PDF 전체를 한 번에 렌더링하지 않으므로 메모리 사용량은 페이지 수와 무관합니다.
+
+    Returns:
+        (vision_docs, vision_report): 페이지 순서대로 정렬된 청크와 페이지별 처리 결과
+    """
+    targets = [page_num for page_num in pages if page_num >= 1]
+
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as executor:
+        # executor.map은 입력 순서대로 결과를 돌려주므로 chunk_idx 순서가 유지된다
+        page_results = list(executor.map(
+            lambda page_num: _describe_page(pdf_path, page_num, timeout, dpi),
+            targets
+        ))
+
+    vision_docs = []
+    vision_report = []
+    for result in page_results:
+        vision_text = result.pop("text")
+        # 비전 모델에서 추출한 텍스트도 필터링
+        if result["status"] == "ok" and not filter_chunk(vision_text):
+            result["status"] = "filtered"
+        vision_report.append(result)
+        if result["status"] != "ok":
+            continue
+
+        meta = {
+            **base_meta,
+            "page_num": result["page"],
+            "chunk_idx": start_chunk_idx + len(vision_docs),
+            "source": "gemini",
+            "chunk_type": "vision_extracted",
+            "uploaded_at": int(time.time())
         }
+        vision_docs.append(Document(page_content=vision_text, metadata=meta))
+    return vision_docs, vision_report
+
+def segment_documents(all_docs: List[Document], manual_id: str) -> tuple:
+    """
+    모든 chunk에 experiment_id를 할당하고, 할당된 고유 experiment_id 목록을 함께 반환합니다.
+    """
+    all_docs = assign_experiment_ids(all_docs, manual_id)
+    experiment_ids = sorted(list(set(doc.metadata.get("experiment_id") for doc in all_docs if "experiment_id" in doc.metadata)))
+    return all_docs, experiment_ids
+
+def build_base_metadata(manual_id: str, manual_type: str, filename: str, user_id: int, content_hash: str) -> dict:
+    """모든 청크에 공통으로 들어가는 메타데이터를 만듭니다."""
+    return {
+        "manual_id": manual_id,
+        "manual_type": manual_type,
+        "filename": filename,
+        "user_id": user_id,
+        "content_hash": content_hash
+    }
+
+async def ingest_pdf_file(pdf_path: str, manual_id: str, manual_type: str, filename: str, user_id: int = None) -> dict:
+    """
+    디스크에 저장된 PDF를 한 번에 수집(파싱 → 비전 → 실험 구분 → 임베딩)합니다.
+    블로킹 단계는 스레드에서 실행해 이벤트 루프를 막지 않습니다.
+    """
+    with open(pdf_path, "rb") as f:
+        content_hash = compute_content_hash(f.read())
+    # 동일한 파일이 이미 임베딩되어 있으면 전체 파이프라인을 건너뛰고 청크를 복제
+    source_manual_id = find_ingested_manual_id(content_hash, exclude_manual_id=manual_id)
+    if source_manual_id:
+        cloned = await asyncio.to_thread(clone_manual_chunks, source_manual_id, manual_id, manual_type, filename, user_id)
+        if cloned:
+            return cloned
+
+    base_meta = build_base_metadata(manual_id, manual_type, filename, user_id, content_hash)
+    pdf_chunks, vision_pages = await asyncio.to_thread(parse_pdf_chunks, pdf_path, base_meta)
+    vision_docs, vision_report = await asyncio.to_thread(extract_vision_docs, pdf_path, vision_pages, base_meta, len(pdf_chunks))
+    all_docs, experiment_ids = await asyncio.to_thread(segment_documents, pdf_chunks + vision_docs, manual_id)
+    embedding_batches = await embed_and_store_documents(all_docs, manual_id)
+    return build_ingest_result(manual_id, pdf_chunks, vision_docs, all_docs, experiment_ids, embedding_batches, vision_report)
+
+def build_ingest_result(manual_id: str, pdf_chunks: list, vision_docs: list, all_docs: list, experiment_ids: list, embedding_batches: list, vision_report: list = None) -> dict:
+    return {
+        "message": "PDF 임베딩 및 저장 완료",
+        "manual_id": manual_id,
+        "pdf_chunks": len(pdf_chunks),
+        "ocr_chunks": len(vision_docs),
+        "total_chunks": len(all_docs),
+        "experiment_ids": experiment_ids,
+        "embedding_batches": embedding_batches,
+        "vision_pages": vision_report or [],
+        "vision_failed_pages": [item["page"] for item in (vision_report or []) if item["status"] == "failed"]
+    }
+
+async def embed_pdf_manual(file: UploadFile, manual_type: str = "UNKNOWN", user_id: int = None) -> dict:
+    """
+    업로드된 PDF를 요청 안에서 바로 수집합니다. (백그라운드 작업은 ingestion_jobs 사용)
+    """
+    import tempfile, shutil
+    temp_dir = tempfile.mkdtemp()
+    temp_path = os.path.join(temp_dir, file.filename)
+    try:
+        with open(temp_path, "wb") as f:
+            content = await file.read()
+            f.write(content)
+        # manual_id 생성 (uuid)
+        manual_id = str(uuid.uuid4())
+        print(f"🎉 새 매뉴얼 ID 생성: {manual_id}")
+        return await ingest_pdf_file(temp_path, manual_id, manual_type, file.filename, user_id)
     finally:
         try:
             shutil.rmtree(temp_dir)
         except Exception:
-            pass 
\ No newline at end of file
+            pass
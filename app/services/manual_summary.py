@@ -1,10 +1,13 @@
 import os
 import json
 import time
-from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Optional, Iterator
 from langchain_core.documents import Document
 from openai import OpenAI
 from dotenv import load_dotenv
+from app.services.analysis_store import get_or_compute_analysis, EXPERIMENT_SUMMARY
+from app.core.executor import run_blocking
 
 # 환경 변수 로드
 load_dotenv()
@@ -16,6 +19,12 @@ if not OPENAI_API_KEY:
 # OpenAI 클라이언트 초기화
 client = OpenAI(api_key=OPENAI_API_KEY)
 
+# 프롬프트를 바꾸면 올려서 저장된 요약을 무효화
+SUMMARY_PROMPT_VERSION = "1"
+
+# 동시에 요약을 생성할 실험 수
+SUMMARY_MAX_CONCURRENCY = int(os.getenv("SUMMARY_MAX_CONCURRENCY", 4))
+
 
 def summarize_experiment_chunks(chunks: List[Document]) -> Dict[str, str]:
     """
@@ -95,45 +104,136 @@ def summarize_experiment_chunks(chunks: List[Document]) -> Dict[str, str]:
         raise RuntimeError(f"OpenAI API 호출 중 오류 발생: {str(e)}")
 
 
-def summarize_experiments_by_manual_id(manual_id: str, chunks: List[Document]) -> List[Dict[str, str]]:
+def get_experiment_summary(chunks: List[Document], regenerate: bool = False) -> Dict:
     """
-    특정 manual_id의 모든 experiment들을 요약합니다.
+    실험 요약을 저장소(risk_analysis 테이블)에서 가져오거나, 없으면 생성하여 구조화된 파싱 결과와 함께 저장합니다.
+    청크가 바뀌면(재수집 등) 지문이 달라져 새로 생성됩니다.
     
     Args:
-        manual_id: 매뉴얼 ID
-        chunks: 해당 매뉴얼의 모든 청크들
+        chunks: 동일한 experiment_id를 가진 Document 객체들의 리스트
+        regenerate: True이면 저장된 요약을 무시하고 다시 생성
         
     Returns:
-        List[Dict[str, str]]: 각 실험별 요약 결과 리스트
+        Dict: summarize_experiment_chunks 결과 + structured_summary
+    """
+    if not chunks:
+        raise ValueError("청크 리스트가 비어있습니다.")
+    experiment_id = chunks[0].metadata.get("experiment_id", "unknown")
+    manual_id = chunks[0].metadata.get("manual_id") or experiment_id.rsplit("_exp", 1)[0]
+
+    def compute():
+        summary_result = summarize_experiment_chunks(chunks)
+        summary_result["structured_summary"] = parse_summary_to_structured_dict(summary_result["summary"])
+        return summary_result
+
+    return get_or_compute_analysis(
+        EXPERIMENT_SUMMARY,
+        manual_id,
+        compute,
+        experiment_id=experiment_id,
+        prompt_version=SUMMARY_PROMPT_VERSION,
+        is_success=lambda result: bool(result.get("summary")) and not result.get("error"),
+        summarize=lambda result: result["summary"],
+        refresh=regenerate,
+        chunks=chunks
+    )
+
+
+def group_chunks_by_experiment(manual_id: str, chunks: List[Document]) -> Dict[str, List[Document]]:
+    """
+    매뉴얼 청크들을 experiment_id별로 묶습니다. (등장 순서 유지)
     """
-    # experiment_id별로 청크들을 그룹화
     experiment_groups = {}
-    
     for chunk in chunks:
         exp_id = chunk.metadata.get("experiment_id")
         if exp_id and exp_id.startswith(manual_id):
             if exp_id not in experiment_groups:
                 experiment_groups[exp_id] = []
             experiment_groups[exp_id].append(chunk)
+    return experiment_groups
+
+
+def _summarize_group(exp_id: str, exp_chunks: List[Document], regenerate: bool = False) -> Dict:
+    # 실험 하나의 요약. 실패해도 예외 대신 실패 내용을 담은 결과를 반환
+    try:
+        summary = get_experiment_summary(exp_chunks, regenerate=regenerate)
+        print(f"✅ {exp_id} 요약 완료 (청크 수: {len(exp_chunks)})")
+        return summary
+    except Exception as e:
+        print(f"❌ {exp_id} 요약 실패: {str(e)}")
+        return {
+            "experiment_id": exp_id,
+            "summary": f"요약 생성 실패: {str(e)}",
+            "chunk_count": len(exp_chunks),
+            "created_at": int(time.time())
+        }
+
+
+def summarize_experiments_by_manual_id(
+    manual_id: str,
+    chunks: List[Document],
+    regenerate: bool = False,
+    max_concurrency: int = SUMMARY_MAX_CONCURRENCY
+) -> List[Dict[str, str]]:
+    """
+    특정 manual_id의 모든 experiment들을 요약합니다.
+    이미 저장된 실험 요약은 다시 생성하지 않으며, 새로 생성할 요약은 최대 max_concurrency개까지 동시에 요청합니다.
+    
+    Args:
+        manual_id: 매뉴얼 ID
+        chunks: 해당 매뉴얼의 모든 청크들
+        regenerate: True이면 저장된 요약을 무시하고 다시 생성
+        max_concurrency: 동시에 진행할 실험 요약 수 (1이면 순차 처리)
+        
+    Returns:
+        List[Dict[str, str]]: 각 실험별 요약 결과 리스트 (실험 순서 유지)
+    """
+    experiment_groups = group_chunks_by_experiment(manual_id, chunks)
+    if not experiment_groups:
+        return []
     
-    # 각 실험별로 요약 생성
-    summaries = []
-    for exp_id, exp_chunks in experiment_groups.items():
-        try:
-            summary = summarize_experiment_chunks(exp_chunks)
-            summaries.append(summary)
-            print(f"✅ {exp_id} 요약 완료 (청크 수: {len(exp_chunks)})")
-        except Exception as e:
-            print(f"❌ {exp_id} 요약 실패: {str(e)}")
-            summaries.append({
-                "experiment_id": exp_id,
-                "summary": f"요약 생성 실패: {str(e)}",
-                "chunk_count": len(exp_chunks),
-                "created_at": int(time.time())
-            })
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(experiment_groups)))) as executor:
+        return list(executor.map(
+            lambda item: _summarize_group(item[0], item[1], regenerate),
+            experiment_groups.items()
+        ))
+
+
+def iter_experiment_summaries(
+    manual_id: str,
+    chunks: List[Document],
+    regenerate: bool = False,
+    max_concurrency: int = SUMMARY_MAX_CONCURRENCY
+) -> Iterator[Dict]:
+    """
+    실험 요약을 동시에 생성하면서 끝나는 순서대로 하나씩 반환합니다. (스트리밍 응답용)
+    """
+    experiment_groups = group_chunks_by_experiment(manual_id, chunks)
+    if not experiment_groups:
+        return
     
-    return summaries
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(experiment_groups)))) as executor:
+        futures = [
+            executor.submit(_summarize_group, exp_id, exp_chunks, regenerate)
+            for exp_id, exp_chunks in experiment_groups.items()
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+async def aget_experiment_summary(chunks: List[Document], regenerate: bool = False) -> Dict:
+    """get_experiment_summary의 비동기 버전 (공유 스레드 풀에서 실행)"""
+    return await run_blocking(get_experiment_summary, chunks, regenerate)
+
 
+async def asummarize_experiments_by_manual_id(
+    manual_id: str,
+    chunks: List[Document],
+    regenerate: bool = False,
+    max_concurrency: int = SUMMARY_MAX_CONCURRENCY
+) -> List[Dict[str, str]]:
+    """summarize_experiments_by_manual_id의 비동기 버전 (공유 스레드 풀에서 실행)"""
+    return await run_blocking(summarize_experiments_by_manual_id, manual_id, chunks, regenerate, max_concurrency)
 
 def save_summaries_to_json(summaries: List[Dict[str, str]], output_path: str) -> bool:
     """
@@ -3,16 +3,16 @@ from app.crud.manuals_crud import (
     create_manual, get_manuals_by_user, get_manual_by_manual_id, update_manual, delete_manual
 )
 from app.schemas.manuals import ManualCreate, ManualUpdate
-from app.services.manual_rag import embed_pdf_manual
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import OpenAIEmbeddings
-import os
-
-CHROMA_DIR = "./chroma_db"
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+from app.services.ingestion_jobs import create_ingestion_job, start_ingestion_job, remove_ingestion_job
+from app.db.vector_store import get_collection
+from app.services.agent_chat_service import invalidate_agent_executor
+from app.services.answer_cache import answer_cache
+from app.services.id_cache import manual_pk_cache
 
 def create_manual_service(db: Session, manual: ManualCreate, user_id: int, company_id: int):
-    return create_manual(db, manual, user_id, company_id)
+    db_manual = create_manual(db, manual, user_id, company_id)
+    manual_pk_cache.invalidate(db_manual.manual_id)
+    return db_manual
 
 def get_manuals_by_user_service(db: Session, user_id: int):
     return get_manuals_by_user(db, user_id)
@@ -27,18 +27,15 @@ def delete_manual_service(db: Session, manual_id: str, user_id: int):
     manual = delete_manual(db, manual_id, user_id)
     if manual:
         try:
-            embeddings = OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY)
-            vectorstore = Chroma(persist_directory=CHROMA_DIR, embedding_function=embeddings)
-            
-            # manual_id로 시작하는 모든 experiment_id를 삭제
-            filter_criteria = {"experiment_id": {"$regex": f"^{manual_id}"}}
-            vectorstore._collection.delete(where=filter_criteria)
-            
-            # 혹시 experiment_id가 없는 경우를 대비해 manual_id로도 삭제
-            vectorstore._collection.delete(where={"manual_id": str(manual_id)})
-            
+            # 모든 청크(실험 청크 포함)에 manual_id 메타데이터가 있으므로 manual_id로 한 번에 삭제한다
+            # (Chroma where 절은 $regex를 지원하지 않는다)
+            get_collection().delete(where={"manual_id": str(manual_id)})
         except Exception as e:
             print(f"Vector DB deletion failed: {e}")
+        remove_ingestion_job(manual_id)
+        invalidate_agent_executor(manual_id)
+        answer_cache.invalidate(manual_id)
+        manual_pk_cache.invalidate(manual_id)
     return manual
 
 async def create_manual_with_embedding(
@@ -48,20 +45,24 @@ async def create_manual_with_embedding(
     user_id: int,
     company_id: int
 ):
-    # 1. PDF 임베딩 및 manual_id 생성
-    embed_result = await embed_pdf_manual(file, manual_type=manual_data.manual_type, user_id=user_id)
-    manual_id = embed_result["manual_id"]
-    # 2. DB에 메타데이터 저장 (manual_id도 저장)
+    # 1. 수집 작업 등록 (job_id == manual_id)
+    content = await file.read()
+    job = create_ingestion_job(content, file.filename, manual_type=manual_data.manual_type, user_id=user_id)
+    manual_id = job["manual_id"]
+    # 2. DB에 메타데이터 저장 (manual_id도 저장), 상태는 수집 단계에 따라 갱신된다
     db_manual = create_manual(
         db,
         ManualCreate(
             title=manual_data.title,
             filename=file.filename,
             manual_type=manual_data.manual_type,
-            status="uploaded",
+            status="queued",
             manual_id=manual_id
         ),
         user_id=user_id,
         company_id=company_id
     )
-    return db_manual, embed_result 
\ No newline at end of file
+    manual_pk_cache.invalidate(manual_id)
+    # 3. 백그라운드에서 수집 시작
+    start_ingestion_job(job["job_id"])
+    return db_manual, job 
\ No newline at end of file
@@ -0,0 +1,110 @@
+import os
+import re
+from typing import Optional
+
+from dotenv import load_dotenv
+from langchain_openai import ChatOpenAI
+
+from app.core import metrics
+
+load_dotenv()
+
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+# 로컬 규칙 점수 차이가 이 값 이상이면 LLM을 호출하지 않고 바로 분류한다
+CLASSIFIER_MIN_MARGIN = int(os.getenv("CLASSIFIER_MIN_MARGIN", 2))
+
+MESSAGE = "message"
+EXPERIMENT_LOG = "experiment_log"
+
+# 질문 신호: 물음표, 의문사, 요청/의문형 어미
+_QUESTION_PATTERNS = [
+    (re.compile(r"\?\s*$"), 3),
+    (re.compile(r"(어떻게|어떤|무엇|뭐야|뭔가|뭐지|뭘|왜|언제|어디|얼마나|몇\s?(개|번|분|도|ml|g))"), 2),
+    (re.compile(r"(알려\s?줘|알려\s?주세요|설명해|가르쳐|찾아\s?줘|말해\s?줘)"), 3),
+    (re.compile(r"(나요|까요|ㄹ까|을까|할까|인가요|인가|습니까|ㅂ니까|는지|는가|되나|되니|돼\?|해야\s?(해|돼|하나|되나))\s*\??\s*$"), 2),
+    (re.compile(r"(방법|주의사항|절차|순서|기준|이유)"), 1),
+]
+
+# 실험 기록 신호: 과거/완료 서술, 측정값, 관찰/이슈 보고
+# 과거/완료 서술이 없으면 로컬에서 실험 기록으로 분류하지 않는다 ("37도에서 30분 배양하면 돼")
+_COMPLETION_PATTERNS = [
+    (re.compile(r"(했어|했음|했다|했습니다|했고|했는데|했어요|됐어|됐다|됐음|되었다|되었습니다|였다|였음|끝났|마쳤|완료)"), 2),
+    (re.compile(r"(넣었|섞었|가열했|측정했|관찰했|확인했|시작했|추가했|옮겼|돌렸|끓였|식혔|저었|나왔|생겼|변했|보였|발생했)"), 3),
+]
+_LOG_PATTERNS = _COMPLETION_PATTERNS + [
+    (re.compile(r"\d+(\.\d+)?\s*(ml|mL|l|L|g|mg|kg|℃|°C|도|분|초|시간|rpm|%|M|mM|nm)(?![A-Za-z])"), 2),
+    (re.compile(r"(측정값|결과는|결과:|관찰:|수치|진행\s?중|는\s?중|실패했|오류가\s?났|안\s?됨)"), 2),
+]
+
+# 받침이 ㄹ인 글자 (뭘까, 일까, 될까 등 "ㄹ까" 어미 판단용)
+_RIEUL_FINAL = "".join(chr(code) for code in range(0xAC00, 0xD7A4) if (code - 0xAC00) % 28 == 8)
+
+# 질문/요청이 섞인 메시지 ("~했는데 다음 단계 알려줘", "~안 변했어. 원인이 뭘까")는 로컬에서 실험 기록으로 분류하지 않는다
+_QUESTION_GUARD = re.compile(
+    r"(\?|？)\s*$"
+    r"|알려\s?줘|알려\s?주세요|알려\s?줄래|설명해|가르쳐|찾아\s?줘|말해\s?줘"
+    r"|뭐\s?해야|뭘\s?해야|뭐\s?하면|어떻게|어떡해|왜|원인|맞나요|맞지"
+    r"|야\s?(해|돼|하나|되나|할까|하는지|되는지)"
+    rf"|[{_RIEUL_FINAL}]까"
+    r"|(나요|까요|인가요|습니까|는지|되나|되나요|돼|맞아|맞아요)\s*[.!]?\s*$"
+)
+
+
+def _score(patterns, message: str) -> int:
+    return sum(weight for pattern, weight in patterns if pattern.search(message))
+
+
+def classify_locally(message: str) -> Optional[str]:
+    """
+    규칙 점수로 메시지를 분류합니다. 확신할 수 없으면 None을 반환합니다.
+    """
+    text = message.strip()
+    if not text:
+        return MESSAGE
+    question = _score(_QUESTION_PATTERNS, text)
+    log = _score(_LOG_PATTERNS, text)
+    if question - log >= CLASSIFIER_MIN_MARGIN:
+        return MESSAGE
+    if (log - question >= CLASSIFIER_MIN_MARGIN and _score(_COMPLETION_PATTERNS, text)
+            and not _QUESTION_GUARD.search(text)):
+        return EXPERIMENT_LOG
+    return None
+
+
+# 애매한 메시지만 사용하는 분류용 LLM (모듈 단위로 한 번만 생성)
+llm = ChatOpenAI(model_name="gpt-4o-mini", openai_api_key=OPENAI_API_KEY, temperature=0)
+
+
+def llm_classify_message_type(message: str) -> str:
+    """
+    LLM(GPT-4o 등)을 사용해 메시지가 '질문'인지 '실험기록'인지 분류한다.
+    반드시 '질문' 또는 '실험기록' 둘 중 하나로만 답변하도록 프롬프트를 구성한다.
+    """
+    prompt = f"""
+아래 메시지가 '질문'인지 '실험기록'인지 한 단어로 답해.
+질문: 실험 방법, 매뉴얼 등 궁금증.
+실험기록: 진행/관찰/결과/이슈 등.
+반드시 '질문' 또는 '실험기록' 둘 중 하나로만 답해.
+메시지: {message}
+"""
+    result = llm.invoke(prompt).content.strip().lower()
+    # 혹시라도 LLM이 엉뚱하게 답할 경우 방어
+    if "실험기록" in result or "experiment" in result:
+        return EXPERIMENT_LOG
+    return MESSAGE
+
+
+def classify_message(message: str) -> str:
+    """
+    메시지를 'message'(질문) 또는 'experiment_log'(실험기록)로 분류합니다.
+    규칙으로 확실한 경우 바로 반환하고, 애매한 경우에만 LLM을 호출합니다.
+    """
+    label = classify_locally(message)
+    if label is not None:
+        metrics.incr("classifier.local")
+        metrics.incr(f"classifier.local.{label}")
+        return label
+    metrics.incr("classifier.llm")
+    with metrics.timer("classifier.llm.latency"):
+        return llm_classify_message_type(message)
@@ -1,9 +1,11 @@
 from langchain_openai import ChatOpenAI
 from langchain_core.documents import Document
 from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
 import os
 from dotenv import load_dotenv, find_dotenv
 from langsmith import traceable
+from app.core.executor import run_blocking
 
 dotenv_path = find_dotenv()
 if dotenv_path:
@@ -13,12 +15,21 @@ else:
 
 openai_api_key = os.getenv("OPENAI_API_KEY")
 
+# 프롬프트를 바꾸면 올려서 저장된 분석 결과를 무효화
+RISK_ANALYSIS_PROMPT_VERSION = "1"
+
+# 그룹 크기 및 동시에 호출할 LLM 요청 수
+RISK_ANALYSIS_GROUP_SIZE = 10
+RISK_ANALYSIS_MAX_CONCURRENCY = int(os.getenv("RISK_ANALYSIS_MAX_CONCURRENCY", 4))
+
+# 그룹마다 새로 만들지 않고 공유하는 LLM 클라이언트
+llm = ChatOpenAI(model_name="gpt-4.1-mini", temperature=0, openai_api_key=openai_api_key)
+
 @traceable
 def analyze_chunk_group_advices(chunks: List[Document]) -> Dict[str, List[str]]:
     """
     chunk 그룹(10개)에 대해 위험 조언, 주의사항, 안전수칙 리스트를 추출합니다.
     """
-    llm = ChatOpenAI(model_name="gpt-4.1-mini", temperature=0, openai_api_key=openai_api_key)
     context = "\n".join([doc.page_content for doc in chunks])
     prompt = f"""
 아래는 실험실 매뉴얼의 일부입니다.
@@ -67,13 +78,15 @@ def analyze_chunk_group_advices(chunks: List[Document]) -> Dict[str, List[str]]:
         return {
             'advices': [f"분석 중 오류 발생: {str(e)}"],
             'cautions': [],
-            'safety_rules': []
+            'safety_rules': [],
+            'failed': True
         }
 
 @traceable
-def analyze_risk_advices(docs: List[Document], manual_id: str) -> Dict[str, Any]:
+def analyze_risk_advices(docs: List[Document], manual_id: str, max_concurrency: int = RISK_ANALYSIS_MAX_CONCURRENCY) -> Dict[str, Any]:
     """
     manual_id로 필터된 문서 리스트(docs)에 대해 위험 조언, 주의사항, 안전수칙 분석을 수행합니다.
+    청크 그룹별 LLM 호출은 최대 max_concurrency개까지 동시에 실행하고, 결과는 그룹 순서대로 합칩니다.
     """
     filtered_docs = [doc for doc in docs if doc.metadata.get("manual_id") == manual_id]
     if not filtered_docs:
@@ -86,10 +99,15 @@ def analyze_risk_advices(docs: List[Document], manual_id: str) -> Dict[str, Any]
             "group_safety_rules": [],
             "error": "분석 가능한 데이터가 없습니다."
         }
-    chunk_groups = [filtered_docs[i:i + 10] for i in range(0, len(filtered_docs), 10)]
+    chunk_groups = [
+        filtered_docs[i:i + RISK_ANALYSIS_GROUP_SIZE]
+        for i in range(0, len(filtered_docs), RISK_ANALYSIS_GROUP_SIZE)
+    ]
+    # executor.map은 입력 순서대로 결과를 돌려주므로 그룹 순서가 유지된다
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(chunk_groups)))) as executor:
+        group_results = list(executor.map(analyze_chunk_group_advices, chunk_groups))
     group_advices, group_cautions, group_safety_rules = [], [], []
-    for group in chunk_groups:
-        result = analyze_chunk_group_advices(group)
+    for result in group_results:
         group_advices.append(result['advices'])
         group_cautions.append(result['cautions'])
         group_safety_rules.append(result['safety_rules'])
@@ -103,5 +121,10 @@ def analyze_risk_advices(docs: List[Document], manual_id: str) -> Dict[str, Any]
         "final_safety_rules": all_safety_rules,
         "group_advices": group_advices,
         "group_cautions": group_cautions,
-        "group_safety_rules": group_safety_rules
-    } 
\ No newline at end of file
+        "group_safety_rules": group_safety_rules,
+        "failed_groups": sum(1 for result in group_results if result.get('failed'))
+    } 
+
+async def aanalyze_risk_advices(docs: List[Document], manual_id: str, max_concurrency: int = RISK_ANALYSIS_MAX_CONCURRENCY) -> Dict[str, Any]:
+    """analyze_risk_advices의 비동기 버전 (공유 스레드 풀에서 실행)"""
+    return await run_blocking(analyze_risk_advices, docs, manual_id, max_concurrency)
@@ -1,7 +1,6 @@
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 
-from fastapi_utilities import repeat_every
 from app.api import manual_rag_router, manual_query_router, risk_analysis_router
 from app.api.manual_router import router as manual_router
 # from app.api.voice_chat_router import router as voice_chat_router  # 사용 안함
@@ -11,7 +10,8 @@ from app.api.manual_summary_router import router as manual_summary_router
 from app.api.experiment_analysis_router import router as experiment_analysis_router
 # from app.api.web_voice_chat_router import router as web_voice_chat_router
 from app.api.user import router as user_router
-from app.services.agent_chat_service import flush_all_chat_logs
+from app.services.agent_chat_service import experiment_logger
+from app.services.chat_log_persister import chat_log_persister, CHAT_LOG_PERSISTER_IN_APP
 from app.db import create_tables
 import asyncio
 from fastapi.middleware.cors import CORSMiddleware
@@ -20,6 +20,10 @@ from app.api.experiment_router import router as experiment_router
 from app.api.chat_log_router import router as chat_log_router
 from app.api.voice_chat_router import router as voice_chat_router
 from app.api.briefing_router import router as briefing_router
+from app.api.metrics_router import router as metrics_router
+from app.db.vector_store import init_vector_store, close_vector_store
+from app.services.ingestion_jobs import resume_ingestion_jobs
+from app.core.executor import shutdown_executor
 
 app = FastAPI()
 
@@ -34,13 +38,13 @@ app.add_middleware(
 )
 
 @app.on_event("startup")
-@repeat_every(seconds=60, wait_first=True)
-async def periodic_flush_chat_logs():
+def start_chat_log_persister():
     """
-    Periodically flush chat logs from Redis to the database.
-    Waits for the first 60 seconds before running.
+    Persist chat logs from the Redis stream in a background consumer (one per worker).
+    Set CHAT_LOG_PERSISTER_IN_APP=false when running `python -m app.services.chat_log_persister` separately.
     """
-    flush_all_chat_logs()
+    if CHAT_LOG_PERSISTER_IN_APP:
+        chat_log_persister.start()
 
 @app.on_event("startup")
 def on_startup():
@@ -50,6 +54,36 @@ def on_startup():
     print("Initializing database tables...")
     pass # create_tables 모듈을 import 하는 것만으로 테이블이 생성됩니다.
 
+@app.on_event("startup")
+def migrate_experiment_logs():
+    """
+    Move the legacy experiment_logs.json file into the experiment_logs table (runs once).
+    """
+    experiment_logger.migrate_json_file()
+
+@app.on_event("startup")
+def init_shared_clients():
+    """
+    Open the shared vector store / embedding client once per process.
+    """
+    init_vector_store()
+
+@app.on_event("startup")
+async def resume_unfinished_ingestion():
+    """
+    Resume manual ingestion jobs interrupted by a crash or restart.
+    """
+    resume_ingestion_jobs()
+
+@app.on_event("shutdown")
+def close_shared_clients():
+    """
+    Release the shared vector store handles, the blocking-call thread pool and the chat log persister on shutdown.
+    """
+    close_vector_store()
+    shutdown_executor()
+    chat_log_persister.stop()
+
 app.include_router(manual_rag_router.router, prefix="/api")
 app.include_router(manual_query_router.router, prefix="/api")
 app.include_router(risk_analysis_router.router, prefix="/api")
@@ -64,4 +98,5 @@ app.include_router(experiment_router, prefix="/api")
 app.include_router(chat_log_router, prefix="/api")
 app.include_router(manual_summary_router, prefix="/api")
 app.include_router(voice_chat_router, prefix="/api")
-app.include_router(briefing_router, prefix="/api")
\ No newline at end of file
+app.include_router(briefing_router, prefix="/api")
+app.include_router(metrics_router, prefix="/api")
\ No newline at end of file
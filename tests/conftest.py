@@ -0,0 +1,7 @@
+import os
+import sys
+
+# 저장소 루트를 import 경로에 추가하고, 모듈 로드 시 생성되는 OpenAI/Gemini 클라이언트용 더미 키를 설정한다
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+os.environ.setdefault("GOOGLE_API_KEY", "test-key")
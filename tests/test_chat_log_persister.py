@@ -0,0 +1,45 @@
+import json
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.crud import chat_log_crud
+from app.models.chat_logs import ChatLog
+from app.services import chat_log_persister
+from app.services.chat_log_persister import ChatLogPersister
+
+
+class FakeRedis:
+    def __init__(self):
+        self.acked = []
+
+    def xack(self, stream, group, *ids):
+        self.acked.extend(ids)
+
+
+def _entry(entry_id, message, created_at=None):
+    log = {"experiment_id": 1, "user_id": None, "manual_id": None, "sender": "user", "message": message}
+    if created_at:
+        log["created_at"] = created_at
+    return entry_id, {"log": json.dumps(log)}
+
+
+def test_rows_keep_the_time_the_message_was_sent(monkeypatch):
+    engine = create_engine("sqlite://")
+    ChatLog.__table__.create(engine)
+    session_factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(chat_log_persister, "SessionLocal", session_factory)
+    persister = ChatLogPersister()
+    persister.redis_conn = FakeRedis()
+
+    # 회수(XAUTOCLAIM)된 이전 항목이 나중 배치로 저장되어도 보낸 시각 순서로 조회된다
+    persister._persist([_entry("1714557605000-0", "두 번째", "2024-05-01T10:00:05")])
+    persister._persist([_entry("1714557600000-0", "첫 번째")])
+
+    db = session_factory()
+    logs = chat_log_crud.load_chat_logs(db, experiment_id=1)
+    assert [log.message for log in logs] == ["첫 번째", "두 번째"]
+    # created_at이 없는 항목은 스트림 항목 ID의 밀리초 타임스탬프를 쓴다
+    assert logs[0].created_at == datetime(2024, 5, 1, 10, 0, 0)
+    assert persister.redis_conn.acked == ["1714557605000-0", "1714557600000-0"]
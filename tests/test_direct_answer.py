@@ -0,0 +1,50 @@
+from app.services import agent_chat_service, answer_cache as answer_cache_module
+from app.services.agent_chat_service import route_question, ROUTE_AGENT, ROUTE_DIRECT
+from app.services.answer_cache import SemanticAnswerCache
+
+EXPERIMENT_CONTEXT = "\n최근 실험 진행 상황:\n- 가열 완료\n"
+
+
+class FakeRedis:
+    """여러 워커가 함께 쓰는 Redis 역할"""
+
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def incr(self, key):
+        self.values[key] = str(int(self.values.get(key, 0)) + 1)
+        return int(self.values[key])
+
+
+class FakeEmbeddings:
+    def embed_query(self, text):
+        return [1.0, float(len(text))]
+
+
+def test_cached_answer_is_shared_by_every_user(monkeypatch):
+    monkeypatch.setattr(agent_chat_service.answer_cache, "lookup", lambda *args, **kwargs: {"answer": "캐시된 답변"})
+
+    assert agent_chat_service.direct_answer("manual-1", "황산 희석 방법") == "캐시된 답변"
+
+
+def test_progress_questions_with_context_use_agent():
+    assert route_question("지금 단계에서 온도는 몇 도로 해야 하나요?", [], EXPERIMENT_CONTEXT) == ROUTE_AGENT
+    assert route_question("지금 단계에서 온도는 몇 도로 해야 하나요?", [], "") == ROUTE_DIRECT
+    assert route_question("황산 희석할 때 주의사항 알려줘", [], EXPERIMENT_CONTEXT) == ROUTE_DIRECT
+
+
+def test_invalidation_reaches_other_workers(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(answer_cache_module, "get_redis_conn", lambda: redis)
+    monkeypatch.setattr(answer_cache_module, "get_embeddings", lambda: FakeEmbeddings())
+    worker_a, worker_b = SemanticAnswerCache(), SemanticAnswerCache()
+
+    worker_b.store("manual-1", "황산 희석 방법", "물에 산을 넣습니다")
+    assert worker_b.lookup("manual-1", "황산 희석 방법")["answer"] == "물에 산을 넣습니다"
+
+    # 다른 워커가 재수집/삭제로 무효화하면 이 워커의 항목도 더 이상 쓰지 않는다
+    worker_a.invalidate("manual-1")
+    assert worker_b.lookup("manual-1", "황산 희석 방법") is None
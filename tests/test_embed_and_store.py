@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+from langchain_core.documents import Document
+
+from app.services import manual_rag
+
+
+class FakeEmbeddings:
+    """뒤 배치일수록 먼저 끝나도록 지연을 준다. fail_on이 들어간 배치는 바로 실패한다."""
+
+    def __init__(self, fail_on: str = None):
+        self.fail_on = fail_on
+        self.completed = []
+
+    async def aembed_documents(self, texts):
+        if self.fail_on in texts:
+            raise ValueError("embedding failed")
+        await asyncio.sleep(0.05 / (int(texts[0].split("-")[1]) + 1))
+        self.completed.append(texts[0])
+        return [[0.0] for _ in texts]
+
+
+class FakeCollection:
+    def __init__(self):
+        self.upserted_ids = []
+
+    def upsert(self, ids, documents, metadatas, embeddings):
+        self.upserted_ids.extend(ids)
+
+
+def _docs(count):
+    return [Document(page_content=f"chunk-{i}", metadata={"chunk_idx": i}) for i in range(count)]
+
+
+def test_batches_are_written_in_chunk_order(monkeypatch):
+    collection = FakeCollection()
+    monkeypatch.setattr(manual_rag, "get_embeddings", lambda: FakeEmbeddings())
+    monkeypatch.setattr(manual_rag, "get_collection", lambda: collection)
+
+    reports = asyncio.run(manual_rag.embed_and_store_documents(_docs(10), "m1", batch_size=2, max_concurrency=5))
+
+    assert collection.upserted_ids == [f"m1_{i:05d}" for i in range(10)]
+    assert [report["batch"] for report in reports] == list(range(5))
+
+
+def test_failed_batch_cancels_the_rest(monkeypatch):
+    collection = FakeCollection()
+    embeddings = FakeEmbeddings(fail_on="chunk-0")
+    monkeypatch.setattr(manual_rag, "get_embeddings", lambda: embeddings)
+    monkeypatch.setattr(manual_rag, "get_collection", lambda: collection)
+
+    async def run():
+        with pytest.raises(RuntimeError, match="임베딩 배치 0 실패"):
+            await manual_rag.embed_and_store_documents(_docs(10), "m1", batch_size=2, max_concurrency=5, max_retries=1)
+        # 이벤트 루프가 계속 도는 동안에도 남은 배치가 임베딩/저장되지 않아야 한다
+        await asyncio.sleep(0.2)
+
+    asyncio.run(run())
+
+    assert embeddings.completed == []
+    assert collection.upserted_ids == []
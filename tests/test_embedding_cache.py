@@ -0,0 +1,48 @@
+import asyncio
+import threading
+
+from app.db.embedding_cache import CachedQueryEmbeddings
+
+
+class FakeRedis:
+    """호출된 스레드를 기록한다."""
+
+    def __init__(self):
+        self.values = {}
+        self.threads = []
+
+    def get(self, key):
+        self.threads.append(threading.current_thread())
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        self.threads.append(threading.current_thread())
+        self.values[key] = value
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.calls = 0
+
+    async def aembed_query(self, text):
+        self.calls += 1
+        return [0.1, 0.2]
+
+
+def test_async_query_keeps_redis_off_the_event_loop():
+    redis, embeddings = FakeRedis(), FakeEmbeddings()
+    cache = CachedQueryEmbeddings(embeddings, model="test")
+    cache._redis = redis
+
+    async def run():
+        loop_thread = threading.current_thread()
+        first = await cache.aembed_query("황산 희석 방법")
+        cache.clear_local()
+        second = await cache.aembed_query("황산  희석 방법")  # 정규화 후 같은 키 -> Redis 적중
+        return loop_thread, first, second
+
+    loop_thread, first, second = asyncio.run(run())
+
+    assert first == second == [0.1, 0.2]
+    assert embeddings.calls == 1
+    assert redis.threads and all(thread is not loop_thread for thread in redis.threads)
@@ -0,0 +1,60 @@
+import json
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.crud import experiment_log_crud
+from app.models.experiment_log import ExperimentLog
+from app.services import agent_chat_service
+from app.services.agent_chat_service import ExperimentLogger
+
+ENTRIES = [
+    {"user_id": "u1", "type": "progress", "content": "50ml 넣었어", "timestamp": "2024-05-01T10:00:00.123456"},
+    {"user_id": "u1", "type": "result", "content": "색이 변했어", "timestamp": "2024-05-01T10:05:00.654321"},
+]
+
+
+def _session_factory():
+    engine = create_engine("sqlite://")
+    ExperimentLog.__table__.create(engine)
+    return sessionmaker(bind=engine)
+
+
+def test_insert_skips_logs_that_were_already_saved():
+    session = _session_factory()()
+    logs = [
+        {"user_id": e["user_id"], "log_type": e["type"], "content": e["content"],
+         "created_at": datetime.fromisoformat(e["timestamp"])}
+        for e in ENTRIES
+    ]
+    assert experiment_log_crud.create_missing_experiment_logs(session, logs) == 2
+    assert experiment_log_crud.create_missing_experiment_logs(session, logs) == 0
+    assert session.query(ExperimentLog).count() == 2
+
+
+def test_leftover_migrating_file_is_resumed(tmp_path, monkeypatch):
+    monkeypatch.setattr(agent_chat_service, "SessionLocal", _session_factory())
+    log_file = tmp_path / "experiment_logs.json"
+    # 이전 실행이 .migrating으로 바꾼 뒤 죽은 상태
+    (tmp_path / "experiment_logs.json.migrating").write_text(json.dumps(ENTRIES), encoding="utf-8")
+
+    logger = ExperimentLogger(str(log_file))
+    assert logger.migrate_json_file() == 2
+    assert not (tmp_path / "experiment_logs.json.migrating").exists()
+    assert (tmp_path / "experiment_logs.json.migrating.migrated").exists()
+    assert logger.migrate_json_file() == 0
+
+
+def test_failed_migration_keeps_the_file(tmp_path, monkeypatch):
+    def fail(db, logs):
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(agent_chat_service, "SessionLocal", _session_factory())
+    monkeypatch.setattr(experiment_log_crud, "create_missing_experiment_logs", fail)
+    log_file = tmp_path / "experiment_logs.json"
+    log_file.write_text(json.dumps(ENTRIES), encoding="utf-8")
+
+    assert ExperimentLogger(str(log_file)).migrate_json_file() == 0
+    assert log_file.exists()
+    assert not (tmp_path / "experiment_logs.json.migrated").exists()
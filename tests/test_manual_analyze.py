@@ -0,0 +1,79 @@
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from app.services import manual_analyze
+
+MANUAL_IDS = [f"manual-{i}" for i in range(6)]
+
+
+class FakeVectorStore:
+    """manual_id마다 고유 문장을 가진 청크를 돌려주는 벡터스토어. 모든 요청이 동시에 로드되도록 맞춘다."""
+
+    def __init__(self, parties: int):
+        self.barrier = threading.Barrier(parties, timeout=5)
+
+    def get(self, where):
+        manual_id = where["manual_id"]
+        self.barrier.wait()
+        return {
+            "documents": [f"{manual_id} 위험 문장 {i}" for i in range(3)],
+            "metadatas": [{"manual_id": manual_id} for _ in range(3)],
+        }
+
+
+class FakeLLM:
+    """프롬프트에 들어온 청크 본문을 그대로 위험 문장으로 돌려준다."""
+
+    def invoke(self, messages):
+        time.sleep(0.01)
+        sentences = re.findall(r"\[청크 \d+\]\n(.+)", messages[0].content)
+        return SimpleNamespace(content=json.dumps({"risk_sentences": sentences}, ensure_ascii=False))
+
+
+class FakeAgent:
+    def __init__(self, tools):
+        self.extract = tools[0]
+
+    def invoke(self, inputs):
+        manual_id = re.search(r"manual_id='([^']+)'", inputs["messages"][0].content).group(1)
+        extracted = json.loads(self.extract.invoke({"manual_id": manual_id}))
+        classified = {"위험 조언": extracted["risk_sentences"], "주의사항": [], "안전수칙": []}
+        return {"messages": [SimpleNamespace(content=json.dumps(classified, ensure_ascii=False))]}
+
+
+def test_concurrent_analyses_do_not_share_chunks(monkeypatch):
+    store = FakeVectorStore(len(MANUAL_IDS))
+    monkeypatch.setattr(manual_analyze, "get_vectorstore", lambda: store)
+    monkeypatch.setattr(manual_analyze, "llm", FakeLLM())
+    monkeypatch.setattr(manual_analyze, "create_react_agent", lambda llm, tools, prompt: FakeAgent(tools))
+
+    with ThreadPoolExecutor(max_workers=len(MANUAL_IDS)) as executor:
+        results = dict(zip(MANUAL_IDS, executor.map(manual_analyze._run_manual_risk_analysis, MANUAL_IDS)))
+
+    for manual_id, result in results.items():
+        assert result["success"], result
+        assert result["manual_id"] == manual_id
+        sentences = result["결과"]["위험 조언"]
+        assert sentences == [f"{manual_id} 위험 문장 {i}" for i in range(3)]
+
+
+def test_extract_tool_only_sees_its_own_chunks(monkeypatch):
+    monkeypatch.setattr(manual_analyze, "llm", FakeLLM())
+    tools = {
+        manual_id: manual_analyze.make_extract_risk_chunks_tool([
+            manual_analyze.Document(page_content=f"{manual_id} 위험 문장", metadata={"manual_id": manual_id})
+        ])
+        for manual_id in MANUAL_IDS
+    }
+
+    def run(manual_id):
+        return json.loads(tools[manual_id].invoke({"manual_id": manual_id}))["risk_sentences"]
+
+    with ThreadPoolExecutor(max_workers=len(MANUAL_IDS)) as executor:
+        results = dict(zip(MANUAL_IDS, executor.map(run, MANUAL_IDS)))
+
+    assert results == {manual_id: [f"{manual_id} 위험 문장"] for manual_id in MANUAL_IDS}
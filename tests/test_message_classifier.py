@@ -0,0 +1,48 @@
+import pytest
+
+from app.services import message_classifier
+from app.services.message_classifier import classify_locally, classify_message, EXPERIMENT_LOG, MESSAGE
+
+
+@pytest.mark.parametrize("message", [
+    "비커에 증류수 50ml 넣었어",
+    "80도에서 10분 가열했음",
+    "색이 파랗게 변했어",
+])
+def test_plain_records_are_classified_locally(message):
+    assert classify_locally(message) == EXPERIMENT_LOG
+
+
+@pytest.mark.parametrize("message", [
+    "황산 희석할 때 주의사항 알려줘",
+    "이 실험 순서가 어떻게 돼?",
+])
+def test_plain_questions_are_classified_locally(message):
+    assert classify_locally(message) == MESSAGE
+
+
+@pytest.mark.parametrize("message", [
+    "원심분리 5분 돌렸는데 다음 단계 알려줘",
+    "95도로 가열했어요. 다음엔 뭐 해야 해?",
+    "시약 넣었는데 색이 안 변했어. 원인이 뭘까",
+])
+def test_records_with_a_question_are_not_logged_locally(message):
+    # 실험 진행 서술 + 질문은 로컬에서 실험 기록으로 단정하지 않고 LLM에 넘긴다
+    assert classify_locally(message) != EXPERIMENT_LOG
+
+
+@pytest.mark.parametrize("message", [
+    "37도에서 30분 배양하면 돼",
+    "온도 25도 맞춰야 해",
+    "10ml 넣으면 되는 거 맞아",
+])
+def test_quantities_without_a_completed_action_are_not_logged_locally(message):
+    # 수치만 있고 과거/완료 서술이 없으면 실험 기록으로 단정하지 않는다
+    assert classify_locally(message) != EXPERIMENT_LOG
+
+
+def test_ambiguous_message_falls_back_to_llm(monkeypatch):
+    calls = []
+    monkeypatch.setattr(message_classifier, "llm_classify_message_type", lambda m: calls.append(m) or MESSAGE)
+    assert classify_message("원심분리 5분 돌렸는데 다음 단계 알려줘") == MESSAGE
+    assert calls == ["원심분리 5분 돌렸는데 다음 단계 알려줘"]
@@ -0,0 +1,30 @@
+import pytest
+
+from app.services.agent_chat_service import route_question, ROUTE_AGENT, ROUTE_DIRECT
+
+HISTORY = [{"role": "user", "content": "황산 희석 방법 알려줘"}, {"role": "assistant", "content": "물에 산을 천천히 넣습니다."}]
+
+
+@pytest.mark.parametrize("message, history", [
+    ("그거 더 자세히 설명해줘", HISTORY),
+    ("그럼 반응 온도는 몇 도로 맞춰야 하나요?", HISTORY),
+    ("아까 말한 시약의 농도는 얼마인가요?", HISTORY),
+    ("그 다음에 무엇을 해야 하는지 알려줘", HISTORY),
+    ("A법과 B법의 차이가 뭐야?", None),
+    ("두 시약을 비교해서 알려줘", None),
+    ("온도는 몇 도야? 시간은 얼마나 걸려?", None),
+])
+def test_follow_up_and_multi_hop_questions_use_agent(message, history):
+    assert route_question(message, history) == ROUTE_AGENT
+
+
+@pytest.mark.parametrize("message, history", [
+    # "또"는 "또는"의 일부로, "및"/"모두"/"다시"는 일반 표현으로 쓰였으므로 에이전트로 보내지 않는다
+    ("희석할 때 물 또는 에탄올 중 무엇을 쓰나요?", HISTORY),
+    ("필요한 시약 및 장비 목록을 알려주세요", None),
+    ("시약을 모두 넣은 뒤 몇 분 기다려야 하나요?", None),
+    ("가열 후에 다시 식혀야 하는 온도가 궁금해요", HISTORY),
+    ("그거 더 자세히 설명해줘", None),
+])
+def test_single_questions_use_direct_route(message, history):
+    assert route_question(message, history) == ROUTE_DIRECT